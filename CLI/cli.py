@@ -4,161 +4,592 @@ Nusantara Mission - Interactive Text Adventure Game
 """
 
 import os
+import sys
 import json
 import time
 import random
+import argparse
+from types import GeneratorType
 from typing import Dict, List, Any
 
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from shared import savecodec
+from shared.replay import Recorder, Replay, ReplayExhausted, ReplayMismatch, capture_files
+from shared.items import Inventory, format_item
+from shared.l10n import LOCALES, SOURCE_LOCALE
+from shared.story import StoryLibrary
+
+# Returned by run_steps when a script runs to its end without a "next" step
+_KEEP_GOING = object()
+
+try:
+    import termios
+    import tty
+    import select
+except ImportError: # Windows
+    termios = None
+    import msvcrt
+
+
+class KeyWatcher:
+    """Waits like time.sleep, but returns early if a key is pressed on the terminal.
+
+    While active the terminal is in cbreak mode with echo off, so the key that
+    skips the typing effect is swallowed instead of showing up in the next answer.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdin
+        self.active = self.stream.isatty()
+        self._saved_mode = None
+
+    def __enter__(self):
+        if self.active and termios:
+            fd = self.stream.fileno()
+            self._saved_mode = termios.tcgetattr(fd)
+            tty.setcbreak(fd)
+            mode = termios.tcgetattr(fd)
+            mode[3] &= ~termios.ECHO
+            termios.tcsetattr(fd, termios.TCSADRAIN, mode)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._saved_mode is not None:
+            termios.tcsetattr(self.stream.fileno(), termios.TCSADRAIN, self._saved_mode)
+            self._saved_mode = None
+
+    def wait(self, timeout: float) -> bool:
+        """Sleeps up to timeout seconds; returns True if a key was pressed (and consumes it)."""
+        if not self.active:
+            time.sleep(timeout)
+            return False
+        if termios:
+            fd = self.stream.fileno()
+            ready, _, _ = select.select([fd], [], [], timeout)
+            if ready:
+                os.read(fd, 1024)
+                return True
+            return False
+        deadline = time.monotonic() + timeout
+        while True:
+            if msvcrt.kbhit():
+                while msvcrt.kbhit():
+                    msvcrt.getwch()
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(remaining, 0.01))
+
+
+class Typewriter:
+    """Writes text with a typing effect, a few characters per flush.
+
+    Each flush writes a chunk of at least MIN_CHUNK characters, or TICK seconds'
+    worth at the per-character delay, then waits for as long as the chunk took
+    to type, instead of flushing and sleeping per character. A keypress finishes
+    the rest of the paragraph instantly (until the next prompt), and output that
+    is not a terminal is written without any delay.
+
+    One KeyWatcher stays open from the first typed line of a paragraph to
+    end_paragraph(), so the terminal mode is switched once per paragraph, and
+    a key pressed between two lines still skips the next one.
+    """
+
+    TICK = 0.05
+    MIN_CHUNK = 3 # At the usual 0.03 s delay: a flush every 0.09 s rather than every character
+
+    @classmethod
+    def chunk_size(cls, delay: float) -> int:
+        """Characters written per flush at a per-character delay; server.py types in the same chunks."""
+        return max(cls.MIN_CHUNK, round(cls.TICK / delay))
+
+    def __init__(self, stream=None, instant=None):
+        self.stream = stream or sys.stdout
+        self.instant = not self.stream.isatty() if instant is None else instant
+        self.skipping = False
+        self._keys = None # KeyWatcher of the paragraph being typed
+
+    def write(self, text: str, delay: float):
+        if self.instant or self.skipping or delay <= 0 or not text:
+            self.stream.write(text + "\n")
+            self.stream.flush()
+            return
+
+        chunk = self.chunk_size(delay)
+        if self._keys is None:
+            self._keys = KeyWatcher().__enter__()
+        keys = self._keys
+        for start in range(0, len(text), chunk):
+            self.stream.write(text[start:start + chunk])
+            self.stream.flush()
+            if keys.wait(chunk * delay):
+                self.skipping = True
+                self.stream.write(text[start + chunk:])
+                break
+        self.stream.write("\n")
+        self.stream.flush()
+
+    def end_paragraph(self):
+        """Called before each prompt and when the game ends; typing resumes at normal speed afterwards."""
+        self.skipping = False
+        if self._keys is not None:
+            self._keys.__exit__(None, None, None) # Back to the normal terminal mode for input()
+            self._keys = None
+
+
+class SaveJournal:
+    """Append-only save: a snapshot (shared/savecodec.py) plus a journal of changes made since.
+
+    Every inventory change, recorded choice, answer and era change is appended
+    to the journal as one small JSON line, so saving costs O(change) and the game
+    can autosave after every choice. After COMPACT_EVERY records the player's
+    full state is written as a new snapshot and the journal starts over.
+
+    Records carry an increasing sequence number and the snapshot stores the last
+    one it includes, so records left behind by an interrupted compaction are
+    skipped on recovery instead of being applied twice.
+
+    Eras can only be played from their start, so the journal also keeps the
+    state the player entered the current era with and the answers given since;
+    resuming replays those answers instead of adding the era's items twice.
+
+    With defer_writes the file work is queued instead of done on the spot, and
+    the owner runs it with run_writes(); server.py does that on a worker thread
+    so one player's disk writes don't hold up the other sessions.
+    """
+
+    COMPACT_EVERY = 50
+
+    def __init__(self, snapshot_path: str, compact_every: int = None, defer_writes: bool = False):
+        self.snapshot_path = snapshot_path
+        base_path = os.path.splitext(snapshot_path)[0]
+        self.path = base_path + ".journal"
+        self.legacy_path = base_path + ".json" # Saves from before the binary format
+        self.compact_every = compact_every or self.COMPACT_EVERY
+        self.seq = 0
+        self.pending = 0 # Records in the journal since the last snapshot
+        self.era_entry = None # Player state at the start of the current era
+        self.answers = [] # Choices made in the current era, in order
+        self.defer_writes = defer_writes
+        self._writes = [] # (function, args) of the file work queued with defer_writes
+        self._file = None
+
+    def paths(self):
+        return (self.snapshot_path, self.path, self.legacy_path)
+
+    def exists(self) -> bool:
+        return any(os.path.exists(path) for path in self.paths())
+
+    def record(self, player, op: str, **fields):
+        """Appends one change; compacts once enough records have piled up"""
+        self.seq += 1
+        record = {"op": op, "seq": self.seq}
+        record.update(fields)
+        self._track(player, record)
+        self._write(self._append, json.dumps(record, separators=(",", ":")) + "\n")
+        self.pending += 1
+        if self.pending >= self.compact_every:
+            self.compact(player)
+
+    def _write(self, function, *args):
+        if self.defer_writes:
+            self._writes.append((function, args))
+        else:
+            function(*args)
+
+    def has_writes(self) -> bool:
+        return bool(self._writes)
+
+    def run_writes(self):
+        """Does the file work queued with defer_writes, in order"""
+        writes, self._writes = self._writes, []
+        for function, args in writes:
+            function(*args)
+
+    def _append(self, line: str):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(line)
+        self._file.flush()
+
+    def _track(self, player, record):
+        if record["op"] == "era":
+            self.era_entry = player.to_dict()
+            self.answers = []
+        elif record["op"] == "answer":
+            self.answers.append(record["value"])
+
+    def compact(self, player):
+        """Writes the full player state as the snapshot and empties the journal"""
+        data = player.to_dict()
+        data["journal_seq"] = self.seq
+        if self.era_entry is not None:
+            data["resume"] = {"era_entry": self.era_entry, "answers": list(self.answers)}
+        self._write(self._write_snapshot, data)
+        self.pending = 0
+
+    def _write_snapshot(self, data):
+        savecodec.write_save(self.snapshot_path, data)
+        self._close_file()
+        if os.path.exists(self.path) and os.path.getsize(self.path):
+            open(self.path, "w").close()
+
+    def reset(self, player):
+        """Starts the save over for a new game"""
+        self.seq = 0
+        self.era_entry = player.to_dict()
+        self.answers = []
+        self.compact(player)
+
+    def recover(self):
+        """Rebuilds the player from the snapshot and the journal tail (None if there is no save)"""
+        self.close()
+        player = None
+        self.seq = 0
+        self.era_entry = None
+        self.answers = []
+        snapshot_path = self.snapshot_path
+        if not os.path.exists(snapshot_path):
+            snapshot_path = self.legacy_path
+        if os.path.exists(snapshot_path):
+            data = savecodec.read_save(snapshot_path)
+            player = Player.from_dict(data)
+            self.seq = data.get("journal_seq", 0)
+            resume = data.get("resume") or {}
+            # Saves from before the journal were only written between eras
+            self.era_entry = resume.get("era_entry") or player.to_dict()
+            self.answers = resume.get("answers", [])
+
+        self.pending = 0
+        torn = False
+        if player is not None and os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        torn = True # Cut off by a crash mid-write; nothing after it was saved
+                        break
+                    if record["seq"] <= self.seq:
+                        continue # Already folded into the snapshot
+                    player.apply(record)
+                    self._track(player, record)
+                    self.seq = record["seq"]
+                    self.pending += 1
+
+        if player is not None and torn:
+            self.compact(player) # Don't append after a half-written line
+        return player
+
+    def close(self):
+        """Finishes any queued writes and closes the journal file"""
+        self.run_writes()
+        self._close_file()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
 class Player:
+    __slots__ = ("name", "inventory", "current_era", "completed_eras", "choices", "journal", "output", "tr")
+
     def __init__(self, name: str):
         self.name = name
-        self.inventory = []
+        self.inventory = Inventory()
         self.current_era = "intro"
         self.completed_eras = []
         self.choices = {}  # Stores important choices made by the player
+        self.journal = None # SaveJournal that records every change, once the game is saved
+        self.output = None # Stream for inventory messages (None is stdout)
+        self.tr = LOCALES.translator(SOURCE_LOCALE) # Translator for those messages, the game's
+
+    def _record(self, op: str, **fields):
+        if self.journal is not None:
+            self.journal.record(self, op, **fields)
 
     def add_item(self, item: str):
-        self.inventory.append(item)
-        print(f"\n[+] {item} added to inventory!")
+        self.inventory.add(item)
+        self._record("add_item", item=item)
+        print(self.tr("\n[+] {item} added to inventory!").format(item=self.tr(item)), file=self.output)
 
     def remove_item(self, item: str):
-        if item in self.inventory:
-            self.inventory.remove(item)
-            print(f"\n[-] {item} removed from inventory.")
+        if self.inventory.remove(item):
+            self._record("remove_item", item=item)
+            print(self.tr("\n[-] {item} removed from inventory.").format(item=self.tr(item)), file=self.output)
             return True
         return False
 
+    def set_choice(self, key: str, choice: int):
+        self.choices[key] = choice
+        self._record("choice", key=key, value=choice)
+
+    def note_answer(self, choice: int):
+        """Journals a story choice so a resumed era can replay it"""
+        self._record("answer", value=choice)
+
+    def complete_era(self, era: str):
+        self.completed_eras.append(era)
+        self._record("complete", era=era)
+
+    def enter_era(self, era: str):
+        self.current_era = era
+        self._record("era", era=era)
+
+    def apply(self, record: Dict[str, Any]):
+        """Replays a journal record without recording or printing it again"""
+        op = record["op"]
+        if op == "add_item":
+            self.inventory.add(record["item"])
+        elif op == "remove_item":
+            self.inventory.remove(record["item"])
+        elif op == "choice":
+            self.choices[record["key"]] = record["value"]
+        elif op == "complete":
+            self.completed_eras.append(record["era"])
+        elif op == "era":
+            self.current_era = record["era"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """A copy of the player's state; later changes to the player don't affect it"""
+        return {
+            "player_name": self.name,
+            "inventory": self.inventory.to_list(),
+            "current_era": self.current_era,
+            "completed_eras": list(self.completed_eras),
+            "choices": dict(self.choices)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Player":
+        player = cls(data["player_name"])
+        player.inventory = Inventory(data["inventory"])
+        player.current_era = data["current_era"]
+        player.completed_eras = list(data["completed_eras"])
+        player.choices = dict(data.get("choices", {}))
+        return player
+
     def has_item(self, item: str) -> bool:
         return item in self.inventory
 
     def show_inventory(self):
-        print("\n=== INVENTORY ===")
+        print(self.tr("\n=== INVENTORY ==="), file=self.output)
         if not self.inventory:
-            print("Inventory is empty.")
+            print(self.tr("Inventory is empty."), file=self.output)
         else:
-            for i, item in enumerate(self.inventory, 1):
-                print(f"{i}. {item}")
-        print("================")
+            for i, (item, quantity) in enumerate(self.inventory.items(), 1):
+                print(f"{i}. {format_item(self.tr(item), quantity)}", file=self.output)
+        print("================", file=self.output)
 
 
 class Game:
-    def __init__(self):
+    """The terminal game.
+
+    The game flow (start() and everything it calls that waits on the player)
+    is written as generators that yield I/O requests instead of blocking:
+
+        ("type", text, delay)   show text with a typing effect
+        ("input", prompt)       read a line; the answer is sent back in
+        ("sleep", seconds)      pause
+        ("io", function)        call function() for file I/O; its result is sent
+                                back in, or what it raised is raised at the yield
+
+    play() carries them out on the terminal; server.py awaits them for each
+    network session instead (running "io" on a worker thread), so one process
+    can host many players. Plain
+    output goes through write(), to self.output. Everything shown is passed
+    through self.tr first (see shared/l10n.py).
+    """
+
+    def __init__(self, instant_text=None, output=None, story=None, language=SOURCE_LOCALE):
         self.player = None
-        self.eras = {
-            "intro": self.era_intro,
-            "majapahit": self.era_majapahit,
-            "colonial": self.era_colonial,
-            # Other eras will be added later
+        self.output = output # Stream for game output (None is stdout)
+        self.tr = LOCALES.translator(language)
+        self.typewriter = Typewriter(instant=instant_text)
+        self.story = story or StoryLibrary() # Eras are loaded from story/ the first time they are played
+        self.script_vars = {}
+        self._step_handlers = {
+            "clear": self._step_clear,
+            "pause": self._step_pause,
+            "add_item": self._step_add_item,
+            "choose": self._step_choose,
+            "switch": self._step_switch,
+            "if_completed": self._step_if_completed,
+            "if_any_item": self._step_if_any_item,
+            "complete": self._step_complete,
         }
         self.game_data = {}
-        self.save_file = "nusantara_mission_save.json" # Renamed save file
+        self.save_file = "nusantara_mission_save.sav" # Binary format, see shared/savecodec.py
+        self._journal = None
+        self._resume_answers = [] # Journaled choices still to replay after loading mid-era
+        self._recovered_state = None
+        self._mute_file = None # os.devnull while a loaded era is replayed silently
+        self._unmuted_output = None
+        self.defer_journal_writes = False # Leave journal writes for the caller to run (see SaveJournal)
+        self.recorder = None # Recorder that logs every answer (--record)
+        self.replay = None # Replay whose answers are used instead of reading input (--replay)
         # self.load_game_data() # Removed - will be called during start
 
+    @property
+    def journal(self) -> SaveJournal:
+        """The journal next to the current save file"""
+        if self._journal is None or self._journal.snapshot_path != self.save_file:
+            if self._journal is not None:
+                self._journal.close()
+            self._journal = SaveJournal(self.save_file, defer_writes=self.defer_journal_writes)
+        return self._journal
+
+    def play(self, flow=None):
+        """Runs a game flow (the whole game by default) on the terminal"""
+        flow = self.start() if flow is None else flow
+        send, answer = flow.send, None
+        try:
+            while True:
+                try:
+                    request = send(answer)
+                except StopIteration as done:
+                    return done.value
+                send, answer = flow.send, None
+                kind = request[0]
+                if kind == "type":
+                    self.typewriter.write(request[1], request[2])
+                elif kind == "input":
+                    self.typewriter.end_paragraph() # Any skipped typing effect ends here
+                    answer = input(request[1])
+                elif kind == "sleep":
+                    time.sleep(request[1])
+                elif kind == "io":
+                    try:
+                        answer = request[1]()
+                    except Exception as e:
+                        send, answer = flow.throw, e
+        finally:
+            flow.close()
+            self.typewriter.end_paragraph() # Leaves the terminal as it found it
+
+    def write(self, text: str = ""):
+        print(text, file=self.output)
+
     def load_game_data(self):
-        """Loads game data from a JSON file"""
+        """Loads the snapshot's game data (without the journal)"""
         try:
             if os.path.exists(self.save_file):
-                with open(self.save_file, 'r') as f:
-                    self.game_data = json.load(f)
+                self.game_data = savecodec.read_save(self.save_file)
                 return True
             return False
         except Exception as e:
-            print(f"Error loading game data: {e}")
+            self.write(self.tr("Error loading game data: {error}").format(error=e))
             return False
 
     def save_game(self):
-        """Saves game progress to a JSON file"""
+        """Saves the full game state as a snapshot; changes since are journaled as they happen"""
         if not self.player:
             return False
 
-        save_data = {
-            "player_name": self.player.name,
-            "inventory": self.player.inventory,
-            "current_era": self.player.current_era,
-            "completed_eras": self.player.completed_eras,
-            "choices": self.player.choices
-        }
-
         try:
-            with open(self.save_file, 'w') as f:
-                json.dump(save_data, f, indent=2)
-            print("\n[Game saved]")
+            self.player.journal = self.journal
+            self.journal.compact(self.player)
+            self.write(self.tr("\n[Game saved]"))
             return True
         except Exception as e:
-            print(f"Error saving game: {e}")
+            self.write(self.tr("Error saving game: {error}").format(error=e))
             return False
 
     def clear_screen(self):
+        if self._resume_answers or self.replay is not None:
+            return
         os.system('cls' if os.name == 'nt' else 'clear')
 
     def type_text(self, text: str, delay: float = 0.03):
         """Displays text with a typing effect"""
-        for char in text:
-            print(char, end='', flush=True)
-            time.sleep(delay)
-        print()
+        if self._resume_answers:
+            return
+        yield ("type", text, delay)
+
+    def prompt(self, text: str = ""):
+        """Reads a line of input"""
+        if self._resume_answers:
+            return ""
+        if self.replay is not None:
+            answer = self.replay.next_input()
+            self.write(text + answer)
+        else:
+            answer = yield ("input", text)
+        if self.recorder is not None:
+            self.recorder.record(answer)
+        return answer
 
-    def show_options(self, options: List[str]) -> int:
+    def replay_state(self) -> Dict[str, Any]:
+        """The state a recording stores and a replay has to end in"""
+        return {"player": self.player.to_dict() if self.player else None}
+
+    def show_options(self, options: List[str]):
         """Displays options and returns the chosen index"""
-        print("\nOptions:")
+        self.write(self.tr("\nOptions:"))
         for i, option in enumerate(options, 1):
-            print(f"{i}. {option}")
+            self.write(f"{i}. {self.tr(option)}")
 
         while True:
             try:
-                choice = input("\nYour choice [type number or 'm' for menu]: ")
+                choice = yield from self.prompt(self.tr("\nYour choice [type number or 'm' for menu]: "))
 
                 if choice.lower() == 'm':
-                    self.show_menu()
-                    print("\nOptions:") # Show options again after menu
+                    yield from self.show_menu()
+                    self.write(self.tr("\nOptions:")) # Show options again after menu, in the language now chosen
                     for i, option in enumerate(options, 1):
-                        print(f"{i}. {option}")
+                        self.write(f"{i}. {self.tr(option)}")
                     continue
 
                 choice = int(choice)
                 if 1 <= choice <= len(options):
                     return choice - 1
-                print("Invalid choice. Please try again.")
+                self.write(self.tr("Invalid choice. Please try again."))
             except ValueError:
-                print("Please enter a valid number or 'm' for menu.")
+                self.write(self.tr("Please enter a valid number or 'm' for menu."))
 
     def start(self):
         self.clear_screen()
 
-        if os.path.exists(self.save_file):
-            self.type_text("Saved game data found.")
+        if (yield ("io", self.journal.exists)):
+            yield from self.type_text(self.tr("Saved game data found."))
             options = ["Continue previous game", "Start new game"]
-            choice = self.show_options(options)
+            choice = yield from self.show_options(options)
 
             if choice == 0:
-                if self.load_saved_game():
-                    self.type_text(f"Welcome back, {self.player.name}!")
-                    input("\nPress ENTER to continue...")
+                if (yield from self.load_saved_game()):
+                    yield from self.type_text(self.tr("Welcome back, {name}!").format(name=self.player.name))
+                    yield from self.prompt(self.tr("\nPress ENTER to continue..."))
                 else:
-                    self.type_text("Failed to load saved game. Starting a new game...")
-                    time.sleep(2)
-                    self.new_game()
+                    yield from self.type_text(self.tr("Failed to load saved game. Starting a new game..."))
+                    if self.replay is None:
+                        yield ("sleep", 2)
+                    yield from self.new_game()
             else:
-                self.new_game()
+                yield from self.new_game()
         else:
-            self.new_game()
+            yield from self.new_game()
 
         current_era = self.player.current_era
         while current_era:
-            era_function = self.eras.get(current_era)
-            if era_function:
-                next_era = era_function()
+            if self.story.has_era(current_era):
+                next_era = yield from self.run_era(current_era)
+                self.finish_resume() # In case the era ended before every answer was replayed
                 if next_era:
-                    self.player.current_era = next_era
+                    self.player.enter_era(next_era) # Journaled, so this is already saved
                     current_era = next_era
-                    self.save_game()
+                    self.write(self.tr("\n[Game saved]"))
                 else:
                     break
             else:
-                print(f"Error: Era '{current_era}' not found.")
+                self.write(self.tr("Error: Era '{era}' not found.").format(era=current_era))
                 break
 
-        self.show_ending()
+        yield from self.show_ending()
 
     def new_game(self):
         """Starts a new game"""
@@ -171,350 +602,270 @@ class Game:
 ██║ ╚═╝ ██║██║███████║██║    ██║ ╚████║╚██████╔╝███████║██║  ██║██║ ╚████║   ██║   ██║  ██║██║  ██║██║  ██║
 ╚═╝     ╚═╝╚═╝╚══════╝╚═╝    ╚═╝  ╚═══╝ ╚═════╝ ╚══════╝╚═╝  ╚═╝╚═╝  ╚═══╝   ╚═╝   ╚═╝  ╚═╝╚═╝  ╚═╝╚═╝  ╚═╝
         """
-        print(title)
-        self.type_text("\nWelcome to Nusantara Mission!")
-        self.type_text("An adventure through time to save Indonesian history.")
+        self.write(title)
+        yield from self.type_text(self.tr("\nWelcome to Nusantara Mission!"))
+        yield from self.type_text(self.tr("An adventure through time to save Indonesian history."))
 
-        player_name = input("\nEnter your name: ")
+        player_name = yield from self.prompt(self.tr("\nEnter your name: "))
         while not player_name:
-            print("Name cannot be empty.")
-            player_name = input("Enter your name: ")
+            self.write(self.tr("Name cannot be empty."))
+            player_name = yield from self.prompt(self.tr("Enter your name: "))
 
         self.player = Player(player_name)
-        self.show_intro() # Call intro after getting the name
+        self.player.output = self.output
+        self.player.tr = self.tr
+        self.player.journal = self.journal
+        self.journal.reset(self.player)
+        yield from self.show_intro() # Call intro after getting the name
 
     def load_saved_game(self):
-        """Loads a saved game"""
+        """Loads a saved game; returns whether it could"""
         try:
-            if self.load_game_data():
-                self.player = Player(self.game_data["player_name"])
-                self.player.inventory = self.game_data["inventory"]
-                self.player.current_era = self.game_data["current_era"]
-                self.player.completed_eras = self.game_data["completed_eras"]
-                self.player.choices = self.game_data.get("choices", {})
+            recovered = yield ("io", self.journal.recover)
+            if recovered is not None:
+                # Replay the current era from its start; finish_resume picks the journal back up
+                self.player = Player.from_dict(self.journal.era_entry)
+                self.player.output = self.output
+                self.player.tr = self.tr
+                self._recovered_state = recovered.to_dict()
+                self._resume_answers = list(self.journal.answers)
+                if self._resume_answers:
+                    self._mute_file = open(os.devnull, "w")
+                    self._unmuted_output = self.output
+                    self.output = self.player.output = self._mute_file
+                else:
+                    self.finish_resume()
                 return True
             return False
         except Exception as e:
-            print(f"Error loading saved game: {e}")
+            self.write(self.tr("Error loading saved game: {error}").format(error=e))
             return False
 
+    def finish_resume(self):
+        """Ends the replay of a loaded era and starts journaling again"""
+        self._resume_answers = []
+        if self._mute_file is not None:
+            self._mute_file.close()
+            self._mute_file = None
+            self.output = self.player.output = self._unmuted_output
+        if self.player.journal is None:
+            self.player.journal = self.journal
+            if self.player.to_dict() != self._recovered_state:
+                # The rest of the era is journaled again as it is replayed
+                self.journal.compact(self.player)
+            self._recovered_state = None
+
     def show_intro(self):
         """Displays the narrative intro (without the title)"""
-        self.type_text(f"\nYou are {self.player.name}, a youth from the future sent back")
-        self.type_text("to the past to save Indonesian history from the threat of time changes.")
-        self.type_text("\nYour task is to explore various eras of Indonesian history,")
-        self.type_text("complete missions, and collect important artifacts.")
-        input("\nPress ENTER to start your adventure...")
-
-    def era_intro(self):
-        self.clear_screen()
-        self.type_text("Year 2150, Jakarta...")
-        self.type_text(f"\nProfessor Wijaya: \"{self.player.name}, you are our last hope. This time machine will")
-        self.type_text("take you to various important eras in Indonesian history.\"")
-        self.type_text("\nProfessor Wijaya: \"The Time Corruptors have altered our historical timeline.")
-        self.type_text("Your duty is to ensure history stays on its intended path.\"")
-
-        self.type_text("\nProfessor Wijaya hands you a device.")
-        self.player.add_item("Time Chronometer")
-
-        self.type_text("\nProfessor Wijaya: \"This Chronometer will help you travel between eras")
-        self.type_text("and track historical changes. Now, prepare for your first journey.\"")
-
-        options = ["Ready to depart for the Majapahit Kingdom era",
-                   "Ask for more details about this mission"]
-
-        choice = self.show_options(options)
-
-        if choice == 1:
-            self.clear_screen()
-            self.type_text("Professor Wijaya: \"The Time Corruptors want to change Indonesian history")
-            self.type_text("so that our nation never unites. They have sent agents")
-            self.type_text("to various important eras to alter key events.\"")
-
-            self.type_text("\nProfessor Wijaya: \"Your task is to find these agents,")
-            self.type_text("thwart their plans, and ensure history remains on track.\"")
-
-            input("\nPress ENTER to continue...")
-
-        self.clear_screen()
-        self.type_text("The time machine begins to vibrate. A blinding white light surrounds you.")
-        self.type_text("You feel your body being pulled into a vortex of time...")
-        self.type_text("\n*WHOOOSH*")
-
-        input("\nPress ENTER to continue...")
-        return "majapahit"
-
-    def era_majapahit(self):
-        self.clear_screen()
-
-        if "majapahit" in self.player.completed_eras:
-            self.type_text("You have completed the mission in the Majapahit era.")
-            self.type_text("The Time Chronometer indicates the timeline here is secure.")
-            options = ["Revisit the Majapahit era", "Continue to the next era"]
-            choice = self.show_options(options)
-            if choice == 1:
-                return "colonial"
-
-        self.type_text("Year 1350, Majapahit Kingdom...")
-        self.type_text("\nYou arrive in a bustling market. People in traditional attire")
-        self.type_text("pass by. The air is filled with the scent of spices.")
-        self.type_text("\nThe Time Chronometer blinks, displaying a message:")
-        self.type_text("\"MISSION: Ensure Gajah Mada still utters the Palapa Oath\"")
-        self.type_text("\nAn old merchant approaches you.")
-        self.type_text("Merchant: \"You're not from around here, young one. Your clothes are strange.\"")
-
-        options = [
-            "Say you are an envoy from a distant kingdom",
-            "Ask about Gajah Mada",
-            "Inquire about recent strange occurrences"
-        ]
-        choice = self.show_options(options)
-        self.player.choices["majapahit_merchant"] = choice
-
-        if choice == 0:
-            self.clear_screen()
-            self.type_text("You: \"I am an envoy from a distant kingdom, here to meet the leader of Majapahit.\"")
-            self.type_text("\nMerchant: \"Hmm, suspicious. But if you wish to meet the leader,")
-            self.type_text("you must go to the palace. Be careful, security has been tight lately.\"")
-            self.type_text("\nThe merchant gives you a batik cloth.")
-            self.player.add_item("Majapahit Batik Cloth")
-            self.type_text("\nMerchant: \"Wear this so you don't stand out so much.\"")
-        elif choice == 1:
-            self.clear_screen()
-            self.type_text("You: \"I wish to know about Gajah Mada. Where can I find him?\"")
-            self.type_text("\nMerchant: \"Gajah Mada? Our great Mahapatih? He is in great trouble.")
-            self.type_text("I hear someone has poisoned his mind, making him doubt his own oath.\"")
-            self.type_text("\nMerchant: \"If you want to see him, he is at Lingsar Temple")
-            self.type_text("seeking peace. But beware, there are suspicious strangers around him.\"")
-        else:
-            self.clear_screen()
-            self.type_text("You: \"Have there been any strange occurrences lately?\"")
-            self.type_text("\nMerchant: \"Indeed! A strangely dressed foreigner like you arrived")
-            self.type_text("a few days ago. He became close to Gajah Mada's advisors, and since then,")
-            self.type_text("our Mahapatih has begun to doubt his plan to unite Nusantara.\"")
-            self.type_text("\nMerchant: \"If you wish to know more, seek Empu Tantular in the palace library.\"")
-            self.type_text("He suspects something about that foreigner.")
-
-        self.type_text("\nWhere will you go next?")
-        locations = ["Majapahit Palace", "Lingsar Temple", "Palace Library"]
-        location_choice = self.show_options(locations)
-        self.player.choices["majapahit_location"] = location_choice
+        yield from self.type_text(self.tr("\nYou are {name}, a youth from the future sent back").format(name=self.player.name))
+        yield from self.type_text(self.tr("to the past to save Indonesian history from the threat of time changes."))
+        yield from self.type_text(self.tr("\nYour task is to explore various eras of Indonesian history,"))
+        yield from self.type_text(self.tr("complete missions, and collect important artifacts."))
+        yield from self.prompt(self.tr("\nPress ENTER to start your adventure..."))
+
+    def run_era(self, era_id):
+        """Plays an era's story script and returns the next era (None ends the game)"""
+        self.script_vars = {"name": self.player.name}
+        result = yield from self.run_steps(self.story.cli_script(era_id))
+        return None if result is _KEEP_GOING else result
+
+    def run_steps(self, steps):
+        for step in steps:
+            if isinstance(step, str):
+                yield from self.type_text(self.fill_text(self.tr(step)))
+                continue
+            if "next" in step:
+                return step["next"]
+            for kind, handler in self._step_handlers.items():
+                if kind in step:
+                    result = handler(step)
+                    if isinstance(result, GeneratorType): # A step that waits on the player
+                        result = yield from result
+                    if result is not _KEEP_GOING:
+                        return result
+                    break
+            else:
+                raise ValueError(f"Unknown story step: {step}")
+        return _KEEP_GOING
 
-        self.clear_screen()
-        self.type_text(f"You decide to go to {locations[location_choice]}...")
-        self.type_text("\n[This part will be developed further]")
-        input("\nPress ENTER to continue...")
+    def fill_text(self, text: str) -> str:
+        for key, value in self.script_vars.items():
+            text = text.replace("{" + key + "}", value)
+        return text
 
+    def _step_clear(self, step):
         self.clear_screen()
-        self.type_text("After various adventures in the Majapahit era...")
-        self.type_text("\nYou managed to foil the Time Corruptors' plans and ensure")
-        self.type_text("Gajah Mada still utters the Palapa Oath, keeping the timeline intact.")
-        self.type_text("\nThe Time Chronometer blinks, signaling your mission here is complete.")
-        self.type_text("Time to move to the next era...")
-        self.player.completed_eras.append("majapahit")
-        input("\nPress ENTER to continue...")
-        return "colonial"
-
-    def era_colonial(self):
-        """Dutch Colonial Era"""
-        self.clear_screen()
-
-        if "colonial" in self.player.completed_eras:
-            self.type_text("You have completed the mission in the Dutch Colonial era.")
-            self.type_text("The Time Chronometer indicates the timeline here is secure.")
-            options = ["Revisit the Dutch Colonial era", "Continue to the next era"]
-            choice = self.show_options(options)
-            if choice == 1:
-                return None # No 'independence' era yet
-
-        self.type_text("Year 1830, Batavia...")
-        self.type_text("\nYou arrive at a busy port. Large ships are docked,")
-        self.type_text("transporting spices and other produce. Dutch soldiers")
-        self.type_text("patrol the harbor.")
-        self.type_text("\nThe Time Chronometer blinks, displaying a message:")
-        self.type_text("\"MISSION: Ensure the Forced Cultivation System still incites public resistance\"")
-        self.type_text("\nAn old man in shabby clothes approaches you.")
-        self.type_text("Old Man: \"Be careful, young one. Your clothes are too conspicuous.")
-        self.type_text("The Company is always suspicious of strangers.\"")
+        return _KEEP_GOING
 
-        options = [
-            "Ask about the conditions in Batavia",
-            "Learn about the Forced Cultivation System",
-            "Ask about public resistance"
-        ]
-        choice = self.show_options(options)
-        self.player.choices["colonial_intro"] = choice
+    def _step_pause(self, step):
+        yield from self.prompt("\n" + self.tr(step["pause"]))
+        return _KEEP_GOING
 
-        if choice == 0:
-            self.clear_screen()
-            self.type_text("You: \"What are the conditions in Batavia like right now?\"")
-            self.type_text("\nOld Man: \"Bad, very bad. The Company is becoming crueler with")
-            self.type_text("their new policies. People are forced to grow crops they")
-            self.type_text("want, not what we need to eat.\"")
-            self.type_text("\nOld Man: \"Many are starving, sick, even dying. But")
-            self.type_text("they don't care as long as their warehouses are full of spices and coffee.\"")
-        elif choice == 1:
-            self.clear_screen()
-            self.type_text("You: \"Can you tell me about the Forced Cultivation System?\"")
-            self.type_text("\nOld Man: \"Ah, you don't know? Cultuurstelsel, they call it.")
-            self.type_text("We are forced to use 20% of our land to grow export crops:")
-            self.type_text("coffee, sugarcane, indigo, tobacco... not the rice we need.\"")
-            self.type_text("\nOld Man: \"What's strange is, recently a foreigner like you")
-            self.type_text("was seen talking to the Governor-General. Since then, there are rumors")
-            self.type_text("the system will be changed to be more 'humane'. That must not happen!\"")
-            self.type_text("\nYou: \"Why not?\"")
-            self.type_text("\nOld Man: \"Because it is the cruelty of this system that will spark")
-            self.type_text("a great resistance! If the system is softened, the people will not")
-            self.type_text("rise against the colonizers!\"")
-        else:
-            self.clear_screen()
-            self.type_text("You: \"Is there any resistance from the people?\"")
-            self.type_text("\nOld Man: \"Shh! Not so loud. Yes, of course, there is.")
-            self.type_text("The Diponegoro War just ended five years ago, but")
-            self.type_text("the spirit of resistance still burns in the people's hearts.\"")
-            self.type_text("\nOld Man: \"But something is odd. Lately, some resistance leaders")
-            self.type_text("have suddenly disappeared or changed their stance.")
-            self.type_text("It's as if someone is deliberately trying to quell the flames.\"")
-            self.type_text("\nThe Old Man gives you a letter.")
-            self.player.add_item("Secret Letter")
-            self.type_text("\nOld Man: \"This is a letter from one of the resistance leaders.")
-            self.type_text("Please investigate what is happening. Meet Sentot Prawirodirjo")
-            self.type_text("at the market tonight. He will recognize you by this letter.\"")
-
-        self.type_text("\nWhere will you go next?")
-        locations = ["Governor-General's Office", "Batavia Market", "Plantation on the outskirts"]
-        location_choice = self.show_options(locations)
-        self.player.choices["colonial_location"] = location_choice
+    def _step_add_item(self, step):
+        self.player.add_item(step["add_item"])
+        return _KEEP_GOING
 
-        self.clear_screen()
-        self.type_text(f"You decide to go to {locations[location_choice]}...")
-
-        if location_choice == 0:
-            self.type_text("\nYou arrive in front of a grand European-style building. Tight security")
-            self.type_text("with armed soldiers at every corner.")
-            self.type_text("\nA soldier stops you.")
-            self.type_text("Soldier: \"Halt! Who are you and what is your business?\"")
-            if self.player.has_item("Dutch Permit") or self.player.has_item("Dutch Official Uniform"): # Example items
-                self.type_text("\nYou show your fake identification.")
-                self.type_text("Soldier: \"Please proceed, Sir.\"")
-                self.type_text("\nInside, you see a man in futuristic clothing")
-                self.type_text("talking to the Governor-General. It must be a Time Corruptor!")
-            else:
-                self.type_text("\nYou have no way to get inside.")
-                self.type_text("You decide to go back and find another way.")
-        elif location_choice == 1:
-            self.type_text("\nThe market is bustling with activity. Local and")
-            self.type_text("foreign traders mingle, selling their goods.")
-            self.type_text("\nYou look for Sentot Prawirodirjo as mentioned,")
-            self.type_text("if you have the Secret Letter.")
-            if self.player.has_item("Secret Letter"):
-                self.type_text("\nA man in a turban approaches you.")
-                self.type_text("Man: \"You carry the letter. Follow me.\"")
-                self.type_text("\nHe leads you to a hidden warehouse.")
-                self.type_text("Man: \"I am Sentot. We know about the foreigner")
-                self.type_text("trying to change history. He's trying to make the Cultivation")
-                self.type_text("System less cruel, so the resistance won't happen.\"")
-                self.player.add_item("Secret Map")
-                self.type_text("\nSentot gives you a map.")
-                self.type_text("Sentot: \"This map leads to their secret base.")
-                self.type_text("Stop their plan before it's too late.\"")
-            else:
-                self.type_text("\nYou wander around the market, gathering information.")
-                self.type_text("Some traders talk about secret meetings")
-                self.type_text("between Dutch officials and a suspicious foreigner.")
-                self.player.add_item("Secret Meeting Info")
+    def _step_choose(self, step):
+        options = step["choose"]
+        replayed = bool(self._resume_answers) and self._resume_answers[0] < len(options)
+        if replayed:
+            choice = self._resume_answers.pop(0)
         else:
-            self.type_text("\nYou arrive at a vast plantation. Dozens of natives work")
-            self.type_text("under the hot sun, watched by Dutch overseers.")
-            self.type_text("\nYou witness the cruelty of the system firsthand.")
-            self.type_text("\nAn old worker quietly approaches you.")
-            self.type_text("Worker: \"Sir, please help us. There's talk the system")
-            self.type_text("will change, but not for our benefit. They just")
-            self.type_text("want to prevent future resistance.\"")
-            self.type_text("\nWorker: \"Meet the Resistance Leader in the cave on that hill")
-            self.type_text("tonight. He will tell you everything.\"")
-            self.player.add_item("Resistance Base Location")
-
-        input("\nPress ENTER to continue...")
-
-        self.clear_screen()
-        self.type_text("After various adventures in the Dutch Colonial era...")
-        self.type_text("\nYou managed to foil the Time Corruptors' plans and ensure")
-        self.type_text("the Forced Cultivation System still incites resistance, keeping")
-        self.type_text("the historical path of the independence struggle intact.")
-        self.type_text("\nThe Time Chronometer blinks, signaling your mission here is complete.")
-        self.type_text("Time to move to the next era...")
-        self.player.completed_eras.append("colonial")
-        input("\nPress ENTER to continue...")
-        return None  # End the game here for now
+            self.finish_resume()
+            choice = yield from self.show_options(list(options))
+            self.player.note_answer(choice)
+        if "record" in step:
+            self.player.set_choice(step["record"], choice)
+        if "as" in step:
+            self.script_vars[step["as"]] = self.tr(options[choice])
+        if replayed and not self._resume_answers:
+            self.finish_resume()
+        branches = step.get("branches")
+        if branches:
+            return (yield from self.run_steps(branches[choice]))
+        return _KEEP_GOING
+
+    def _step_switch(self, step):
+        return (yield from self.run_steps(step["cases"][self.player.choices[step["switch"]]]))
+
+    def _step_if_completed(self, step):
+        branch = "then" if step["if_completed"] in self.player.completed_eras else "else"
+        return (yield from self.run_steps(step.get(branch, ())))
+
+    def _step_if_any_item(self, step):
+        has_any = any(self.player.has_item(item) for item in step["if_any_item"])
+        return (yield from self.run_steps(step.get("then" if has_any else "else", ())))
+
+    def _step_complete(self, step):
+        self.player.complete_era(step["complete"])
+        return _KEEP_GOING
 
     def show_ending(self):
         self.clear_screen()
         completed_count = len(self.player.completed_eras)
 
         if completed_count == 0:
-            self.type_text("You haven't completed a single mission...")
-            self.type_text("The journey through time is long. Indonesian history awaits you!")
+            yield from self.type_text(self.tr("You haven't completed a single mission..."))
+            yield from self.type_text(self.tr("The journey through time is long. Indonesian history awaits you!"))
         elif completed_count == 1:
-            self.type_text(f"You have completed 1 era: {self.player.completed_eras[0].capitalize()}")
-            self.type_text("But many more eras need saving!")
+            era = self.tr(self.player.completed_eras[0].capitalize())
+            yield from self.type_text(self.tr("You have completed 1 era: {era}").format(era=era))
+            yield from self.type_text(self.tr("But many more eras need saving!"))
         else:
-            self.type_text(f"You have completed {completed_count} eras:")
+            yield from self.type_text(self.tr("You have completed {count} eras:").format(count=completed_count))
             for era in self.player.completed_eras:
-                self.type_text(f"- {era.capitalize()}")
+                yield from self.type_text(f"- {self.tr(era.capitalize())}")
 
             if "majapahit" in self.player.completed_eras and "colonial" in self.player.completed_eras:
-                self.type_text("\nYou have saved two important eras in Indonesian history!")
-                self.type_text("But your journey isn't over. Other eras still await.")
+                yield from self.type_text(self.tr("\nYou have saved two important eras in Indonesian history!"))
+                yield from self.type_text(self.tr("But your journey isn't over. Other eras still await."))
 
-        self.type_text("\nThank you for playing Nusantara Mission!")
-        self.type_text("This game is still under development.")
-        self.type_text("Other eras like the proclamation of independence will be added later.")
+        yield from self.type_text(self.tr("\nThank you for playing Nusantara Mission!"))
+        yield from self.type_text(self.tr("This game is still under development."))
+        yield from self.type_text(self.tr("Other eras like the proclamation of independence will be added later."))
 
         options = ["Play again", "Exit"]
-        choice = self.show_options(options)
+        choice = yield from self.show_options(options)
 
         if choice == 0:
             self.player = None # Reset player for a new game
-            self.start()
+            yield from self.start()
         else:
-            self.type_text("\nSee you in the next adventure!")
+            yield from self.type_text(self.tr("\nSee you in the next adventure!"))
             exit(0)
 
     def show_menu(self):
         """Displays the in-game menu"""
         self.clear_screen()
-        self.type_text("=== MENU ===")
+        yield from self.type_text(self.tr("=== MENU ==="))
         options = [
             "Continue game",
             "Show inventory",
             "Save game",
-            "Exit" # Simplified menu
+            "Exit", # Simplified menu
+            "Language: English" # Last, so the answers in older recordings still pick the same entries
         ]
 
-        choice = self.show_options(options)
+        choice = yield from self.show_options(options)
 
         if choice == 0:
             self.clear_screen()
             return  # Continue game
         elif choice == 1:
             self.player.show_inventory()
-            input("\nPress ENTER to return...")
-            return self.show_menu()
+            yield from self.prompt(self.tr("\nPress ENTER to return..."))
+            return (yield from self.show_menu())
         elif choice == 2:
             self.save_game()
-            input("\nPress ENTER to return...")
-            return self.show_menu()
+            yield from self.prompt(self.tr("\nPress ENTER to return..."))
+            return (yield from self.show_menu())
+        elif choice == 4:
+            self.set_language(LOCALES.next_locale(self.tr.locale))
+            return (yield from self.show_menu())
         else: # Exit
-            self.type_text("\nAre you sure you want to exit? (y/n)")
-            confirm = input("> ").lower()
+            yield from self.type_text(self.tr("\nAre you sure you want to exit? (y/n)"))
+            confirm = (yield from self.prompt("> ")).lower()
             if confirm == 'y':
-                self.type_text("\nThank you for playing Nusantara Mission!")
+                yield from self.type_text(self.tr("\nThank you for playing Nusantara Mission!"))
                 exit(0)
             else:
-                return self.show_menu()
+                return (yield from self.show_menu())
+
+    def set_language(self, code: str):
+        """Shows everything from here on in another locale"""
+        self.tr = LOCALES.translator(code)
+        if self.player is not None:
+            self.player.tr = self.tr
+
+
+def replay_game(path):
+    """Plays a recording back with no delays; returns 1 if it ends somewhere else"""
+    replay = Replay.load(path)
+    replay.expect_frontend("cli")
+    with replay.sandbox() as save_dir:
+        game = Game(instant_text=True)
+        game.save_file = os.path.join(save_dir, game.save_file)
+        game.replay = replay
+        try:
+            game.play()
+        except (SystemExit, ReplayExhausted):
+            pass
+        finally:
+            game.journal.close()
+        try:
+            replay.check(game.replay_state())
+        except ReplayMismatch as e:
+            print(f"\n{e}", file=sys.stderr)
+            return 1
+    print(f"\n[Replay matched the recording ({len(replay.inputs)} inputs)]")
+    return 0
 
 
 if __name__ == "__main__":
-    game = Game()
-    game.start()
+    parser = argparse.ArgumentParser(description="Nusantara Mission - Interactive Text Adventure Game")
+    parser.add_argument("--instant-text", action="store_true",
+                        help="print text immediately instead of with a typing effect")
+    parser.add_argument("--lang", default=SOURCE_LOCALE, choices=LOCALES.codes,
+                        help="language to play in (default %(default)s; switch in the menu)")
+    parser.add_argument("--record", metavar="FILE",
+                        help="record every answer to FILE for a bug report or replay")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="play a recording back at full speed and check it ends the same way")
+    args = parser.parse_args()
+
+    if args.replay:
+        sys.exit(replay_game(args.replay))
+
+    game = Game(instant_text=True if args.instant_text else None, language=args.lang)
+    if args.record:
+        game.recorder = Recorder(args.record, "cli", capture_files(game.journal.paths()))
+    try:
+        game.play()
+    except Exception as e:
+        if game.recorder:
+            game.recorder.finish(game.replay_state(), error=e)
+            game.recorder = None
+        raise
+    finally:
+        if game.recorder:
+            game.recorder.finish(game.replay_state())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Nusantara Mission - Load generator for server.py
+
+Runs many simulated players against the text server at once. Each one plays
+through the story picking random options, exits at the ending and connects
+again as a new session until time is up. Prints throughput and the latency
+of each choice, measured from sending the answer to receiving the next
+prompt.
+
+By default it starts its own server (with --instant-text, so latency is the
+server's work rather than the typing effect) and also reports the server's
+CPU time, as sessions per core at the simulated pace.
+
+    python loadgen.py --sessions 200 --duration 30
+    python loadgen.py --connect 127.0.0.1:8023 --sessions 50
+"""
+
+import os
+import re
+import sys
+import time
+import socket
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+from server import GO_AHEAD
+
+OPTION_LINE = re.compile(r"^(\d+)\. ", re.MULTILINE)
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = [] # Seconds from sending an answer to the next prompt
+        self.playthroughs = 0 # Sessions that reached the ending and exited
+        self.sessions = 0
+        self.errors = 0
+
+    def percentile(self, fraction):
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def choose_answer(text, bot_id, rng):
+    """What a player would type at the prompt that ends text"""
+    prompt = text[text.rfind("\n") + 1:]
+    if "Player ID" in prompt:
+        return bot_id
+    if "Enter your name" in prompt:
+        return "Bot"
+    if "(y/n)" in text[-80:]:
+        return "n"
+    if "Your choice" in prompt:
+        options = text[text.rfind("Options:"):]
+        if "Play again" in options:
+            return "2" # Exit, so the next session starts fresh
+        return str(rng.randint(1, len(OPTION_LINE.findall(options))))
+    return "" # Press ENTER
+
+
+async def read_prompt(reader):
+    data = await reader.readuntil(GO_AHEAD)
+    return data[:-len(GO_AHEAD)].decode("utf-8", "replace").replace("\r\n", "\n")
+
+
+async def bot(host, port, bot_number, deadline, think, stats):
+    rng = random.Random(bot_number)
+    session = 0
+    while time.monotonic() < deadline:
+        bot_id = f"bot{bot_number}-{session}"
+        session += 1
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            stats.errors += 1
+            await asyncio.sleep(0.1)
+            continue
+        stats.sessions += 1
+        try:
+            text = await read_prompt(reader)
+            while time.monotonic() < deadline:
+                answer = choose_answer(text, bot_id, rng)
+                if think:
+                    await asyncio.sleep(rng.uniform(0, 2 * think))
+                sent = time.perf_counter()
+                writer.write(answer.encode("utf-8") + b"\r\n")
+                try:
+                    text = await asyncio.wait_for(read_prompt(reader), max(0.0, deadline - time.monotonic()))
+                except asyncio.IncompleteReadError:
+                    stats.playthroughs += 1 # The server closes the connection after Exit
+                    break
+                except asyncio.TimeoutError:
+                    break # Time is up mid-answer; don't count a partial latency
+                stats.latencies.append(time.perf_counter() - sent)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            stats.errors += 1
+        finally:
+            writer.close()
+
+
+async def run_load(host, port, sessions, duration, think):
+    stats = Stats()
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(bot(host, port, i, deadline, think, stats) for i in range(sessions)))
+    return stats
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_server(port, process, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The server exited during startup")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("The server did not start listening")
+
+
+def children_cpu_time():
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator for the Nusantara Mission text server")
+    parser.add_argument("--sessions", type=int, default=200, help="simulated players at once (default %(default)s)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run (default %(default)s)")
+    parser.add_argument("--think", type=float, default=0.5,
+                        help="average seconds a player thinks before each answer (default %(default)s)")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="use a running server instead of starting one")
+    parser.add_argument("--typing", action="store_true", help="start the server with the typing effect on")
+    args = parser.parse_args(argv)
+
+    process = None
+    if args.connect:
+        host, _, port = args.connect.rpartition(":")
+        port = int(port)
+    else:
+        host, port = "127.0.0.1", free_port()
+        command = [sys.executable, SERVER_SCRIPT, "--port", str(port), "--save-dir", tempfile.mkdtemp(),
+                   "--max-sessions", str(args.sessions + 10)]
+        if not args.typing:
+            command.append("--instant-text")
+        cpu_before = children_cpu_time()
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+        wait_for_server(port, process)
+
+    try:
+        started = time.perf_counter()
+        stats = asyncio.run(run_load(host, port, args.sessions, args.duration, args.think))
+        elapsed = time.perf_counter() - started
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    choices = len(stats.latencies)
+    print(f"{args.sessions} simulated players, {stats.sessions} sessions, {stats.playthroughs} played to the end, "
+          f"{stats.errors} errors")
+    print(f"{choices} choices in {elapsed:.1f}s ({choices / elapsed:.1f}/s)")
+    if choices:
+        print("latency per choice: " + "  ".join(
+            f"{label} {stats.percentile(fraction) * 1000:.2f} ms"
+            for label, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))))
+    if process is not None and cpu_before is not None:
+        cpu = children_cpu_time() - cpu_before
+        share = cpu / elapsed
+        print(f"server CPU {cpu:.2f}s ({share:.1%} of one core)", end="")
+        if share > 0:
+            print(f": about {args.sessions / share:.0f} sessions per core at this pace")
+        else:
+            print()
+    return 1 if stats.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Nusantara Mission - Multiplayer text server
+
+Hosts the terminal game for many players from one process. Each connection
+is a coroutine driving its own Game and Player: the game's I/O requests (see
+Game in cli.py) become awaits, so a player reading, typing or thinking never
+holds up anyone else, the typing effect is an asyncio.sleep instead of
+time.sleep, and save journal writes run on worker threads.
+
+Players connect with telnet (or nc) and first give a player ID, which names
+their own save in the save directory; reconnecting with the same ID offers
+to continue it. Each prompt is followed by a telnet Go Ahead (IAC GA) so
+clients such as loadgen.py can tell when input is expected.
+
+    python server.py                         # localhost:8023, saves in ./server_saves
+    telnet localhost 8023
+    python server.py --instant-text --max-sessions 300
+    python server.py --lang id               # Bahasa Indonesia unless a player switches in the menu
+"""
+
+import os
+import re
+import sys
+import asyncio
+import argparse
+
+from cli import Game, Typewriter
+from shared.l10n import LOCALES, SOURCE_LOCALE
+from shared.story import StoryLibrary
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8023
+DEFAULT_SAVE_DIR = "server_saves"
+DEFAULT_MAX_SESSIONS = 250
+IDLE_TIMEOUT = 30 * 60 # Seconds a session may wait for input before it is closed
+
+GO_AHEAD = b"\xff\xf9" # Telnet IAC GA: the server is waiting for a line
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+PLAYER_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,32}")
+TELNET_COMMAND = re.compile(rb"\xff[\xfb-\xfe].|\xff[\xf0-\xfa]", re.DOTALL)
+
+
+class SessionOutput:
+    """Text stream onto a connection, for print(file=...) in the game and player.
+
+    Writes go into the transport's buffer without blocking; the session
+    drains it after each typed text and whenever it is about to wait on the
+    player. Once the player has disconnected, writing raises ConnectionError.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    def write(self, text):
+        if self.writer.is_closing():
+            raise ConnectionError("The player disconnected") # Ends the session instead of writing on
+        self.writer.write(text.replace("\n", "\r\n").encode("utf-8")) # Telnet lines end in CRLF
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class SessionGame(Game):
+    def clear_screen(self):
+        if self._resume_answers:
+            return
+        self.output.write(CLEAR_SCREEN)
+
+
+class Session:
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.output = SessionOutput(writer)
+        self.player_id = None
+
+    async def run(self):
+        try:
+            self.player_id = await self.ask_player_id()
+            game = SessionGame(instant_text=True, output=self.output, story=self.server.story,
+                               language=self.server.language)
+            game.save_file = os.path.join(self.server.save_dir, self.player_id + ".sav")
+            game.defer_journal_writes = True
+            try:
+                await self.play(game)
+            finally:
+                await asyncio.get_running_loop().run_in_executor(None, game.journal.close)
+        except (EOFError, ConnectionError, asyncio.TimeoutError, ValueError):
+            pass # Disconnected, idle too long, or sent an over-long line
+        finally:
+            self.server.players.discard(self.player_id)
+            self.writer.close()
+
+    async def play(self, game):
+        """Drives the game's flow, awaiting each of its I/O requests"""
+        flow = game.start()
+        send, answer = flow.send, None
+        try:
+            while True:
+                try:
+                    request = send(answer)
+                except StopIteration:
+                    return
+                await self.save_journal(game)
+                send, answer = flow.send, None
+                kind = request[0]
+                if kind == "type":
+                    await self.type_text(request[1], request[2])
+                    await self.writer.drain() # Backpressure: a slow reader holds up only this session
+                elif kind == "input":
+                    answer = await self.read_line(request[1])
+                elif kind == "sleep":
+                    await asyncio.sleep(request[1])
+                elif kind == "io":
+                    try:
+                        answer = await asyncio.get_running_loop().run_in_executor(None, request[1])
+                    except Exception as e:
+                        send, answer = flow.throw, e
+        except SystemExit:
+            await self.writer.drain() # The player chose Exit; send the goodbye before closing
+        finally:
+            flow.close()
+
+    async def save_journal(self, game):
+        """Writes what the last step journaled on a worker thread, so other sessions keep playing meanwhile"""
+        if not game.journal.has_writes():
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, game.journal.run_writes)
+        except OSError as e:
+            self.output.write(game.tr("Error saving game: {error}").format(error=e) + "\n")
+
+    async def type_text(self, text, delay):
+        if self.server.instant_text or delay <= 0 or not text:
+            self.output.write(text + "\n")
+            return
+        chunk = Typewriter.chunk_size(delay)
+        for start in range(0, len(text), chunk):
+            self.output.write(text[start:start + chunk])
+            await self.writer.drain()
+            await asyncio.sleep(chunk * delay)
+        self.output.write("\n")
+
+    async def read_line(self, prompt):
+        self.output.write(prompt)
+        if self.server.go_ahead:
+            self.writer.write(GO_AHEAD)
+        await self.writer.drain()
+        line = await asyncio.wait_for(self.reader.readline(), self.server.idle_timeout)
+        if not line:
+            raise EOFError
+        return TELNET_COMMAND.sub(b"", line).decode("utf-8", "replace").rstrip("\r\n")
+
+    async def ask_player_id(self):
+        tr = LOCALES.translator(self.server.language)
+        self.output.write(tr("Nusantara Mission server") + "\n")
+        while True:
+            player_id = (await self.read_line(tr("Player ID (letters, numbers, - or _): "))).strip()
+            if not PLAYER_ID_PATTERN.fullmatch(player_id):
+                self.output.write(tr("Please use up to 32 letters, numbers, - or _.") + "\n")
+            elif player_id in self.server.players:
+                self.output.write(tr("That player is already connected.") + "\n")
+            else:
+                self.server.players.add(player_id)
+                return player_id
+
+
+class GameServer:
+    def __init__(self, save_dir=DEFAULT_SAVE_DIR, instant_text=False, go_ahead=True,
+                 max_sessions=DEFAULT_MAX_SESSIONS, idle_timeout=IDLE_TIMEOUT, language=SOURCE_LOCALE):
+        self.save_dir = save_dir
+        self.instant_text = instant_text
+        self.go_ahead = go_ahead
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.language = language # Sessions start in it; every session showing a locale shares its catalog
+        self.story = StoryLibrary() # Shared by every session; eras are parsed once
+        self.players = set() # IDs of connected players, so no two sessions share a save
+        self.sessions = 0
+
+    async def handle_connection(self, reader, writer):
+        if self.sessions >= self.max_sessions:
+            writer.write(b"The server is full, please try again later.\r\n")
+            writer.close()
+            return
+        self.sessions += 1
+        try:
+            await Session(self, reader, writer).run()
+        except Exception as e:
+            print(f"Session error: {e!r}", file=sys.stderr)
+        finally:
+            self.sessions -= 1
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        os.makedirs(self.save_dir, exist_ok=True)
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        address = server.sockets[0].getsockname()
+        print(f"Serving Nusantara Mission on {address[0]}:{address[1]} (saves in {self.save_dir})", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nusantara Mission - multiplayer text server")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to listen on (default {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port to listen on (default {DEFAULT_PORT})")
+    parser.add_argument("--save-dir", default=DEFAULT_SAVE_DIR, help="directory for the players' saves")
+    parser.add_argument("--instant-text", action="store_true", help="send text immediately, without the typing effect")
+    parser.add_argument("--max-sessions", type=int, default=DEFAULT_MAX_SESSIONS,
+                        help="connections to accept at once (default %(default)s)")
+    parser.add_argument("--no-go-ahead", action="store_true",
+                        help="don't mark prompts with telnet Go Ahead (for plain nc)")
+    parser.add_argument("--lang", default=SOURCE_LOCALE, choices=LOCALES.codes,
+                        help="language new sessions start in (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    server = GameServer(args.save_dir, instant_text=args.instant_text, go_ahead=not args.no_go_ahead,
+                        max_sessions=args.max_sessions, language=args.lang)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
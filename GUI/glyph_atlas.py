@@ -0,0 +1,755 @@
+#!/usr/bin/env python3
+"""
+Nusantara Mission - Glyph atlas text renderer
+
+An alternative to font.render() for the GUI's text. Each font is rasterized
+once: every glyph of CHARSET, and every ligature the font makes from them,
+is rendered, trimmed and packed into one atlas surface. A string is then
+composed by blitting glyph sub-rectangles, so new text never rasterizes.
+Composing a whole line takes longer than font.render(), but a Reveal draws
+a line a character at a time, for a typewriter effect, by blitting only the
+glyphs that are new, where font.render() would draw each prefix again.
+
+The result is meant to be identical to font.render(), pixel for pixel, so
+the atlas lays a line out the way SDL_ttf and HarfBuzz do:
+
+- the pen moves by each glyph's hinted advance (font.metrics()) plus the
+  pair kerning of the font's GPOS 'kern' lookups, scaled to the point size
+  and rounded to 1/64 px; a glyph is drawn at the whole pixel its pen is in
+- the font's 'liga' ligatures (fi and fl in Merriweather) replace their letters
+- where glyphs overlap, their coverages are OR-ed, not blended
+
+pygame exposes none of the font's layout tables, so OpenTypeLayout reads
+them from the TTF. Kerning is looked up the first time a pair is drawn, so
+only pairs that occur are ever resolved. Strings with a character outside
+CHARSET, text that is not antialiased or has a background, and fonts not
+loaded from a TTF fall back to font.render().
+
+Atlases of the game's TTF are cached in __atlascache__ next to this file and
+rebuilt when the TTF or SDL_ttf changes, like the story cache in
+shared/story.py.
+
+    python glyph_atlas.py --compare    # every line of the story, and every revealed prefix of it, both ways;
+                                       # fails on any differing pixel
+"""
+
+import os
+import sys
+import time
+import struct
+import marshal
+import argparse
+import importlib.util
+
+import pygame
+
+GUI_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(GUI_DIR)
+CACHE_DIR = os.path.join(GUI_DIR, "__atlascache__")
+CACHE_MAGIC = b"NMG2" + importlib.util.MAGIC_NUMBER
+CHARSET = "".join(chr(code) for code in range(32, 127))
+ATLAS_WIDTH = 512
+GLYPH_PADDING = 1
+BLACK = (0, 0, 0)
+COMPARE_SIZES = (14, 18, 22, 24, 28, 52) # The point sizes of the GUI's font roles
+
+# OpenType lookup types
+PAIR_POSITIONING = 2
+EXTENSION_POSITIONING = 9
+LIGATURE_SUBSTITUTION = 4
+EXTENSION_SUBSTITUTION = 7
+
+
+class OpenTypeLayout:
+    """The parts of a TTF's cmap, GPOS and GSUB tables that place Latin text: glyph ids, pair kerning and ligatures."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = data = f.read()
+        self.tables = {}
+        for index in range(self._u16(4)):
+            tag, _, offset, _ = struct.unpack_from(">4sIII", data, 12 + 16 * index)
+            self.tables[tag.decode("latin-1")] = offset
+        self.units_per_em = self._u16(self.tables["head"] + 18)
+        self.cmap = self._read_cmap()
+        self._coverages = {}
+        self._class_defs = {}
+        self._kern_lookups = self._feature_lookups("GPOS", b"kern", PAIR_POSITIONING, EXTENSION_POSITIONING)
+
+    def _u16(self, offset):
+        return struct.unpack_from(">H", self.data, offset)[0]
+
+    def _read_cmap(self):
+        """Character code -> glyph id, from the Unicode BMP (format 4) subtable"""
+        data = self.data
+        base = self.tables["cmap"]
+        for index in range(self._u16(base + 2)):
+            platform, encoding, offset = struct.unpack_from(">HHI", data, base + 4 + 8 * index)
+            table = base + offset
+            if (platform, encoding) in ((3, 1), (0, 3)) and self._u16(table) == 4:
+                break
+        else:
+            raise ValueError("The font has no Unicode BMP character map")
+        segments = self._u16(table + 6) // 2
+        ends = table + 14
+        starts = ends + 2 * segments + 2
+        deltas = starts + 2 * segments
+        range_offsets = deltas + 2 * segments
+        cmap = {}
+        for segment in range(segments):
+            end, start = self._u16(ends + 2 * segment), self._u16(starts + 2 * segment)
+            delta = struct.unpack_from(">h", data, deltas + 2 * segment)[0]
+            range_offset = self._u16(range_offsets + 2 * segment)
+            for code in range(start, min(end, 0xFFFE) + 1):
+                if range_offset:
+                    glyph = self._u16(range_offsets + 2 * segment + range_offset + 2 * (code - start))
+                    glyph = (glyph + delta) & 0xFFFF if glyph else 0
+                else:
+                    glyph = (code + delta) & 0xFFFF
+                if glyph:
+                    cmap[code] = glyph
+        return cmap
+
+    def _feature_lookups(self, table, feature, lookup_type, extension_type):
+        """Subtable offsets of each lookup of a feature for Latin text, one list per lookup in lookup order"""
+        base = self.tables.get(table)
+        if base is None:
+            return []
+        data = self.data
+        scripts, features, lookups = (base + self._u16(base + field) for field in (4, 6, 8))
+        # HarfBuzz shapes Latin text with the 'latn' script, or the default script without one
+        found = {}
+        for index in range(self._u16(scripts)):
+            tag, offset = struct.unpack_from(">4sH", data, scripts + 2 + 6 * index)
+            found[tag] = scripts + offset
+        script = found.get(b"latn", found.get(b"DFLT"))
+        if script is None or not self._u16(script):
+            return []
+        language = script + self._u16(script)
+        indices = [self._u16(language + 6 + 2 * index) for index in range(self._u16(language + 4))]
+        lookup_indices = set()
+        for index in indices:
+            tag, offset = struct.unpack_from(">4sH", data, features + 2 + 6 * index)
+            if tag == feature:
+                record = features + offset
+                lookup_indices.update(self._u16(record + 4 + 2 * i) for i in range(self._u16(record + 2)))
+
+        result = []
+        for index in sorted(lookup_indices):
+            lookup = lookups + self._u16(lookups + 2 + 2 * index)
+            kind = self._u16(lookup)
+            subtables = []
+            for i in range(self._u16(lookup + 4)):
+                subtable = lookup + self._u16(lookup + 6 + 2 * i)
+                if kind == extension_type:
+                    extended_kind, offset = struct.unpack_from(">HI", data, subtable + 2)
+                    if extended_kind == lookup_type:
+                        subtables.append(subtable + offset)
+                elif kind == lookup_type:
+                    subtables.append(subtable)
+            result.append(subtables)
+        return result
+
+    def _coverage(self, offset):
+        """Glyph id -> coverage index"""
+        coverage = self._coverages.get(offset)
+        if coverage is None:
+            coverage = self._coverages[offset] = {}
+            count = self._u16(offset + 2)
+            if self._u16(offset) == 1:
+                for index in range(count):
+                    coverage[self._u16(offset + 4 + 2 * index)] = index
+            else:
+                for index in range(count):
+                    start, end, first = struct.unpack_from(">HHH", self.data, offset + 4 + 6 * index)
+                    for glyph in range(start, end + 1):
+                        coverage[glyph] = first + glyph - start
+        return coverage
+
+    def _class_def(self, offset):
+        """Glyph id -> class; glyphs not listed are class 0"""
+        classes = self._class_defs.get(offset)
+        if classes is None:
+            classes = self._class_defs[offset] = {}
+            if self._u16(offset) == 1:
+                start, count = struct.unpack_from(">HH", self.data, offset + 2)
+                for index in range(count):
+                    classes[start + index] = self._u16(offset + 6 + 2 * index)
+            else:
+                for index in range(self._u16(offset + 2)):
+                    start, end, value = struct.unpack_from(">HHH", self.data, offset + 4 + 6 * index)
+                    for glyph in range(start, end + 1):
+                        classes[glyph] = value
+        return classes
+
+    def _x_advance(self, offset, value_format):
+        """XAdvance of a value record; the placements before it are skipped"""
+        if not value_format & 4:
+            return 0
+        return struct.unpack_from(">h", self.data, offset + 2 * bin(value_format & 3).count("1"))[0]
+
+    def kerning(self, left, right):
+        """Advance adjustment after glyph left when glyph right follows it, in font units"""
+        total = 0
+        for subtables in self._kern_lookups:
+            # The first subtable of a lookup that covers the pair applies; every lookup adds up
+            for subtable in subtables:
+                value = self._pair_value(subtable, left, right)
+                if value is not None:
+                    total += value
+                    break
+        return total
+
+    def _pair_value(self, subtable, left, right):
+        data = self.data
+        kind, coverage, format1, format2 = struct.unpack_from(">HHHH", data, subtable)
+        index = self._coverage(subtable + coverage).get(left)
+        if index is None:
+            return None
+        record_size = 2 * bin(format1).count("1") + 2 * bin(format2).count("1")
+        if kind == 1:
+            pairs = subtable + self._u16(subtable + 10 + 2 * index)
+            for i in range(self._u16(pairs)):
+                record = pairs + 2 + i * (2 + record_size)
+                if self._u16(record) == right:
+                    return self._x_advance(record + 2, format1)
+            return None
+        if kind == 2:
+            class_def1, class_def2, _, class2_count = struct.unpack_from(">HHHH", data, subtable + 8)
+            class1 = self._class_def(subtable + class_def1).get(left, 0)
+            class2 = self._class_def(subtable + class_def2).get(right, 0)
+            return self._x_advance(subtable + 16 + (class1 * class2_count + class2) * record_size, format1)
+        return None
+
+    def ligatures(self, charset=CHARSET):
+        """{letters: ligature glyph id} for the 'liga' ligatures made only of charset characters"""
+        data = self.data
+        letters = {}
+        for char in charset:
+            letters.setdefault(self.cmap.get(ord(char)), char)
+        result = {}
+        for subtables in self._feature_lookups("GSUB", b"liga", LIGATURE_SUBSTITUTION, EXTENSION_SUBSTITUTION):
+            for subtable in subtables:
+                coverage = self._coverage(subtable + self._u16(subtable + 2))
+                for first, index in coverage.items():
+                    if first not in letters:
+                        continue
+                    ligature_set = subtable + self._u16(subtable + 6 + 2 * index)
+                    for i in range(self._u16(ligature_set)):
+                        ligature = ligature_set + self._u16(ligature_set + 2 + 2 * i)
+                        glyph, components = struct.unpack_from(">HH", data, ligature)
+                        rest = struct.unpack_from(f">{components - 1}H", data, ligature + 4)
+                        if all(component in letters for component in rest):
+                            result.setdefault(letters[first] + "".join(letters[c] for c in rest), glyph)
+        return result
+
+
+class Glyph:
+    __slots__ = ("text", "glyph_id", "advance", "area", "left", "top", "right", "minx", "maxx", "bottom")
+
+    def __init__(self, text, glyph_id, advance, area, left, top, right, minx, maxx, bottom):
+        self.text = text # The character, or the letters of a ligature
+        self.glyph_id = glyph_id
+        self.advance = advance # Hinted pen advance, in 1/64 px
+        self.area = area # (x, y, w, h) of the trimmed glyph in the atlas
+        self.left = left # Ink offset from the pen position
+        self.top = top # Ink offset from the top of the line
+        self.right = right # Ink offset of the right edge from the pen position
+        # SDL_ttf sizes a line by the glyphs' bitmaps, blank edges included, not by their ink
+        self.minx = minx
+        self.maxx = maxx
+        self.bottom = bottom # From the top of the line
+
+
+class GlyphAtlas:
+    def __init__(self, surface, glyphs, height, size, layout):
+        self.surface = surface # Black glyphs with per-pixel alpha; BLEND_RGBA_MAX leaves a line's color alone
+        self.glyphs = glyphs # Character or ligature -> Glyph
+        self.height = height
+        self.size = size
+        self.layout_tables = layout
+        self.kerning = {} # (text, next text) -> adjustment to the advance, in 1/64 px; filled as pairs occur
+        self.ligatures = {} # First letter -> ligatures starting with it, longest first
+        for text in sorted((text for text in glyphs if len(text) > 1), key=len, reverse=True):
+            self.ligatures.setdefault(text[0], []).append(text)
+        self.max_right = max(glyph.right for glyph in glyphs.values())
+        self._patches = {}
+        self._coverage = None
+
+    # --- Building ---
+
+    @classmethod
+    def build(cls, font, layout, size, charset=CHARSET):
+        ascent = font.get_ascent()
+        images = {}
+        for char in charset:
+            minx, maxx, miny, _, advance = font.metrics(char)[0]
+            # Alone, a glyph is drawn with its pen at 0, or further right if its bitmap starts left of the pen
+            origin = max(0, -minx)
+            images[char] = (font.render(char, True, BLACK), layout.cmap.get(ord(char), 0), advance * 64, origin,
+                            (minx, maxx, ascent - miny))
+        space_width = font.metrics(" ")[0][4]
+        space = layout.cmap.get(ord(" "), 0)
+        for text, glyph_id in layout.ligatures(charset).items():
+            # pygame has no metrics for a ligature: it starts like its first letter, and the rest comes
+            # from how wide SDL_ttf makes it, alone and followed by a space
+            minx = images[text[0]][4][0]
+            origin = max(0, -minx)
+            kern = scale_units(layout.kerning(glyph_id, space), size, layout.units_per_em)
+            advance = font.size(text + " ")[0] - origin - space_width - (kern >> 6)
+            box = (minx, font.size(text)[0] - origin, max(images[char][4][2] for char in text))
+            images[text] = (font.render(text, True, BLACK), glyph_id, advance * 64, origin, box)
+        return cls.pack(images, font.get_height(), size, layout)
+
+    @classmethod
+    def pack(cls, images, height, size, layout):
+        """Shelf-packs the trimmed glyph images into one atlas surface."""
+        inks = {text: image[0].get_bounding_rect() for text, image in images.items()}
+        placements = {}
+        x = y = shelf_height = 0
+        for text in sorted(images, key=lambda text: -inks[text].height):
+            ink = inks[text]
+            if x + ink.width > ATLAS_WIDTH:
+                x, y, shelf_height = 0, y + shelf_height + GLYPH_PADDING, 0
+            placements[text] = (x, y)
+            x += ink.width + GLYPH_PADDING
+            shelf_height = max(shelf_height, ink.height)
+
+        surface = pygame.Surface((ATLAS_WIDTH, max(1, y + shelf_height)), pygame.SRCALPHA)
+        surface.fill(BLACK + (0,))
+        glyphs = {}
+        for text, (surf, glyph_id, advance, origin, box) in images.items():
+            ink = inks[text]
+            ax, ay = placements[text]
+            surface.blit(surf, (ax, ay), ink, special_flags=pygame.BLEND_RGBA_MAX)
+            glyphs[text] = Glyph(text, glyph_id, advance, (ax, ay, ink.width, ink.height),
+                                 ink.x - origin, ink.y, ink.right - origin, *box)
+        return cls(surface, glyphs, height, size, layout)
+
+    # --- Disk cache ---
+
+    @classmethod
+    def load_or_build(cls, font, layout, path, size, cache_dir=CACHE_DIR):
+        """Reads the cached atlas of a TTF at a point size, building and caching it when stale."""
+        stat = os.stat(path)
+        stamp = (os.path.basename(path), stat.st_mtime_ns, stat.st_size, size,
+                 tuple(pygame.font.get_sdl_ttf_version()), CHARSET)
+        cache_path = os.path.join(cache_dir, f"{os.path.splitext(os.path.basename(path))[0]}-{size}.marshal")
+        atlas = cls._read_cache(cache_path, stamp, layout)
+        if atlas is None:
+            atlas = cls.build(font, layout, size)
+            atlas._write_cache(cache_dir, cache_path, stamp)
+        return atlas
+
+    @classmethod
+    def _read_cache(cls, cache_path, stamp, layout):
+        try:
+            with open(cache_path, "rb") as f:
+                if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                    return None
+                cached_stamp, data = marshal.load(f)
+            if tuple(cached_stamp) != stamp:
+                return None
+            surface = pygame.image.frombytes(data["pixels"], tuple(data["size"]), "RGBA")
+            glyphs = {text: Glyph(text, *fields) for text, fields in data["glyphs"].items()}
+            return cls(surface, glyphs, data["height"], stamp[3], layout)
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            return None
+
+    def _write_cache(self, cache_dir, cache_path, stamp):
+        data = {
+            "size": self.surface.get_size(),
+            "pixels": pygame.image.tobytes(self.surface, "RGBA"),
+            "glyphs": {text: (g.glyph_id, g.advance, g.area, g.left, g.top, g.right, g.minx, g.maxx, g.bottom)
+                       for text, g in self.glyphs.items()},
+            "height": self.height,
+        }
+        # A read-only install just goes without the cache
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(CACHE_MAGIC)
+                marshal.dump((stamp, data), f)
+            os.replace(temp_path, cache_path)
+        except OSError:
+            pass
+
+    # --- Drawing ---
+
+    def pair_kerning(self, first, second):
+        """Kerning between two glyphs in 1/64 px, looked up in the font the first time the pair is drawn"""
+        key = (first.text, second.text)
+        kern = self.kerning.get(key)
+        if kern is None:
+            layout = self.layout_tables
+            kern = self.kerning[key] = scale_units(layout.kerning(first.glyph_id, second.glyph_id),
+                                                   self.size, layout.units_per_em)
+        return kern
+
+    def shape(self, text):
+        """The glyphs of text, ligatures included, or None if a character is missing"""
+        glyphs = self.glyphs
+        ligatures = self.ligatures
+        if not any(first in text for first in ligatures):
+            try:
+                return [glyphs[char] for char in text]
+            except KeyError:
+                return None
+        shaped = []
+        index = 0
+        while index < len(text):
+            for ligature in ligatures.get(text[index], ()):
+                if text.startswith(ligature, index):
+                    shaped.append(glyphs[ligature])
+                    index += len(ligature)
+                    break
+            else:
+                glyph = glyphs.get(text[index])
+                if glyph is None:
+                    return None
+                shaped.append(glyph)
+                index += 1
+        return shaped
+
+    def layout(self, text):
+        """Blit sequence of a line with its origin at (0, 0), the line's size, and after each glyph the
+        (characters, blits) drawn so far; None if a glyph is missing"""
+        shaped = self.shape(text)
+        if not shaped:
+            return None
+        source = self.surface
+        kerning = self.kerning
+        placed = [] # (x, glyph) of each glyph with ink
+        drawn = [] # (surface, x, y, area) in the order the glyphs come
+        steps = []
+        chars = 0
+        pen = 0
+        minx = maxx = reach = 0
+        bottom = self.height # A glyph reaching below the font's descent (g at some sizes) makes the line taller
+        previous = None
+        for glyph in shaped:
+            if previous is not None:
+                kern = kerning.get((previous.text, glyph.text))
+                if kern is None:
+                    kern = self.pair_kerning(previous, glyph)
+                pen += previous.advance + kern
+            previous = glyph
+            chars += len(glyph.text)
+            x = pen >> 6
+            if x + glyph.minx < minx:
+                minx = x + glyph.minx
+            if x + glyph.maxx > maxx:
+                maxx = x + glyph.maxx
+            if glyph.bottom > bottom:
+                bottom = glyph.bottom
+            if not glyph.area[2]:
+                steps.append((chars, len(drawn)))
+                continue
+            drawn.append((source, x + glyph.left, glyph.top, glyph.area))
+            ink_left = x + glyph.left
+            if ink_left < reach and placed:
+                # SDL_ttf ORs the coverage of overlapping glyphs; blitting the OR-ed overlap with
+                # BLEND_RGBA_MAX over the glyphs gives the same pixels
+                overlapping = []
+                for other_x, other in reversed(placed):
+                    if other_x + self.max_right <= ink_left:
+                        break
+                    if other_x + other.right > ink_left:
+                        overlapping.append((x - other_x, other))
+                patch = self.overlap_patch(glyph, tuple(overlapping))
+                if patch is not None:
+                    drawn.append((patch[0], x + patch[1], patch[2], None))
+            placed.append((x, glyph))
+            steps.append((chars, len(drawn)))
+            if x + glyph.right > reach:
+                reach = x + glyph.right
+        width = max(maxx, (pen + previous.advance) >> 6) - minx
+
+        max_blend = pygame.BLEND_RGBA_MAX
+        blits = [(surface, (x - minx, y), area, max_blend) for surface, x, y, area in drawn]
+        return blits, (width, bottom), steps
+
+    def overlap_patch(self, glyph, overlapping):
+        """(surface, x from the glyph's pen, y) with the OR-ed coverage where glyph meets the glyphs before it,
+        given as (how far left of glyph's pen, glyph); None if they share no pixel"""
+        key = (glyph.text, tuple((offset, other.text) for offset, other in overlapping))
+        if key in self._patches:
+            return self._patches[key]
+        if self._coverage is None:
+            self._coverage = pygame.image.tobytes(self.surface, "RGBA")[3::4]
+        coverage = self._coverage
+
+        # Boxes in coordinates relative to glyph's pen: (left, top, right, bottom, atlas x, atlas y)
+        def box(offset, other):
+            ax, ay, w, h = other.area
+            return (other.left - offset, other.top, other.left - offset + w, other.top + h, ax, ay)
+        boxes = [box(0, glyph)] + [box(offset, other) for offset, other in overlapping]
+        first = boxes[0]
+        x0 = max(first[0], min(b[0] for b in boxes[1:]))
+        x1 = min(first[2], max(b[2] for b in boxes[1:]))
+        y0 = max(first[1], min(b[1] for b in boxes[1:]))
+        y1 = min(first[3], max(b[3] for b in boxes[1:]))
+        patch = None
+        if x0 < x1 and y0 < y1:
+            pixels = bytearray(4 * (x1 - x0) * (y1 - y0))
+            shared = False
+            for y in range(y0, y1):
+                for x in range(x0, x1):
+                    value = covered = 0
+                    for left, top, right, bottom, ax, ay in boxes:
+                        if left <= x < right and top <= y < bottom:
+                            alpha = coverage[(ay + y - top) * ATLAS_WIDTH + ax + x - left]
+                            if alpha:
+                                value |= alpha
+                                covered += 1
+                    shared = shared or covered > 1
+                    pixels[4 * ((y - y0) * (x1 - x0) + x - x0) + 3] = value
+            if shared:
+                patch = (pygame.image.frombytes(bytes(pixels), (x1 - x0, y1 - y0), "RGBA"), x0, y0)
+        self._patches[key] = patch
+        return patch
+
+    def render(self, text, color):
+        """A surface like font.render(text, True, color), or None if a glyph is missing"""
+        laid_out = self.layout(text)
+        if laid_out is None:
+            return None
+        blits, size, _ = laid_out
+        surf = pygame.Surface(size, pygame.SRCALPHA)
+        surf.fill(tuple(color)[:3] + (0,))
+        surf.blits(blits, doreturn=False)
+        return surf
+
+    def reveal(self, text, color):
+        """A Reveal drawing text a few characters at a time, or None if a glyph is missing"""
+        laid_out = self.layout(text)
+        return Reveal(*laid_out, color) if laid_out is not None else None
+
+
+class Reveal:
+    """A line drawn a few characters at a time, for a typewriter effect.
+
+    The line is laid out once, on a surface the size of the whole line, and
+    show() only blits the glyphs that are new since the last call, where
+    font.render() would rasterize the whole prefix again on every frame.
+    """
+
+    def __init__(self, blits, size, steps, color):
+        self.surface = pygame.Surface(size, pygame.SRCALPHA)
+        self.surface.fill(tuple(color)[:3] + (0,))
+        self._blits = blits
+        self._steps = steps
+        self._shown = 0 # Glyphs drawn
+        self._blitted = 0
+
+    def show(self, count):
+        """Draws the first count characters and returns the surface; a ligature appears with its last letter"""
+        steps = self._steps
+        shown = self._shown
+        while shown < len(steps) and steps[shown][0] <= count:
+            shown += 1
+        self._shown = shown
+        end = steps[shown - 1][1] if shown else 0
+        if end > self._blitted:
+            self.surface.blits(self._blits[self._blitted:end], doreturn=False)
+            self._blitted = end
+        return self.surface
+
+    def characters_shown(self):
+        return self._steps[self._shown - 1][0] if self._shown else 0
+
+
+def scale_units(value, size, units_per_em):
+    """Font units to 1/64 px at a point size, rounded half up like HarfBuzz"""
+    return (2 * value * size * 64 + units_per_em) // (2 * units_per_em)
+
+
+class AtlasRenderer:
+    """render_text() backend that draws with glyph atlases instead of font.render().
+
+    source(font) names the TTF and point size a font was loaded from, or None
+    for fonts that stay on font.render().
+    """
+
+    def __init__(self, source=lambda font: None, cache_dir=CACHE_DIR):
+        self.source = source
+        self.cache_dir = cache_dir
+        self._atlases = {}
+        self._layouts = {} # TTF path -> OpenTypeLayout, shared by every size
+
+    def atlas(self, font):
+        if font not in self._atlases:
+            path, size = self.source(font) or (None, None)
+            atlas = None
+            if path:
+                layout = self._layouts.get(path)
+                if layout is None:
+                    layout = self._layouts[path] = OpenTypeLayout(path)
+                atlas = GlyphAtlas.load_or_build(font, layout, path, size, self.cache_dir)
+            self._atlases[font] = atlas
+        return self._atlases[font]
+
+    def render(self, font, text, color, aa=True, bkg=None):
+        atlas = self.atlas(font) if aa and bkg is None else None
+        surf = atlas.render(text, color) if atlas is not None else None
+        return surf if surf is not None else font.render(text, aa, color, bkg)
+
+    def reveal(self, font, text, color):
+        """A Reveal of text in font, or None where render() would fall back to font.render()"""
+        atlas = self.atlas(font)
+        return atlas.reveal(text, color) if atlas is not None else None
+
+
+# --- Correctness check ---
+
+def compare(font, atlas, texts, color=(255, 255, 255)):
+    """Renders each text both ways; returns per-text (text, (width, height) difference, pixels off,
+    worst channel difference). Texts the atlas leaves to font.render() are skipped."""
+    results = []
+    for text in texts:
+        actual = atlas.render(text, color)
+        if actual is None:
+            continue
+        expected = font.render(text, True, color)
+        if actual.get_size() != expected.get_size():
+            size_difference = (actual.get_width() - expected.get_width(), actual.get_height() - expected.get_height())
+            results.append((text, size_difference, None, None))
+            continue
+        want = pygame.image.tobytes(expected, "RGBA")
+        got = pygame.image.tobytes(actual, "RGBA")
+        off = [max(abs(a - b) for a, b in zip(want[i:i + 4], got[i:i + 4]))
+               for i in range(0, len(want), 4) if want[i:i + 4] != got[i:i + 4]]
+        results.append((text, (0, 0), len(off), max(off, default=0)))
+    return results
+
+
+def compare_reveals(font, atlas, texts, color=(255, 255, 255)):
+    """Reveals each text a character at a time; returns the texts where a revealed prefix differs from
+    font.render() of it. Revealing draws on a surface the size of the whole line, so only the area of
+    the prefix's own surface is compared."""
+    differing = []
+    for text in texts:
+        reveal = atlas.reveal(text, color)
+        if reveal is None:
+            continue
+        for count in range(1, len(text) + 1):
+            surf = reveal.show(count)
+            if reveal.characters_shown() != count or not text[:count].strip():
+                continue # Inside a ligature, or nothing drawn yet (font.render() is 1 px wide then)
+            expected = font.render(text[:count], True, color)
+            width, height = expected.get_size()
+            if (width > surf.get_width() or height > surf.get_height() or
+                    pygame.image.tobytes(surf.subsurface((0, 0, width, height)), "RGBA") !=
+                    pygame.image.tobytes(expected, "RGBA")):
+                differing.append((text, count))
+                break
+    return differing
+
+
+def time_renders(font, atlas, texts, color=(255, 255, 255)):
+    """Average seconds per line for font.render() and the atlas"""
+    started = time.perf_counter()
+    for text in texts:
+        font.render(text, True, color)
+    middle = time.perf_counter()
+    for text in texts:
+        atlas.render(text, color)
+    ended = time.perf_counter()
+    count = max(1, len(texts))
+    return (middle - started) / count, (ended - middle) / count
+
+
+def time_reveals(font, atlas, texts, color=(255, 255, 255)):
+    """Average seconds to reveal a line one character per frame, rendering each prefix with
+    font.render() (what a TextSurfaceCache miss costs) and with a Reveal"""
+    started = time.perf_counter()
+    for text in texts:
+        for count in range(1, len(text) + 1):
+            font.render(text[:count], True, color)
+    middle = time.perf_counter()
+    for text in texts:
+        reveal = atlas.reveal(text, color)
+        for count in range(1, len(text) + 1):
+            reveal.show(count)
+    ended = time.perf_counter()
+    count = max(1, len(texts))
+    return (middle - started) / count, (ended - middle) / count
+
+
+def story_texts():
+    """Every line of story text, in English and each translation, to compare atlas output on"""
+    sys.path.insert(0, REPO_ROOT)
+    from shared.story import StoryLibrary
+    from shared.l10n import LOCALES, load_messages
+    texts = set()
+
+    def walk(value):
+        if isinstance(value, str):
+            texts.update(line for line in value.splitlines() if line.strip())
+        elif isinstance(value, dict):
+            for item in value.values():
+                walk(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                walk(item)
+
+    story = StoryLibrary()
+    for era_id in story.era_ids:
+        walk(story.era(era_id))
+    for code in LOCALES.codes[1:]:
+        if os.path.exists(LOCALES.source_path(code)):
+            # Keys are the English text, interface strings included
+            walk(list(load_messages(LOCALES.source_path(code)).items()))
+    return sorted(texts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Glyph atlas text renderer for Nusantara Mission")
+    parser.add_argument("--compare", action="store_true",
+                        help="compare atlas output with font.render() on every line of the story")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(COMPARE_SIZES), help="point sizes to check")
+    parser.add_argument("--font", default=os.path.join(GUI_DIR, "Merriweather_24pt-Regular.ttf"))
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.font.init()
+    texts = story_texts() if args.compare else []
+    started = time.perf_counter()
+    layout = OpenTypeLayout(args.font)
+    print(f"Layout tables read in {time.perf_counter() - started:.3f}s")
+    failed = False
+    for size in args.sizes:
+        font = pygame.font.Font(args.font, size)
+        started = time.perf_counter()
+        atlas = GlyphAtlas.build(font, layout, size)
+        built = time.perf_counter() - started
+        print(f"{size:>3}pt: atlas {atlas.surface.get_width()}x{atlas.surface.get_height()}, "
+              f"{sum(map(len, atlas.ligatures.values()))} ligatures, built in {built:.3f}s")
+        if not args.compare:
+            continue
+        results = compare(font, atlas, texts)
+        exact = sum(1 for _, _, pixels, _ in results if pixels == 0)
+        wrong_size = [r for r in results if r[2] is None]
+        worst = max((r for r in results if r[2] is not None), key=lambda r: r[2], default=None)
+        print(f"       {exact}/{len(results)} lines pixel-identical, {len(wrong_size)} of a different size, "
+              f"{len(texts) - len(results)} left to font.render(), {len(atlas.kerning)} kerning pairs looked up")
+        if worst is not None and worst[2]:
+            print(f"       most differing line: {worst[2]} px off (by up to {worst[3]}): {worst[0][:60]!r}")
+        for text, (width, height), _, _ in wrong_size[:3]:
+            print(f"       size {width:+d}x{height:+d} px: {text[:60]!r}")
+        differing = compare_reveals(font, atlas, texts)
+        print(f"       {len(differing)} lines with a revealed prefix that differs from font.render()")
+        for text, count in differing[:3]:
+            print(f"       first {count} characters differ: {text[:60]!r}")
+        font_time, atlas_time = time_renders(font, atlas, texts)
+        print(f"       per line: font.render {font_time * 1e6:.0f} us, atlas {atlas_time * 1e6:.0f} us")
+        font_time, atlas_time = time_reveals(font, atlas, texts)
+        print(f"       per line revealed a character at a time: font.render {font_time * 1e6:.0f} us, "
+              f"atlas {atlas_time * 1e6:.0f} us")
+        failed = failed or exact != len(results) or bool(differing)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
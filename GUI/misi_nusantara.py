@@ -4,13 +4,32 @@ Nusantara Mission - Pygame Enhanced Text Adventure
 """
 
 import os
+import sys
 import json 
+import math
+import atexit
 import time
 import random
+import argparse
+import threading
+from collections import OrderedDict, deque
+STARTED_AT = time.perf_counter() # Zero point of the startup report (--startup-report)
 import pygame
 
-# --- Pygame Setup ---
-pygame.init()
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from shared import savecodec, tracing
+from shared.replay import Recorder, Replay, ReplayMismatch, capture_files
+from shared.items import Inventory, format_item
+from shared.l10n import LOCALES, SOURCE_LOCALE
+from shared.story import StoryLibrary
+from scene_effects import SceneEffects, check_condition, visible_options
+
+# Run as a script this module is __main__; story_graph imports it by name and must get the same scenes
+if __name__ == "__main__":
+    sys.modules.setdefault("misi_nusantara", sys.modules[__name__])
 
 # --- Constants ---
 SCREEN_WIDTH = 800
@@ -29,6 +48,8 @@ NARRATIVE_TEXT_COLOR = (230, 230, 230)
 TITLE_TEXT_COLOR = (255, 215, 0) 
 ERA_TITLE_COLOR = (200, 200, 255) 
 EVENT_MSG_COLOR = (173, 255, 47) # Greenyellow untuk pesan event
+DEFAULT_BACKGROUND_COLOR = BLACK
+LETTERBOX_COLOR = BLACK # Bars around the canvas when the window has another aspect ratio
 
 # Font setup
 FONT_NAME_PATH = "Merriweather_24pt-Regular.ttf" 
@@ -37,6 +58,16 @@ OPTION_FONT_SIZE = 18
 TITLE_FONT_SIZE = 52
 ERA_TITLE_FONT_SIZE = 28
 MENU_FONT_SIZE = 24
+HUD_FONT_SIZE = 14
+# Font role -> (Merriweather size, size of pygame's default font if the TTF can't be loaded)
+FONT_ROLES = {
+    "base": (DEFAULT_FONT_SIZE, DEFAULT_FONT_SIZE + 6),
+    "option": (OPTION_FONT_SIZE, OPTION_FONT_SIZE + 4),
+    "title": (TITLE_FONT_SIZE, TITLE_FONT_SIZE + 10),
+    "era_title": (ERA_TITLE_FONT_SIZE, ERA_TITLE_FONT_SIZE + 6),
+    "menu": (MENU_FONT_SIZE, MENU_FONT_SIZE + 6),
+    "hud": (HUD_FONT_SIZE, HUD_FONT_SIZE + 4),
+}
 
 # Text Box and Options Area
 TEXT_BOX_ACTUAL_HEIGHT = 250 
@@ -56,116 +87,972 @@ OPTIONS_START_Y = NARRATIVE_AREA_RECT.bottom + 15
 # Define BUTTON_HEIGHT before OPTION_SPACING
 BUTTON_HEIGHT = 35 
 OPTION_SPACING = BUTTON_HEIGHT + 5 # Total step for next button (button height + gap)
+NARRATIVE_LINE_SPACING = 1.1
+
+NAME_INPUT_BOX_RECT = pygame.Rect(SCREEN_WIDTH // 2 - 180, SCREEN_HEIGHT // 2 - 20, 360, 50)
+# Everything above the text box: era title and event messages
+EVENT_MSG_AREA_RECT = pygame.Rect(0, 0, SCREEN_WIDTH, TEXT_BOX_RECT.top)
+CURSOR_BLINK_INTERVAL = 0.5
+
+# Event message toasts, see ToastManager
+TOAST_LIMIT = 4 # Most messages shown at once; a new one pushes out the oldest
+TOAST_DURATION = 4.0 # Seconds a message stays up, including its fade
+TOAST_FADE_TIME = 0.6
+TOAST_FADE_STEPS = 6 # Redraws per fade; the loop sleeps in between
+TOAST_SPACING = 28
+
+# Frame pacing defaults, see FramePacer
+ACTIVE_FPS = 60 # Most frames per second while something is changing
+IDLE_FPS = 2 # Wake-ups per second when nothing needs redrawing
+BACKGROUND_FPS = 1 # Most redraws per second while the window is unfocused
+POWER_SAVE_PACING = {"active_fps": 30, "idle_fps": 1, "background_fps": 0.5}
+SETTINGS_FILE_NAME = "nusantara_settings.json"
+TEXT_BACKENDS = ("font", "atlas") # font.render(), or glyph_atlas.py
+LAYER_CACHE_SIZE = 4 # Composed static layers kept, so going to a menu and back doesn't compose them again
+
+SAVE_FILE_NAME = "nusantara_mission_pygame_save.sav" # Binary format, see shared/savecodec.py
+LEGACY_SAVE_FILE_NAME = "nusantara_mission_pygame_save.json"
+# Posted by the SaveWorker when a save or load finishes
+SAVE_IO_EVENT = pygame.event.custom_type()
+
+# Keys that work outside of name input, and the input command each one sends
+HOTKEY_COMMANDS = {pygame.K_i: "inventory", pygame.K_m: "menu", pygame.K_ESCAPE: "back"}
+
+# Tracing, see shared/tracing.py
+TRACE_SAMPLE_EVERY = {"frame": 60} # Debug events per frame: keep one in this many
+TRACE_CRASH_EVENTS = 50 # Events printed when the game crashes
+
+# Performance HUD, see PerfHUD
+HUD_TOGGLE_KEY = pygame.K_F3
+HUD_FRAMES = 240 # Frames the percentiles cover
+HUD_REFRESH_INTERVAL = 0.25 # Seconds between updates of the numbers
+HUD_WIDTH = 440 # Window pixels; the HUD is drawn unscaled
+HUD_TEXT_COLOR = (220, 255, 220)
+HUD_BACKGROUND_COLOR = (0, 0, 0, 190)
+
+# --- Startup ---
+
+class StartupReport:
+    """Times each step from importing pygame to the first frame on screen."""
+
+    def __init__(self, started=STARTED_AT):
+        self.started = started
+        self.marks = []
+        self.finished = False
+
+    def mark(self, label):
+        if not self.finished:
+            self.marks.append((label, time.perf_counter()))
+
+    def finish(self, label="first frame"):
+        self.mark(label)
+        self.finished = True
+
+    def format(self):
+        lines = ["Startup (ms since importing pygame):"]
+        previous = self.started
+        for label, when in self.marks:
+            lines.append(f"  {label:<20} {(when - self.started) * 1000:8.1f}  (+{(when - previous) * 1000:.1f})")
+            previous = when
+        lines.append(f"  {len(fonts.loaded)} font(s) loaded on demand in {fonts.load_time * 1000:.1f} ms")
+        return "\n".join(lines)
+
+
+startup = StartupReport()
+
+
+def init_pygame():
+    """Starts only the display and font subsystems; the game has no audio or joysticks."""
+    if not pygame.display.get_init():
+        pygame.display.init()
+    if not pygame.font.get_init():
+        pygame.font.init()
+
+
+def scale_length(length, scale):
+    """A logical length in pixels at scale; anything drawn at all stays at least 1 px"""
+    if length <= 0:
+        return length
+    return max(1, round(length * scale))
+
+
+class FontManager:
+    """Loads each font role the first time it is drawn and shares it between games.
+
+    Fonts are rasterized at the pixel size they are drawn at, so a role is
+    loaded once per scale the canvas is shown at. If the Merriweather TTF
+    can't be read, every role falls back to pygame's default font. Fonts die
+    with pygame.quit(), so the cache is dropped when the font module has been
+    shut down since.
+    """
+
+    def __init__(self, path=FONT_NAME_PATH, roles=FONT_ROLES):
+        self.path = path
+        self.roles = roles
+        self.loaded = {} # (role, pixel size) -> Font
+        self.sources = {} # Font -> (TTF path, point size), or None for pygame's default font
+        self.fallback = False
+        self.load_time = 0.0
+
+    def get(self, role, scale=1.0):
+        size, fallback_size = self.roles[role]
+        key = (role, scale_length(size, scale))
+        font = self.loaded.get(key)
+        if font is not None and pygame.font.get_init():
+            return font
+        if not pygame.font.get_init():
+            self.loaded.clear()
+            self.sources.clear()
+            pygame.font.init()
+        started = time.perf_counter()
+        font = self.loaded[key] = self._load(key[1], scale_length(fallback_size, scale))
+        self.load_time += time.perf_counter() - started
+        return font
+
+    def source(self, font):
+        return self.sources.get(font)
+
+    def _load(self, size, fallback_size):
+        if not self.fallback:
+            try:
+                font = pygame.font.Font(self.path, size)
+                self.sources[font] = (self.path, size)
+                return font
+            except Exception as e:
+                print(f"Font error: {e}. Using Pygame default font.")
+                self.fallback = True
+        return pygame.font.Font(None, fallback_size)
+
+
+# Shared by every game, so tools that make many Games load each font once
+fonts = FontManager()
+
+# State changes and choices; kept in memory only unless --trace starts the flusher
+tracer = tracing.Tracer(sample_every=TRACE_SAMPLE_EVERY)
+
+
+class FontRole:
+    """Game attribute that fetches a font role at the game's current scale."""
+
+    def __init__(self, role):
+        self.role = role
+
+    def __get__(self, game, owner=None):
+        return self if game is None else fonts.get(self.role, game.view.scale)
+
+# --- Text Surface Cache ---
+
+class TextSurfaceCache:
+    """LRU cache of rendered text surfaces, bounded by entry count and pixel bytes.
+
+    Keys are (font, text, color, antialias, background). The Font object pins
+    both the face and the point size, so two sizes of Merriweather never collide.
+    Misses are drawn by rasterize, font.render() unless use_text_backend()
+    switched it to the glyph atlas.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=8 * 1024 * 1024, rasterize=None):
+        self.rasterize = rasterize or font_render
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def render(self, font, text, color, aa=True, bkg=None):
+        key = (font, text, color, aa, bkg)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        surf = self.rasterize(font, text, color, aa, bkg)
+        size = surf.get_pitch() * surf.get_height()
+        if size > self.max_bytes:
+            return surf # Too big to be worth keeping around
+        self._entries[key] = (surf, size)
+        self.bytes_used += size
+        while len(self._entries) > self.max_entries or self.bytes_used > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.bytes_used -= evicted_size
+        return surf
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes_used = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes_used,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
 
-SAVE_FILE_NAME = "nusantara_mission_pygame_save.json"
+
+def font_render(font, text, color, aa=True, bkg=None):
+    return font.render(text, aa, color, bkg)
+
+
+# Shared by narrative text, buttons, titles and event messages
+text_cache = TextSurfaceCache()
+
+
+def render_text(font, text, color, aa=True, bkg=None):
+    return text_cache.render(font, text, color, aa, bkg)
+
+
+def use_text_backend(name):
+    """Switches all text between font.render() ("font") and the glyph atlas ("atlas")."""
+    if name == "atlas":
+        import glyph_atlas
+        text_cache.rasterize = glyph_atlas.AtlasRenderer(fonts.source).render
+    elif name == "font":
+        text_cache.rasterize = font_render
+    else:
+        raise ValueError(f"Unknown text backend {name!r}, expected one of {', '.join(TEXT_BACKENDS)}")
+    # Drop everything drawn with the old backend
+    text_cache.clear()
+    ButtonStyle.clear_sprites()
+
+# --- Text Layout ---
+
+class WrappedText:
+    __slots__ = ("runs", "line_spacing")
+
+    def __init__(self, runs, line_spacing):
+        self.runs = runs # Tuple of (line_text, y_offset) pairs
+        self.line_spacing = line_spacing
+
+
+class TextLayoutEngine:
+    """Wraps text once per (text, font, width, spacing) and measures each word only once."""
+
+    def __init__(self, max_layouts=128):
+        self.max_layouts = max_layouts
+        self._word_widths = {}
+        self._layouts = OrderedDict()
+
+    def clear(self):
+        self._word_widths.clear()
+        self._layouts.clear()
+
+    def word_width(self, font, word):
+        key = (font, word)
+        width = self._word_widths.get(key)
+        if width is None:
+            width = font.size(word)[0]
+            self._word_widths[key] = width
+        return width
+
+    def layout(self, text, font, width, line_spacing_modifier=1.0):
+        key = (text, font, width, line_spacing_modifier)
+        wrapped = self._layouts.get(key)
+        if wrapped is not None:
+            self._layouts.move_to_end(key)
+            return wrapped
+
+        line_spacing = int(font.get_linesize() * line_spacing_modifier)
+        space_width = self.word_width(font, " ")
+        runs = []
+        y_offset = 0
+        for paragraph in text.splitlines():
+            line_words = []
+            line_width = 0
+            for word in paragraph.split(" "):
+                word_width = self.word_width(font, word) + space_width
+                if line_words and line_width + word_width >= width:
+                    runs.append((" ".join(line_words).strip(), y_offset))
+                    y_offset += line_spacing
+                    line_words = []
+                    line_width = 0
+                line_words.append(word)
+                line_width += word_width
+            line_text = " ".join(line_words).strip()
+            if line_text:
+                runs.append((line_text, y_offset))
+                y_offset += line_spacing
+
+        wrapped = WrappedText(tuple(runs), line_spacing)
+        self._layouts[key] = wrapped
+        if len(self._layouts) > self.max_layouts:
+            self._layouts.popitem(last=False)
+        return wrapped
+
+
+text_layout = TextLayoutEngine()
+
+# --- Redraw Scheduling ---
+
+class RedrawScheduler:
+    """Collects dirty screen regions between frames.
+
+    A frame is only drawn when something is dirty, and then only the dirty
+    regions are repainted and pushed with pygame.display.update(rects).
+    Timed invalidations (e.g. the blinking cursor) let the loop sleep until
+    the next one is due instead of spinning at full frame rate.
+    """
+
+    def __init__(self, screen_rect):
+        self.screen_rect = pygame.Rect(screen_rect)
+        self.full = True
+        self.rects = []
+        self._timers = {}
+
+    @property
+    def dirty(self):
+        return self.full or bool(self.rects)
+
+    def invalidate(self, rect=None):
+        if rect is None:
+            self.full = True
+            self.rects = []
+        elif not self.full:
+            self.rects.append(pygame.Rect(rect))
+
+    def invalidate_at(self, key, when, rect=None):
+        self._timers[key] = (when, rect)
+
+    def has_timer(self, key):
+        return key in self._timers
+
+    def cancel(self, key):
+        self._timers.pop(key, None)
+
+    def poll_timers(self, now):
+        for key, (when, rect) in list(self._timers.items()):
+            if when <= now:
+                del self._timers[key]
+                self.invalidate(rect)
+
+    def next_due(self):
+        """When the earliest timed invalidation is due, or None if there are none"""
+        if not self._timers:
+            return None
+        return min(when for when, _ in self._timers.values())
+
+    def take(self):
+        if self.full:
+            rects = [self.screen_rect.copy()]
+        else:
+            rects = [rect.clip(self.screen_rect) for rect in self.rects]
+        self.full = False
+        self.rects = []
+        return rects
+
+# --- Viewport ---
+class Viewport:
+    """Maps the fixed SCREEN_WIDTH x SCREEN_HEIGHT canvas onto the window.
+
+    Scenes are laid out in logical canvas coordinates. The canvas is scaled by
+    the largest factor that fits the window and centred in it, with bars on
+    the sides that don't match its aspect ratio. Text and borders are drawn at
+    that scale rather than stretched, so they stay sharp at any window size.
+    """
+
+    def __init__(self, window_size, scale=None, offset=None):
+        self.window_size = tuple(window_size)
+        if scale is None:
+            scale = min(self.window_size[0] / SCREEN_WIDTH, self.window_size[1] / SCREEN_HEIGHT)
+        self.scale = scale
+        self.size = (round(SCREEN_WIDTH * scale), round(SCREEN_HEIGHT * scale))
+        if offset is None:
+            offset = ((self.window_size[0] - self.size[0]) // 2, (self.window_size[1] - self.size[1]) // 2)
+        self.offset = offset
+
+    def canvas(self):
+        """The same scale with the canvas at the origin, for drawing onto a surface of self.size"""
+        return Viewport(self.size, self.scale, (0, 0))
+
+    @property
+    def letterboxed(self):
+        return self.size != self.window_size
+
+    def x(self, x):
+        return self.offset[0] + round(x * self.scale)
+
+    def y(self, y):
+        return self.offset[1] + round(y * self.scale)
+
+    def point(self, pos):
+        return (self.x(pos[0]), self.y(pos[1]))
+
+    def rect(self, rect):
+        # Edges are mapped rather than sizes, so neighbouring rects still meet exactly
+        rect = pygame.Rect(rect)
+        left, top = self.x(rect.left), self.y(rect.top)
+        return pygame.Rect(left, top, self.x(rect.right) - left, self.y(rect.bottom) - top)
+
+    def length(self, length):
+        return scale_length(length, self.scale)
+
+    def to_logical(self, pos):
+        """Window pixel -> canvas coordinate, e.g. for the mouse"""
+        return (math.floor((pos[0] - self.offset[0]) / self.scale),
+                math.floor((pos[1] - self.offset[1]) / self.scale))
+
+
+class LayerCache:
+    """Canvas-sized surfaces holding the parts of a screen that don't change while it is shown.
+
+    A layer is composed once and blitted under the moving parts every frame,
+    instead of filling the background and drawing the text box, narrative,
+    titles and buttons again. Layers are keyed by what they show and dropped
+    when the viewport changes.
+    """
+
+    def __init__(self, max_layers=LAYER_CACHE_SIZE):
+        self.max_layers = max_layers
+        self._layers = OrderedDict() # key -> (layer, {(rect, sprite): overlay})
+        self.composed = 0 # Layers and overlays made so far, for the performance HUD
+
+    def get(self, key, size, compose):
+        entry = self._layers.get(key)
+        if entry is not None:
+            self._layers.move_to_end(key)
+            return entry[0]
+        layer = pygame.Surface(size)
+        compose(layer)
+        self.composed += 1
+        if pygame.display.get_surface() is not None:
+            layer = layer.convert()
+        self._layers[key] = (layer, {})
+        while len(self._layers) > self.max_layers:
+            self._layers.popitem(last=False)
+        return layer
+
+    def overlay(self, key, rect, sprite):
+        """An opaque copy of rect of a layer with sprite blended over it.
+
+        Blitting it is a plain copy, where blending the sprite onto the screen
+        each frame costs several times as much (e.g. a hovered button).
+        """
+        layer, overlays = self._layers[key]
+        overlay_key = (tuple(rect), sprite)
+        overlay = overlays.get(overlay_key)
+        if overlay is None:
+            overlay = layer.subsurface(rect).copy()
+            overlay.blit(sprite, (0, 0))
+            overlays[overlay_key] = overlay
+            self.composed += 1
+        return overlay
+
+    def clear(self):
+        self._layers.clear()
+
+# --- Frame Pacing ---
+
+class FramePacer:
+    """Decides when the main loop draws and how long it may sleep.
+
+    Frames are only drawn when something is dirty, and at most active_fps
+    times a second, so the loop runs at full rate only while something is
+    changing: a hover, typing, a blinking cursor. With nothing to draw it
+    blocks on the event queue, waking idle_fps times a second at most. While
+    the window is unfocused, redraws are held to background_fps and the
+    cursor stops blinking. While it is minimized nothing is drawn and the
+    loop sleeps until an event arrives.
+    """
+
+    def __init__(self, active_fps=ACTIVE_FPS, idle_fps=IDLE_FPS, background_fps=BACKGROUND_FPS):
+        if active_fps <= 0 or background_fps <= 0 or idle_fps < 0:
+            raise ValueError("Frame rates must be positive (idle_fps may be 0 to never wake when idle)")
+        self.active_fps = active_fps
+        self.idle_fps = idle_fps
+        self.background_fps = background_fps
+        self.focused = True
+        self.minimized = False
+        self.last_frame = 0.0
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Builds a pacer from the "frame_pacing" settings: rates, or "power_save": true for lower defaults"""
+        pacing = dict(POWER_SAVE_PACING) if settings.get("power_save") else {}
+        pacing.update((key, float(settings[key])) for key in ("active_fps", "idle_fps", "background_fps")
+                      if settings.get(key) is not None)
+        return cls(**pacing)
+
+    def on_event(self, event):
+        if event.type == pygame.WINDOWFOCUSLOST:
+            self.focused = False
+        elif event.type == pygame.WINDOWFOCUSGAINED:
+            self.focused = True
+        elif event.type in (pygame.WINDOWMINIMIZED, pygame.WINDOWHIDDEN):
+            self.minimized = True
+        elif event.type in (pygame.WINDOWRESTORED, pygame.WINDOWMAXIMIZED, pygame.WINDOWSHOWN):
+            self.minimized = False
+
+    @property
+    def frame_interval(self):
+        return 1 / (self.active_fps if self.focused else self.background_fps)
+
+    def can_draw(self, now):
+        return not self.minimized and now - self.last_frame >= self.frame_interval
+
+    def frame_drawn(self, now):
+        self.last_frame = now
+
+    def wait_timeout_ms(self, redraw, now):
+        """How long to block on the event queue: 0 to just poll, None to wait for the next event."""
+        if self.minimized:
+            return None
+        if redraw.dirty:
+            wake = self.last_frame + self.frame_interval
+        else:
+            wake = now + 1 / self.idle_fps if self.idle_fps else None
+            due = redraw.next_due()
+            if due is not None:
+                due = max(due, self.last_frame + self.frame_interval)
+                wake = due if wake is None else min(wake, due)
+            if wake is None:
+                return None
+        return max(0, int((wake - now) * 1000) + 1) if wake > now else 0
+
+
+# --- Performance HUD ---
+class PerfHUD:
+    """Overlay with the frame timings of the machine the game runs on, toggled with F3.
+
+    While it is shown, every drawn frame records how long handle_events,
+    update and draw took, how many surfaces were rendered (text rasterized,
+    layers composed) and how many were blitted to the screen. The HUD shows
+    p50/p99 over the last `frames` frames and is redrawn a few times a
+    second. Hidden, it records nothing and is never drawn.
+    """
+
+    def __init__(self, frames=HUD_FRAMES):
+        self.visible = False
+        self.samples = deque(maxlen=frames) # (events, update, draw, rendered, blits) per frame, in seconds
+        self.frame_times = deque(maxlen=frames) # perf_counter() at the end of each frame
+        self.surface = None
+        self.rendered_at = 0.0
+        self._renders_before = None
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.samples.clear()
+        self.frame_times.clear()
+        self.surface = None
+        self._renders_before = None
+
+    def record(self, events, update, draw, renders, blits):
+        """Adds a drawn frame; renders is a running total, so only its growth counts."""
+        rendered = renders - self._renders_before if self._renders_before is not None else 0
+        self._renders_before = renders
+        self.samples.append((events, update, draw, rendered, blits))
+        self.frame_times.append(time.perf_counter())
+
+    @staticmethod
+    def percentiles(values):
+        ordered = sorted(values)
+        return ordered[len(ordered) // 2], ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+    def lines(self, game):
+        view = game.view
+        elapsed = self.frame_times[-1] - self.frame_times[0] if len(self.frame_times) > 1 else 0.0
+        fps = (len(self.frame_times) - 1) / elapsed if elapsed else 0.0
+        lines = [f"{fps:.1f} fps over the last {len(self.samples)} frames"]
+        if self.samples:
+            columns = list(zip(*self.samples))
+            frame_p50, frame_p99 = self.percentiles([sum(sample[:3]) for sample in self.samples])
+            lines.append(f"frame {frame_p50 * 1000:.2f} / {frame_p99 * 1000:.2f} ms (p50 / p99)")
+            lines.append("  ".join(f"{name} {p50 * 1000:.2f}/{p99 * 1000:.2f}" for name, (p50, p99) in
+                                   zip(("events", "update", "draw"), map(self.percentiles, columns[:3]))))
+            lines.append(f"rendered {sum(columns[3]) / len(self.samples):.2f}/frame, "
+                         f"blits {sum(columns[4]) / len(self.samples):.1f}/frame, "
+                         f"text cache {text_cache.stats()['hit_rate']:.0%} hits")
+        lines.append(f"{game.game_state}  {view.window_size[0]}x{view.window_size[1]} at {view.scale:.2f}x")
+        return lines
+
+    def size(self):
+        font = fonts.get("hud")
+        return (HUD_WIDTH, font.get_linesize() * 5 + 8)
+
+    def logical_rect(self, view):
+        """The canvas area the HUD covers; it sits at the canvas's top left corner"""
+        width, height = self.size()
+        return pygame.Rect(0, 0, math.ceil(width / view.scale) + 1, math.ceil(height / view.scale) + 1)
+
+    def render(self, game):
+        font = fonts.get("hud")
+        self.surface = pygame.Surface(self.size(), pygame.SRCALPHA)
+        self.surface.fill(HUD_BACKGROUND_COLOR)
+        for index, line in enumerate(self.lines(game)):
+            # font.render, not render_text: numbers that change every time would only churn the text cache
+            self.surface.blit(font.render(line, True, HUD_TEXT_COLOR), (6, 4 + index * font.get_linesize()))
+
+    def draw(self, surface, game, now):
+        if self.surface is None or now - self.rendered_at >= HUD_REFRESH_INTERVAL:
+            self.render(game)
+            self.rendered_at = now
+        surface.blit(self.surface, game.view.offset)
+
+
+def load_settings(path=SETTINGS_FILE_NAME):
+    """Reads the optional JSON settings file; a missing or unreadable file means all defaults."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Error reading settings from {path}: {e}")
+        return {}
+
+
+def window_size_from_settings(display):
+    """The window size a "display" settings section asks for: "window" as WxH, or the canvas times "scale"."""
+    window, scale = display.get("window"), display.get("scale")
+    if window:
+        if isinstance(window, str):
+            window = window.lower().split("x")
+        width, height = (int(n) for n in window)
+    elif scale:
+        width, height = round(SCREEN_WIDTH * float(scale)), round(SCREEN_HEIGHT * float(scale))
+    else:
+        return None
+    if width <= 0 or height <= 0:
+        raise ValueError(f"window size must be positive, not {width}x{height}")
+    return (width, height)
+
+
+def open_window(size=None, fullscreen=False):
+    """Opens the game window; fullscreen without a size uses the desktop resolution."""
+    if fullscreen:
+        screen = pygame.display.set_mode(size or (0, 0), pygame.FULLSCREEN)
+    else:
+        screen = pygame.display.set_mode(size or (SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+    pygame.display.set_caption("Nusantara Mission")
+    return screen
+
+# --- Background Save/Load ---
+
+class SaveWorker:
+    """Does save and load file I/O on a background thread so the render loop never waits on disk.
+
+    Saves are coalesced: if several are requested while one is being written,
+    only the newest snapshot is written next. Files are written to a temp file
+    and renamed into place, and every finished job is reported back to the
+    game as a SAVE_IO_EVENT (op="save"/"load", ok, data, error). Loading falls
+    back to legacy_path (the old JSON save) when there is no save at path yet.
+    """
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._wakeup = threading.Condition()
+        self._pending_save = None
+        self._pending_load = False
+        self._busy = False
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name="SaveWorker", daemon=True)
+        self._thread.start()
+
+    def save(self, blob):
+        with self._wakeup:
+            self._pending_save = blob
+            self._wakeup.notify()
+
+    def load(self):
+        with self._wakeup:
+            self._pending_load = True
+            self._wakeup.notify()
+
+    def flush(self, timeout=5.0):
+        """Waits until every requested save and load has finished and been posted."""
+        with self._wakeup:
+            self._wakeup.wait_for(
+                lambda: self._pending_save is None and not self._pending_load and not self._busy, timeout)
+
+    def close(self, timeout=5.0):
+        """Finishes any pending save, then stops the thread."""
+        with self._wakeup:
+            self._closing = True
+            self._wakeup.notify()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while self._pending_save is None and not self._pending_load and not self._closing:
+                    self._wakeup.wait()
+                blob, self._pending_save = self._pending_save, None
+                load, self._pending_load = self._pending_load, False
+                if blob is None and not load:
+                    return # Closing with nothing left to do
+                self._busy = True
+            if blob is not None:
+                self._write(blob)
+            if load:
+                self._read()
+            with self._wakeup:
+                self._busy = False
+                self._wakeup.notify_all()
+
+    def _write(self, blob):
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(blob)
+            os.replace(temp_path, self.path)
+            self._post("save", True)
+        except Exception as e:
+            self._post("save", False, error=e)
+
+    def _read(self):
+        path = self.path
+        if not os.path.exists(path) and self.legacy_path:
+            path = self.legacy_path
+        if not os.path.exists(path):
+            self._post("load", False)
+            return
+        try:
+            self._post("load", True, data=savecodec.read_save(path))
+        except Exception as e:
+            self._post("load", False, error=e)
+
+    def _post(self, op, ok, data=None, error=None):
+        if pygame.display.get_init():
+            pygame.event.post(pygame.event.Event(SAVE_IO_EVENT, op=op, ok=ok, data=data, error=error))
 
 # --- Helper Functions ---
 
-def render_text_wrapped(surface, text, font, color, rect, aa=True, bkg=None, line_spacing_modifier=1.0):
-    lines = text.splitlines()
+def draw_wrapped_text(surface, wrapped, font, color, rect, aa=True, bkg=None):
+    """Blits precomputed line runs, stopping at the first line that would overflow the rect."""
     y = rect.top
-    line_spacing = int(font.get_linesize() * line_spacing_modifier)
-
-    for line in lines:
-        words = line.split(' ')
-        current_line_text = ""
-        while words:
-            word = words.pop(0)
-            test_line = current_line_text + word + " "
-            if font.size(test_line)[0] < rect.width:
-                current_line_text = test_line
-            else:
-                if current_line_text.strip(): 
-                    text_surface = font.render(current_line_text.strip(), aa, color, bkg)
-                    surface.blit(text_surface, (rect.left, y))
-                y += line_spacing
-                current_line_text = word + " "
-                if y + line_spacing > rect.bottom: 
-                    if current_line_text.strip():
-                         text_surface = font.render(current_line_text.strip(), aa, color, bkg)
-                         surface.blit(text_surface, (rect.left, y))
-                         y += line_spacing
-                    return y 
-        
-        if current_line_text.strip(): 
-            text_surface = font.render(current_line_text.strip(), aa, color, bkg)
-            surface.blit(text_surface, (rect.left, y))
-            y += line_spacing
-        if y + line_spacing > rect.bottom and lines.index(line) < len(lines) -1 : 
-             return y 
+    for line_text, y_offset in wrapped.runs:
+        y = rect.top + y_offset
+        if y + wrapped.line_spacing > rect.bottom:
+            return y
+        surface.blit(render_text(font, line_text, color, aa, bkg), (rect.left, y))
+        y += wrapped.line_spacing
     return y
 
 
-class Button:
-    def __init__(self, x, y, width, height, text, font, 
-                 base_color=BUTTON_BASE_COLOR, 
-                 hover_color=BUTTON_HOVER_COLOR, 
-                 text_color=BUTTON_TEXT_COLOR,
-                 border_radius=7,  
-                 border_width=0,   
-                 border_color=None,
-                 action_tag=None): 
-        self.rect = pygame.Rect(x, y, width, height)
-        self.text = text
-        self.font = font
+def render_text_wrapped(surface, text, font, color, rect, aa=True, bkg=None, line_spacing_modifier=1.0):
+    wrapped = text_layout.layout(text, font, rect.width, line_spacing_modifier)
+    return draw_wrapped_text(surface, wrapped, font, color, rect, aa, bkg)
+
+
+class ButtonStyle:
+    """Shared look of a family of buttons, plus the sprites baked for it.
+
+    Styles are flyweights: ButtonStyle.get() hands back the same instance for
+    the same parameters, so every button drawn with it shares one sprite cache.
+    """
+
+    _styles = {}
+
+    def __init__(self, font_role, base_color, hover_color, text_color, border_radius, border_width, border_color):
+        self.font_role = font_role
         self.base_color = base_color
         self.hover_color = hover_color
         self.text_color = text_color
-        self.current_bg_color = base_color
-        self.is_hovered = False
         self.border_radius = border_radius
         self.border_width = border_width
-        self.border_color = border_color if border_color else base_color 
+        self.border_color = border_color if border_color else base_color
+        self._sprites = {}
+
+    @classmethod
+    def get(cls, font_role,
+            base_color=BUTTON_BASE_COLOR,
+            hover_color=BUTTON_HOVER_COLOR,
+            text_color=BUTTON_TEXT_COLOR,
+            border_radius=7,
+            border_width=0,
+            border_color=None):
+        key = (font_role, base_color, hover_color, text_color, border_radius, border_width, border_color)
+        style = cls._styles.get(key)
+        if style is None:
+            style = cls(*key)
+            cls._styles[key] = style
+        return style
+
+    @classmethod
+    def clear_sprites(cls):
+        for style in cls._styles.values():
+            style._sprites.clear()
+
+    def sprites(self, text, width, height, scale=1.0):
+        """Returns the (base, hover) surfaces for a label, baking them on first use.
+
+        width and height are the sprite's size on screen; scale is the one the
+        label's font and the border are drawn at.
+        """
+        key = (text, width, height, scale)
+        sprites = self._sprites.get(key)
+        if sprites is None:
+            sprites = (self._bake(text, width, height, scale, self.base_color),
+                       self._bake(text, width, height, scale, self.hover_color))
+            self._sprites[key] = sprites
+        return sprites
+
+    def _bake(self, text, width, height, scale, bg_color):
+        sprite = pygame.Surface((width, height), pygame.SRCALPHA)
+        rect = sprite.get_rect()
+        border_width = scale_length(self.border_width, scale)
+        border_radius = scale_length(self.border_radius, scale)
+        pygame.draw.rect(sprite, bg_color, rect, border_width, border_radius)
+        if border_width > 0 and self.border_color:
+            pygame.draw.rect(sprite, self.border_color, rect, border_width, border_radius)
+        text_surf = render_text(fonts.get(self.font_role, scale), text, self.text_color)
+        sprite.blit(text_surf, text_surf.get_rect(center=rect.center))
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert_alpha()
+        return sprite
+
+
+class Button:
+    """A clickable label. rect is on the logical canvas, screen_rect where it is drawn in the window."""
+
+    __slots__ = ("rect", "screen_rect", "text", "style", "action_tag", "is_hovered", "base_sprite", "hover_sprite")
+
+    def __init__(self, x, y, width, height, text, style, action_tag=None, view=None):
+        self.rect = pygame.Rect(x, y, width, height)
+        self.screen_rect = view.rect(self.rect) if view else self.rect.copy()
+        self.text = text
+        self.style = style
         self.action_tag = action_tag if action_tag else text 
+        self.is_hovered = False
+        self.base_sprite, self.hover_sprite = style.sprites(text, self.screen_rect.width, self.screen_rect.height,
+                                                            view.scale if view else 1.0)
 
     def draw(self, surface):
-        pygame.draw.rect(surface, self.current_bg_color, self.rect, self.border_width, self.border_radius)
-        if self.border_width > 0 and self.border_color: 
-             pygame.draw.rect(surface, self.border_color, self.rect, self.border_width, self.border_radius)
-        
-        text_surf = self.font.render(self.text, True, self.text_color)
-        text_rect = text_surf.get_rect(center=self.rect.center)
-        surface.blit(text_surf, text_rect)
+        surface.blit(self.hover_sprite if self.is_hovered else self.base_sprite, self.screen_rect)
 
     def check_hover(self, mouse_pos):
-        if self.rect.collidepoint(mouse_pos):
-            self.current_bg_color = self.hover_color
-            self.is_hovered = True
-        else:
-            self.current_bg_color = self.base_color
-            self.is_hovered = False
+        """Updates hover state and returns True if it changed."""
+        was_hovered = self.is_hovered
+        self.is_hovered = self.rect.collidepoint(mouse_pos)
+        return was_hovered != self.is_hovered
 
     def check_click(self, mouse_pos):
         return self.rect.collidepoint(mouse_pos)
 
+# --- Event Message Toasts ---
+class Toast:
+    __slots__ = ("text", "expires", "scale", "surface")
+
+    def __init__(self, text, expires):
+        self.text = text
+        self.expires = expires
+        self.scale = None
+        self.surface = None # Box and text, rendered once per scale
+
+
+class ToastManager:
+    """Short-lived event messages such as "[+] 'Keris' added to inventory!".
+
+    At most max_toasts are kept; a new one pushes out the oldest. Each stays
+    up for duration seconds and fades out in fade_steps steps over the last
+    fade_time of them, so the game only needs a frame when one of them
+    changes (see next_change). A message's box and text are rendered to one
+    surface the first time it is drawn, and a frame just blits it.
+    """
+
+    def __init__(self, max_toasts=TOAST_LIMIT, duration=TOAST_DURATION,
+                 fade_time=TOAST_FADE_TIME, fade_steps=TOAST_FADE_STEPS):
+        self.duration = duration
+        self.fade_time = fade_time
+        self.fade_steps = fade_steps
+        self._toasts = deque(maxlen=max_toasts)
+
+    def __len__(self):
+        return len(self._toasts)
+
+    @property
+    def messages(self):
+        return [toast.text for toast in self._toasts]
+
+    def push(self, text, now):
+        self._toasts.append(Toast(text, now + self.duration))
+
+    def clear(self):
+        self._toasts.clear()
+
+    def expire(self, now):
+        """Drops the messages whose time is up; returns True if there were any."""
+        expired = False
+        while self._toasts and self._toasts[0].expires <= now:
+            self._toasts.popleft()
+            expired = True
+        return expired
+
+    def _fade_times(self, toast):
+        """When each fade step ends, the last one at expiry"""
+        return [toast.expires - self.fade_time * step / self.fade_steps for step in range(self.fade_steps)]
+
+    def alpha(self, toast, now):
+        steps_left = sum(1 for when in self._fade_times(toast) if when > now)
+        return 255 * steps_left // self.fade_steps
+
+    def next_change(self, now):
+        """When a message next fades a step or expires, or None if there are none"""
+        changes = [when for toast in self._toasts for when in self._fade_times(toast) if when > now]
+        if not changes:
+            return now if self._toasts else None # Only expired ones left
+        return min(changes)
+
+    def render(self, toast, scale):
+        if toast.scale != scale:
+            font = fonts.get("option", scale)
+            text_surf = render_text(font, toast.text, EVENT_MSG_COLOR)
+            box = pygame.Rect(0, 0, text_surf.get_width() + scale_length(20, scale),
+                              text_surf.get_height() + scale_length(10, scale))
+            surface = pygame.Surface(box.size, pygame.SRCALPHA)
+            pygame.draw.rect(surface, DARK_GREY, box, 0, scale_length(5, scale))
+            surface.blit(text_surf, text_surf.get_rect(center=box.center))
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert_alpha()
+            toast.scale, toast.surface = scale, surface
+        return toast.surface
+
+    def draw(self, surface, view, bottom, now):
+        """Stacks the messages, newest lowest, ending 15 px above the canvas y bottom; returns the number of blits."""
+        top = bottom - TOAST_SPACING * len(self._toasts) - 15
+        for index, toast in enumerate(self._toasts):
+            toast_surf = self.render(toast, view.scale)
+            toast_surf.set_alpha(self.alpha(toast, now))
+            surface.blit(toast_surf, toast_surf.get_rect(centerx=view.x(SCREEN_WIDTH // 2),
+                                                         y=view.y(top + index * TOAST_SPACING)))
+        return len(self._toasts)
+
 # --- Player Class ---
 class Player:
+    __slots__ = ("name", "inventory", "completed_eras", "choices")
+
     def __init__(self, name: str):
         self.name = name
-        self.inventory = []
+        self.inventory = Inventory()
         self.completed_eras = []
         self.choices = {} 
 
     def add_item(self, item: str, game_instance): 
+        tr = game_instance.tr
         if item not in self.inventory:
-            self.inventory.append(item)
-            game_instance.add_event_message(f"[+] '{item}' added to inventory!")
+            self.inventory.add(item)
+            game_instance.add_event_message(tr("[+] '{item}' added to inventory!").format(item=tr(item)))
         else:
-            game_instance.add_event_message(f"You already have '{item}'.")
+            game_instance.add_event_message(tr("You already have '{item}'.").format(item=tr(item)))
 
 
     def has_item(self, item: str) -> bool:
         return item in self.inventory
         
-    def get_inventory_display(self):
+    def get_inventory_display(self, tr):
         if not self.inventory:
-            return ["Inventory is empty."]
-        return [f"{i+1}. {item}" for i, item in enumerate(self.inventory)]
+            return [tr("Inventory is empty.")]
+        return [f"{i+1}. {format_item(tr(item), quantity)}" for i, (item, quantity) in enumerate(self.inventory.items())]
     
     def to_dict(self):
         return {
             "name": self.name,
-            "inventory": self.inventory,
+            "inventory": self.inventory.to_list(),
             "completed_eras": self.completed_eras,
             "choices": self.choices
         }
@@ -173,566 +1060,734 @@ class Player:
     @classmethod
     def from_dict(cls, data):
         player = cls(data["name"])
-        player.inventory = data["inventory"]
+        player.inventory = Inventory(data["inventory"])
         player.completed_eras = data["completed_eras"]
         player.choices = data["choices"]
         return player
 
+# --- Scenes ---
+
+class ButtonLayout:
+    """Where a scene's option buttons go; slot rects are computed once and reused."""
+    __slots__ = ("x", "y", "width", "height", "spacing", "style", "_slots")
+
+    def __init__(self, x, y, width, height, spacing, style):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.spacing = spacing
+        self.style = style
+        self._slots = []
+
+    def slot(self, index):
+        while len(self._slots) <= index:
+            self._slots.append((self.x, self.y + self.spacing * len(self._slots), self.width, self.height))
+        return self._slots[index]
+
+
+class Option:
+    __slots__ = ("text", "action_tag", "when")
+
+    def __init__(self, text, action_tag=None, when=None):
+        self.text = text
+        self.action_tag = action_tag if action_tag else text
+        self.when = when
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data["text"], data.get("action"), data.get("when"))
+
+
+class Variant:
+    """Alternative narrative and options shown while a condition holds."""
+    __slots__ = ("when", "narrative", "options")
+
+    def __init__(self, when, narrative, options):
+        self.when = when
+        self.narrative = narrative
+        self.options = options
+
+
+class Scene:
+    """Everything setup_state and process_choice need to know about one game_state.
+
+    Actions map an action tag to a tuple of effects, e.g. ("goto", "MAJAPAHIT_MARKET")
+    or ("add_item", "Odd Dark Stone"); SceneEffects (scene_effects.py) carries them out.
+    """
+    __slots__ = ("state_id", "title", "narrative", "options", "actions", "variants", "on_enter", "on_action",
+                 "layout", "background")
+
+    def __init__(self, state_id, title="", narrative="", options=(), actions=None,
+                 variants=(), on_enter=(), on_action=(), layout=None, background=DEFAULT_BACKGROUND_COLOR):
+        self.state_id = state_id
+        self.title = title
+        self.background = background
+        self.narrative = narrative
+        self.options = options
+        self.actions = actions or {}
+        self.variants = variants
+        self.on_enter = on_enter
+        self.on_action = on_action
+        self.layout = layout or NARRATIVE_LAYOUT
+
+    @classmethod
+    def from_data(cls, state_id, data):
+        """Builds a scene from its entry in a story/<era>.json file."""
+        return cls(state_id,
+                   title=data.get("title", ""),
+                   narrative=data.get("narrative", ""),
+                   options=build_options(data.get("options", ())),
+                   actions={tag: build_effects(effects) for tag, effects in data.get("actions", {}).items()},
+                   variants=tuple(Variant(variant["when"], variant["narrative"], build_options(variant["options"]))
+                                  for variant in data.get("variants", ())),
+                   on_enter=build_effects(data.get("on_enter", ())),
+                   on_action=build_effects(data.get("on_action", ())),
+                   background=tuple(data.get("background", DEFAULT_BACKGROUND_COLOR)))
+
+    def resolve(self, player):
+        for variant in self.variants:
+            if check_condition(variant.when, player):
+                return variant.narrative, variant.options
+        return self.narrative, self.options
+
+
+def build_options(data):
+    return tuple(Option.from_data(option) for option in data)
+
+
+def build_effects(effects):
+    """Turns option specs inside "options" and "if" effects into Option objects."""
+    built = []
+    for effect in effects:
+        if effect[0] == "options":
+            effect = ("options", build_options(effect[1]))
+        elif effect[0] == "if":
+            effect = ("if", effect[1]) + tuple(build_effects(branch) for branch in effect[2:])
+        built.append(tuple(effect))
+    return tuple(built)
+
+
+class SceneRegistry:
+    """Built-in menu scenes plus story scenes, loaded one era at a time on first lookup."""
+
+    def __init__(self, library, scenes=()):
+        self.library = library
+        self._scenes = {scene.state_id: scene for scene in scenes}
+        self._loaded_eras = set()
+
+    def get(self, state_id, default=None):
+        scene = self._scenes.get(state_id)
+        if scene is None:
+            era_id = self.library.era_for_state(state_id)
+            if era_id is not None and era_id not in self._loaded_eras:
+                self.load_era(era_id)
+                scene = self._scenes.get(state_id)
+        return scene if scene is not None else default
+
+    def __getitem__(self, state_id):
+        scene = self.get(state_id)
+        if scene is None:
+            raise KeyError(state_id)
+        return scene
+
+    def __contains__(self, state_id):
+        return self.get(state_id) is not None
+
+    def load_era(self, era_id):
+        self._loaded_eras.add(era_id)
+        for state_id, data in self.library.gui_scenes(era_id).items():
+            self._scenes[state_id] = Scene.from_data(state_id, data)
+
+    def state_ids(self):
+        """Every known state id; this loads all eras."""
+        for era_id in self.library.era_ids:
+            if era_id not in self._loaded_eras:
+                self.load_era(era_id)
+        return list(self._scenes)
+
+
+NARRATIVE_BUTTON_WIDTH = TEXT_BOX_RECT.width - 60
+NARRATIVE_LAYOUT = ButtonLayout(TEXT_BOX_RECT.left + (TEXT_BOX_RECT.width - NARRATIVE_BUTTON_WIDTH) // 2,
+                                OPTIONS_START_Y, NARRATIVE_BUTTON_WIDTH, BUTTON_HEIGHT, OPTION_SPACING, "option")
+MENU_BUTTON_WIDTH = 300
+MENU_START_Y = SCREEN_HEIGHT // 2 - 100
+MENU_SPACING = 70
+GAME_MENU_SPACING = 62 # Six buttons between the title and the instructions
+MAIN_MENU_LAYOUT = ButtonLayout(SCREEN_WIDTH // 2 - MENU_BUTTON_WIDTH // 2, MENU_START_Y,
+                                MENU_BUTTON_WIDTH, 50, MENU_SPACING, "main_menu")
+GAME_MENU_LAYOUT = ButtonLayout(SCREEN_WIDTH // 2 - MENU_BUTTON_WIDTH // 2, MENU_START_Y - GAME_MENU_SPACING,
+                                MENU_BUTTON_WIDTH, 50, GAME_MENU_SPACING, "menu")
+
+MENU_BACKGROUND_COLOR = (30, 30, 60)
+
+# Menus are part of the interface; story scenes come from story/<era>.json
+SCENES = SceneRegistry(StoryLibrary(), (
+    Scene("START_MENU",
+          options=(Option("Start New Game", "START_NEW_GAME"),
+                   Option("Load Game", "LOAD_GAME"),
+                   Option("Exit", "EXIT_GAME"),
+                   Option("Language: English", "SWITCH_LANGUAGE")),
+          actions={
+              "START_NEW_GAME": (("goto", "NAME_INPUT"),),
+              "EXIT_GAME": (("quit",),),
+              "LOAD_GAME": (("call", "load_game_data_pygame"),),
+              "SWITCH_LANGUAGE": (("call", "switch_language"),),
+          },
+          layout=MAIN_MENU_LAYOUT,
+          background=MENU_BACKGROUND_COLOR),
+
+    Scene("NAME_INPUT", on_enter=(("call", "begin_name_input"),), background=MENU_BACKGROUND_COLOR),
+
+    Scene("GAME_MENU", title="Game Paused",
+          options=(Option("Continue Game", "CONTINUE_GAME"),
+                   Option("Save Game", "SAVE_GAME"),
+                   Option("Load Game", "LOAD_GAME_MENU"),
+                   Option("Inventory", "OPEN_INVENTORY_MENU"),
+                   Option("Exit to Main Menu", "EXIT_TO_MAIN_MENU"),
+                   Option("Language: English", "SWITCH_LANGUAGE")),
+          actions={
+              "CONTINUE_GAME": (("call", "resume_game"),),
+              "SAVE_GAME": (("call", "save_game_data_pygame"),),
+              "LOAD_GAME_MENU": (("call", "load_game_data_pygame"),),
+              "OPEN_INVENTORY_MENU": (("call", "open_inventory_from_menu"),),
+              "EXIT_TO_MAIN_MENU": (("call", "exit_to_main_menu"),),
+              "SWITCH_LANGUAGE": (("call", "switch_language"),),
+          },
+          layout=GAME_MENU_LAYOUT,
+          background=(40, 40, 70)),
+
+    Scene("INVENTORY_VIEW", background=(50, 50, 70)),
+))
+
+# Screens that aren't story scenes, and the Game method composing each one's static layer
+SCREEN_LAYERS = {
+    "START_MENU": "compose_title_screen",
+    "NAME_INPUT": "compose_name_input_screen",
+    "INVENTORY_VIEW": "compose_inventory_screen",
+    "GAME_MENU": "compose_game_menu_screen",
+}
+
 # --- Game Class ---
 class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Nusantara Mission")
+    base_font = FontRole("base")
+    option_font = FontRole("option")
+    title_font = FontRole("title")
+    era_title_font = FontRole("era_title")
+    menu_font = FontRole("menu")
+
+    def __init__(self, headless=False, save_dir="", pacer=None, window_size=None, fullscreen=False,
+                 language=SOURCE_LOCALE):
+        # Headless games draw to an offscreen surface, so they run without a display
+        self.headless = headless
+        if headless:
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        init_pygame()
+        startup.mark("pygame init")
+        if headless:
+            self.screen = pygame.Surface(window_size or (SCREEN_WIDTH, SCREEN_HEIGHT))
+        else:
+            self.screen = open_window(window_size, fullscreen)
+        startup.mark("window")
+        self.view = Viewport(self.screen.get_size())
+        self.layers = LayerCache()
         self.clock = pygame.time.Clock()
+        self.pacer = pacer or FramePacer()
+        self.redraw = RedrawScheduler(pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)) # In canvas coordinates
+        self.hud = PerfHUD()
+        self.frame_blits = 0 # Blits to the screen in the last frame, for the HUD
+        self.save_worker = SaveWorker(os.path.join(save_dir, SAVE_FILE_NAME),
+                                      os.path.join(save_dir, LEGACY_SAVE_FILE_NAME))
+        self.recorder = None # Recorder that logs every input (--record)
         self.running = True
         self.player = None
         
         self.game_state = "START_MENU" 
         self.current_era_title = "" 
-        
-        try:
-            self.base_font = pygame.font.Font(FONT_NAME_PATH, DEFAULT_FONT_SIZE)
-            self.option_font = pygame.font.Font(FONT_NAME_PATH, OPTION_FONT_SIZE)
-            self.title_font = pygame.font.Font(FONT_NAME_PATH, TITLE_FONT_SIZE)
-            self.era_title_font = pygame.font.Font(FONT_NAME_PATH, ERA_TITLE_FONT_SIZE)
-            self.menu_font = pygame.font.Font(FONT_NAME_PATH, MENU_FONT_SIZE)
-        except Exception as e:
-            print(f"Font error: {e}. Using Pygame default font.")
-            self.base_font = pygame.font.Font(None, DEFAULT_FONT_SIZE + 6) 
-            self.option_font = pygame.font.Font(None, OPTION_FONT_SIZE + 4)
-            self.title_font = pygame.font.Font(None, TITLE_FONT_SIZE + 10)
-            self.era_title_font = pygame.font.Font(None, ERA_TITLE_FONT_SIZE + 6)
-            self.menu_font = pygame.font.Font(None, MENU_FONT_SIZE + 6)
-
-
-        self.current_narrative_text = ""
+        self.tr = LOCALES.translator(language) # Everything shown goes through it; see shared/l10n.py
+
+        self.option_button_style = ButtonStyle.get("option")
+        self.menu_button_style = ButtonStyle.get("menu")
+        self.main_menu_button_style = ButtonStyle.get("menu", border_radius=10)
+        self.button_styles = {
+            "option": self.option_button_style,
+            "menu": self.menu_button_style,
+            "main_menu": self.main_menu_button_style,
+        }
+        self._button_cache = {}
+        self.hover_stale = True
+        self.effects = SceneEffects(self, SCENES)
+
+        self._narrative_text = ""
+        self._narrative_source = "" # The narrative as written, before translation
+        self._narrative_layout = None
+        self._shown_options = None # The options and layout the current buttons were built from
         self.current_options_buttons = [] 
-        self.event_messages = [] 
+        self.toasts = ToastManager()
         
         self.input_text = "" 
         self.name_input_active = False
         self.previous_game_state = None 
 
-        self.background_colors = {
-            "START_MENU": (30, 30, 60), 
-            "NAME_INPUT": (30, 30, 60),
-            "GAME_MENU": (40, 40, 70),
-            "INTRO": (20, 40, 60), 
-            "INTRO_DETAILS": (20, 40, 60),
-            "MAJAPAHIT_MARKET": (139, 115, 85), 
-            "MAJAPAHIT_MERCHANT_TALK_ENVOY": (139, 115, 85), 
-            "MAJAPAHIT_MERCHANT_TALK_GAJAHMADA": (139, 115, 85), 
-            "MAJAPAHIT_MERCHANT_TALK_STRANGE": (139, 115, 85),
-            "MAJAPAHIT_PALACE_LIBRARY": (101, 67, 33), 
-            "MAJAPAHIT_LINGSAR_TEMPLE": (112, 128, 144), 
-            "MAJAPAHIT_OATH_SECURED": (255, 223, 186), 
-            "MAJAPAHIT_END_ERA": (50, 50, 80),
-            "COLONIAL_ERA_INTRO_PLACEHOLDER": (70,80,90), 
-            "INVENTORY_VIEW": (50, 50, 70),
-            "DEFAULT": BLACK
-        }
+        self.current_scene = None
+        self.report_startup = False # Print the startup report after the first frame (--startup-report)
         
         self.setup_state() 
+        startup.mark("first scene set up")
+
+    @property
+    def current_narrative_text(self):
+        return self._narrative_text
+
+    @current_narrative_text.setter
+    def current_narrative_text(self, text):
+        # Only a real change of text invalidates the wrapped layout
+        if text != self._narrative_text:
+            self._narrative_text = text
+            self._narrative_layout = None
+
+    @property
+    def narrative_layout(self):
+        if self._narrative_layout is None:
+            self._narrative_layout = text_layout.layout(self._narrative_text, self.base_font,
+                                                        self.view.rect(NARRATIVE_AREA_RECT).width,
+                                                        NARRATIVE_LINE_SPACING)
+        return self._narrative_layout
+
+    def set_view(self, view):
+        """Lays everything out again for a new window size or scale."""
+        self.view = view
+        self.layers.clear()
+        ButtonStyle.clear_sprites()
+        self._button_cache = {}
+        self._narrative_layout = None
+        self.current_options_buttons = [Button(*button.rect, button.text, button.style, button.action_tag, view)
+                                        for button in self.current_options_buttons]
+        self.hover_stale = True
+        self.redraw.invalidate()
+
+    def toggle_hud(self):
+        self.hud.toggle()
+        self.redraw.cancel("hud")
+        self.redraw.invalidate(self.hud.logical_rect(self.view))
+
+    def resize(self, size):
+        if min(size) <= 0 or tuple(size) == self.view.window_size:
+            return
+        # pygame resizes the display surface of a RESIZABLE window itself
+        self.screen = pygame.display.get_surface()
+        self.set_view(Viewport(self.screen.get_size()))
 
     def run(self):
         while self.running:
-            self.handle_events()
+            events = self.poll_events()
+            started = time.perf_counter()
+            self.handle_events(events)
+            handled = time.perf_counter()
             self.update()
-            self.draw()
-            self.clock.tick(60) 
+            updated = time.perf_counter()
+            now = time.time()
+            if self.redraw.dirty and self.pacer.can_draw(now):
+                self.draw()
+                if self.hud.visible:
+                    self.hud.record(handled - started, updated - handled, time.perf_counter() - updated,
+                                    text_cache.misses + self.layers.composed, self.frame_blits)
+                if tracer.enabled_for(tracing.DEBUG):
+                    tracer.debug("frame", events_ms=(handled - started) * 1000, update_ms=(updated - handled) * 1000,
+                                 draw_ms=(time.perf_counter() - updated) * 1000, blits=self.frame_blits)
+                self.pacer.frame_drawn(now)
+                self.clock.tick() # Only measures the frame rate; the pacer decides when frames happen
+                if not startup.finished:
+                    startup.finish()
+                    if self.report_startup:
+                        print(startup.format())
+        self.save_worker.close()
         pygame.quit()
 
-    def handle_events(self):
-        mouse_pos = pygame.mouse.get_pos()
-        for event in pygame.event.get():
+    def replay_state(self):
+        """The state a recording stores and a replay has to end in"""
+        return {"player": self.player.to_dict() if self.player else None, "game_state": self.game_state}
+
+    def replay(self, replay):
+        """Feeds a recording's inputs straight to apply_input, without the event loop or frame pacing."""
+        while self.running and not replay.finished:
+            self.apply_input(*replay.next_input())
+            # Saves and loads finish before the next input, as they did at human speed
+            self.save_worker.flush()
+            for event in pygame.event.get(SAVE_IO_EVENT):
+                self.on_save_io(event)
+        self.save_worker.close()
+
+    def poll_events(self):
+        # Sleep until input arrives or the pacer wants the next frame drawn
+        timeout = self.pacer.wait_timeout_ms(self.redraw, time.time())
+        if timeout == 0:
+            return pygame.event.get()
+        event = pygame.event.wait() if timeout is None else pygame.event.wait(timeout)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+
+    def handle_events(self, events=None):
+        if events is None:
+            events = self.poll_events()
+        mouse_pos = self.view.to_logical(pygame.mouse.get_pos())
+        hover_pos = mouse_pos if self.hover_stale else None
+        for event in events:
+            self.pacer.on_event(event)
+            if event.type == pygame.KEYDOWN and event.key == HUD_TOGGLE_KEY:
+                self.toggle_hud()
+                continue
             if event.type == pygame.QUIT:
                 self.running = False
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED):
+                self.redraw.invalidate()
+            elif event.type == pygame.VIDEORESIZE:
+                self.resize(event.size)
+            elif event.type == SAVE_IO_EVENT:
+                self.on_save_io(event)
             
             if self.name_input_active and event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_RETURN:
                     if self.input_text:
-                        self.player = Player(self.input_text.strip())
-                        self.name_input_active = False
-                        self.change_state("INTRO")
+                        self.apply_input("name", self.input_text.strip())
                 elif event.key == pygame.K_BACKSPACE:
                     self.input_text = self.input_text[:-1]
+                    self.redraw.invalidate(NAME_INPUT_BOX_RECT)
                 else:
                     if len(self.input_text) < 20: 
                          self.input_text += event.unicode
+                         self.redraw.invalidate(NAME_INPUT_BOX_RECT)
             
+            elif event.type == pygame.MOUSEMOTION:
+                hover_pos = self.view.to_logical(event.pos)
+
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1: 
                     for i, button in enumerate(self.current_options_buttons):
                         if button.check_click(mouse_pos):
-                            self.process_choice(i, button.action_tag) 
+                            self.apply_input("choice", i, button.action_tag)
                             break 
             
             elif event.type == pygame.KEYDOWN: 
-                if event.key == pygame.K_i and self.game_state not in ["START_MENU", "NAME_INPUT", "GAME_MENU"]:
-                    if self.game_state != "INVENTORY_VIEW" and self.player:
-                        self.previous_game_state = self.game_state 
-                        self.change_state("INVENTORY_VIEW")
-                    elif self.game_state == "INVENTORY_VIEW":
-                        if self.previous_game_state: 
-                            self.change_state(self.previous_game_state)
-                elif event.key == pygame.K_m and self.game_state not in ["START_MENU", "NAME_INPUT", "GAME_MENU"]:
-                     if self.player: 
-                        self.previous_game_state = self.game_state
-                        self.change_state("GAME_MENU")
-                elif event.key == pygame.K_ESCAPE and self.game_state == "GAME_MENU": 
-                    if self.previous_game_state:
-                        self.change_state(self.previous_game_state)
+                command = HOTKEY_COMMANDS.get(event.key)
+                if command:
+                    self.apply_input(command)
 
 
-        for button in self.current_options_buttons:
-            button.check_hover(mouse_pos)
+        # Buttons only change hover state when the mouse moves or the button set is replaced
+        if self.hover_stale:
+            hover_pos = self.view.to_logical(pygame.mouse.get_pos())
+            self.hover_stale = False
+        if hover_pos is not None:
+            for button in self.current_options_buttons:
+                if button.check_hover(hover_pos):
+                    self.redraw.invalidate(button.rect)
+
+    def apply_input(self, command, *args):
+        """Carries out one player input; every input goes through here so it can be recorded and replayed."""
+        if self.recorder is not None:
+            self.recorder.record([command, *args])
+        if command == "name":
+            self.player = Player(args[0])
+            self.name_input_active = False
+            self.change_state("INTRO")
+        elif command == "choice":
+            self.process_choice(*args)
+        elif command == "jump":
+            import story_graph # Only needed for --start-at, which also needs every era loaded
+            story_graph.fast_forward(self, *args)
+        elif command == "inventory" and self.game_state not in ["START_MENU", "NAME_INPUT", "GAME_MENU"]:
+            if self.game_state != "INVENTORY_VIEW" and self.player:
+                self.previous_game_state = self.game_state 
+                self.change_state("INVENTORY_VIEW")
+            elif self.game_state == "INVENTORY_VIEW":
+                if self.previous_game_state: 
+                    self.change_state(self.previous_game_state)
+        elif command == "menu" and self.game_state not in ["START_MENU", "NAME_INPUT", "GAME_MENU"]:
+             if self.player: 
+                self.previous_game_state = self.game_state
+                self.change_state("GAME_MENU")
+        elif command == "back" and self.game_state == "GAME_MENU": 
+            if self.previous_game_state:
+                self.change_state(self.previous_game_state)
 
     def update(self):
-        pass
+        now = time.time()
+        self.redraw.poll_timers(now)
+        if self.name_input_active and self.game_state == "NAME_INPUT" and self.pacer.focused:
+            if not self.redraw.has_timer("cursor"):
+                next_blink = (int(now / CURSOR_BLINK_INTERVAL) + 1) * CURSOR_BLINK_INTERVAL
+                self.redraw.invalidate_at("cursor", next_blink, NAME_INPUT_BOX_RECT)
+        else:
+            self.redraw.cancel("cursor")
+        if self.hud.visible and not self.redraw.has_timer("hud"):
+            self.redraw.invalidate_at("hud", now + HUD_REFRESH_INTERVAL, self.hud.logical_rect(self.view))
+        # Toasts outlive state changes and go when their time is up
+        if self.toasts.expire(now):
+            self.redraw.invalidate(EVENT_MSG_AREA_RECT)
+        next_toast_change = self.toasts.next_change(now)
+        if next_toast_change is None:
+            self.redraw.cancel("toasts")
+        else:
+            self.redraw.invalidate_at("toasts", next_toast_change, EVENT_MSG_AREA_RECT)
 
     def draw(self):
-        bg_color = self.background_colors.get(self.game_state, self.background_colors["DEFAULT"])
-        self.screen.fill(bg_color)
-
-        if self.game_state == "START_MENU":
-            self.draw_title_screen("Nusantara Mission")
-        elif self.game_state == "NAME_INPUT":
-            self.draw_name_input_screen()
-        elif self.game_state == "INVENTORY_VIEW":
-            self.draw_inventory_screen()
-        elif self.game_state == "GAME_MENU":
-            self.draw_game_menu_screen()
-        else: 
-            if self.current_era_title:
-                era_title_surf = self.era_title_font.render(self.current_era_title, True, ERA_TITLE_COLOR)
-                era_title_rect = era_title_surf.get_rect(centerx=SCREEN_WIDTH // 2, y= TEXT_BOX_RECT.top - self.era_title_font.get_height() - 20) 
-                self.screen.blit(era_title_surf, era_title_rect)
-
-            pygame.draw.rect(self.screen, TEXT_BOX_COLOR, TEXT_BOX_RECT, 0, 15) 
-            pygame.draw.rect(self.screen, TEXT_BOX_BORDER_COLOR, TEXT_BOX_RECT, 3, 15) 
-           
-            render_text_wrapped(self.screen, self.current_narrative_text, self.base_font, NARRATIVE_TEXT_COLOR, NARRATIVE_AREA_RECT, line_spacing_modifier=1.1)
-
-            for button in self.current_options_buttons:
-                button.draw(self.screen)
-            
-            if self.event_messages:
-                msg_y = TEXT_BOX_RECT.top - 28 * len(self.event_messages) - 15 
-                for msg_index, msg in enumerate(self.event_messages):
-                    msg_bg_rect = pygame.Rect(0,0,0,0) 
-                    temp_surf = self.option_font.render(msg, True, EVENT_MSG_COLOR)
-                    msg_bg_rect.size = (temp_surf.get_width() + 20, temp_surf.get_height() + 10)
-                    msg_bg_rect.centerx = SCREEN_WIDTH // 2
-                    msg_bg_rect.y = msg_y + (msg_index * 28)
-                    
-                    pygame.draw.rect(self.screen, DARK_GREY, msg_bg_rect, 0, 5) 
-                    msg_surf = self.option_font.render(msg, True, EVENT_MSG_COLOR) 
-                    msg_rect = msg_surf.get_rect(center=msg_bg_rect.center)
-                    self.screen.blit(msg_surf, msg_rect)
-
-
-        pygame.display.flip()
-
-    def draw_title_screen(self, title):
-        title_surf = self.title_font.render(title, True, TITLE_TEXT_COLOR)
-        title_rect = title_surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 3 - 30))
-        self.screen.blit(title_surf, title_rect)
-
-        subtitle_surf = self.option_font.render("A Pygame Text Adventure", True, GREY)
-        subtitle_rect = subtitle_surf.get_rect(center=(SCREEN_WIDTH // 2, title_rect.bottom + 20))
-        self.screen.blit(subtitle_surf, subtitle_rect)
-
+        view = self.view
+        logical_rects = self.redraw.take()
+        dirty_rects = [view.rect(rect) for rect in logical_rects]
+        if view.letterboxed and logical_rects[0] == self.redraw.screen_rect:
+            # A full redraw also repaints the bars around the canvas
+            self.screen.fill(LETTERBOX_COLOR)
+            dirty_rects = [self.screen.get_rect()]
+        self.screen.set_clip(dirty_rects[0].unionall(dirty_rects[1:]))
+
+        layer_key = self.layer_key()
+        self.screen.blit(self.layers.get(layer_key, view.size, lambda layer: self.compose_layer(layer, layer_key)),
+                         view.offset)
+        blits = 1
         for button in self.current_options_buttons:
-            button.draw(self.screen)
-            
-    def draw_name_input_screen(self):
-        prompt_surf = self.base_font.render("Enter your hero's name:", True, WHITE)
-        prompt_rect = prompt_surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 60))
-        self.screen.blit(prompt_surf, prompt_rect)
+            if button.is_hovered:
+                layer_rect = button.screen_rect.move(-view.offset[0], -view.offset[1])
+                self.screen.blit(self.layers.overlay(layer_key, layer_rect, button.hover_sprite), button.screen_rect)
+                blits += 1
 
-        input_box_rect = pygame.Rect(SCREEN_WIDTH // 2 - 180, SCREEN_HEIGHT // 2 - 20, 360, 50)
-        pygame.draw.rect(self.screen, LIGHT_GREY, input_box_rect, 0, 8)
-        pygame.draw.rect(self.screen, WHITE, input_box_rect, 2, 8)
-
-        text_surf = self.base_font.render(self.input_text, True, BLACK)
-        text_rect = text_surf.get_rect(midleft=(input_box_rect.left + 15, input_box_rect.centery))
+        if self.game_state == "NAME_INPUT":
+            blits += self.draw_name_input()
+        elif self.game_state == "INVENTORY_VIEW":
+            blits += self.draw_inventory_items()
+
+        if self.toasts and self.game_state not in SCREEN_LAYERS:
+            blits += self.toasts.draw(self.screen, view, TEXT_BOX_RECT.top, time.time())
+
+        if self.hud.visible:
+            self.hud.draw(self.screen, self, time.time())
+            blits += 1
+        self.frame_blits = blits
+
+        self.screen.set_clip(None)
+        self.present(dirty_rects)
+
+    def present(self, rects):
+        if not self.headless:
+            pygame.display.update(rects)
+
+    def layer_key(self):
+        """What the static layer of this screen shows: everything that only changes with the screen itself"""
+        bg_color = self.current_scene.background if self.current_scene else DEFAULT_BACKGROUND_COLOR
+        buttons = tuple(self.current_options_buttons)
+        if self.game_state in SCREEN_LAYERS:
+            return (self.game_state, bg_color, buttons, self.tr.locale)
+        return ("STORY", bg_color, buttons, self.current_era_title, self.current_narrative_text)
+
+    def compose_layer(self, layer, key):
+        view = self.view.canvas()
+        layer.fill(key[1])
+        if key[0] == "STORY":
+            self.compose_story_screen(layer, view)
+        else:
+            getattr(self, SCREEN_LAYERS[key[0]])(layer, view)
+        # Buttons go in the layer as they look unhovered; draw() covers a hovered one with its overlay
+        for button in key[2]:
+            layer.blit(button.base_sprite, button.screen_rect.move(-self.view.offset[0], -self.view.offset[1]))
+
+    def compose_story_screen(self, layer, view):
+        text_box_rect = view.rect(TEXT_BOX_RECT)
+        if self.current_era_title:
+            era_title_surf = render_text(self.era_title_font, self.current_era_title, ERA_TITLE_COLOR)
+            era_title_rect = era_title_surf.get_rect(centerx=view.x(SCREEN_WIDTH // 2),
+                                                     y=text_box_rect.top - self.era_title_font.get_height() - view.length(20))
+            layer.blit(era_title_surf, era_title_rect)
+
+        pygame.draw.rect(layer, TEXT_BOX_COLOR, text_box_rect, 0, view.length(15))
+        pygame.draw.rect(layer, TEXT_BOX_BORDER_COLOR, text_box_rect, view.length(3), view.length(15))
+
+        draw_wrapped_text(layer, self.narrative_layout, self.base_font, NARRATIVE_TEXT_COLOR, view.rect(NARRATIVE_AREA_RECT))
+
+    def compose_title_screen(self, layer, view):
+        title_surf = render_text(self.title_font, self.tr("Nusantara Mission"), TITLE_TEXT_COLOR)
+        title_rect = title_surf.get_rect(center=view.point((SCREEN_WIDTH // 2, SCREEN_HEIGHT // 3 - 30)))
+        layer.blit(title_surf, title_rect)
+
+        subtitle_surf = render_text(self.option_font, self.tr("A Pygame Text Adventure"), GREY)
+        subtitle_rect = subtitle_surf.get_rect(center=(view.x(SCREEN_WIDTH // 2), title_rect.bottom + view.length(20)))
+        layer.blit(subtitle_surf, subtitle_rect)
+
+    def compose_name_input_screen(self, layer, view):
+        prompt_surf = render_text(self.base_font, self.tr("Enter your hero's name:"), WHITE)
+        prompt_rect = prompt_surf.get_rect(center=view.point((SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 60)))
+        layer.blit(prompt_surf, prompt_rect)
+
+        input_box_rect = view.rect(NAME_INPUT_BOX_RECT)
+        pygame.draw.rect(layer, LIGHT_GREY, input_box_rect, 0, view.length(8))
+        pygame.draw.rect(layer, WHITE, input_box_rect, view.length(2), view.length(8))
+
+        instr_surf = render_text(self.option_font, self.tr("Press ENTER to continue"), GREY)
+        instr_rect = instr_surf.get_rect(center=view.point((SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 60)))
+        layer.blit(instr_surf, instr_rect)
+
+    def draw_name_input(self):
+        """Draws the name typed so far and the cursor; returns the number of blits."""
+        view = self.view
+        input_box_rect = view.rect(NAME_INPUT_BOX_RECT)
+        text_surf = render_text(self.base_font, self.input_text, BLACK)
+        text_rect = text_surf.get_rect(midleft=(input_box_rect.left + view.length(15), input_box_rect.centery))
         self.screen.blit(text_surf, text_rect)
         
         if time.time() % 1 > 0.5 and self.name_input_active:
-            cursor_x = text_rect.right + 5 if self.input_text else input_box_rect.left + 15
-            cursor_rect = pygame.Rect(cursor_x, input_box_rect.top + 10, 3, input_box_rect.height - 20)
+            cursor_x = text_rect.right + view.length(5) if self.input_text else input_box_rect.left + view.length(15)
+            cursor_rect = pygame.Rect(cursor_x, input_box_rect.top + view.length(10),
+                                      view.length(3), input_box_rect.height - view.length(20))
             pygame.draw.rect(self.screen, DARK_GREY, cursor_rect)
+        return 1
+
+    def inventory_title(self, view):
+        title_surf = render_text(self.title_font, self.tr("Inventory"), TITLE_TEXT_COLOR)
+        return title_surf, title_surf.get_rect(center=view.point((SCREEN_WIDTH // 2, 80)))
 
-        instr_surf = self.option_font.render("Press ENTER to continue", True, GREY)
-        instr_rect = instr_surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 60))
-        self.screen.blit(instr_surf, instr_rect)
+    def compose_inventory_screen(self, layer, view):
+        layer.blit(*self.inventory_title(view))
 
-    def draw_inventory_screen(self):
-        title_surf = self.title_font.render("Inventory", True, TITLE_TEXT_COLOR)
-        title_rect = title_surf.get_rect(center=(SCREEN_WIDTH // 2, 80))
-        self.screen.blit(title_surf, title_rect)
+        instr_surf = render_text(self.option_font, self.tr("Press 'I' to close or ESC from Game Menu"), GREY)
+        instr_rect = instr_surf.get_rect(center=view.point((SCREEN_WIDTH // 2, SCREEN_HEIGHT - 60)))
+        layer.blit(instr_surf, instr_rect)
 
-        items = self.player.get_inventory_display()
-        item_y = title_rect.bottom + 40
+    def draw_inventory_items(self):
+        """Draws one line per item; returns the number of blits."""
+        view = self.view
+        items = self.player.get_inventory_display(self.tr)
+        item_y = self.inventory_title(view)[1].bottom + view.length(40)
         for item_text in items:
-            item_surf = self.base_font.render(item_text, True, WHITE)
-            item_rect = item_surf.get_rect(x=100, y=item_y) 
-            self.screen.blit(item_surf, item_rect)
-            item_y += self.base_font.get_height() + 10
-        
-        for button in self.current_options_buttons: 
-            button.draw(self.screen)
+            item_surf = render_text(self.base_font, item_text, WHITE)
+            self.screen.blit(item_surf, item_surf.get_rect(x=view.x(100), y=item_y))
+            item_y += self.base_font.get_height() + view.length(10)
+        return len(items)
         
-        instr_surf = self.option_font.render("Press 'I' to close or ESC from Game Menu", True, GREY)
-        instr_rect = instr_surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 60))
-        self.screen.blit(instr_surf, instr_rect)
-        
-    def draw_game_menu_screen(self):
-        title_surf = self.title_font.render("Game Menu", True, TITLE_TEXT_COLOR)
-        title_rect = title_surf.get_rect(center=(SCREEN_WIDTH // 2, 100))
-        self.screen.blit(title_surf, title_rect)
+    def compose_game_menu_screen(self, layer, view):
+        title_surf = render_text(self.title_font, self.tr("Game Menu"), TITLE_TEXT_COLOR)
+        title_rect = title_surf.get_rect(center=view.point((SCREEN_WIDTH // 2, 100)))
+        layer.blit(title_surf, title_rect)
 
-        for button in self.current_options_buttons:
-            button.draw(self.screen)
-        
-        instr_surf = self.option_font.render("Press 'M' or ESC to return to game", True, GREY)
-        instr_rect = instr_surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 60))
-        self.screen.blit(instr_surf, instr_rect)
+        instr_surf = render_text(self.option_font, self.tr("Press 'M' or ESC to return to game"), GREY)
+        instr_rect = instr_surf.get_rect(center=view.point((SCREEN_WIDTH // 2, SCREEN_HEIGHT - 60)))
+        layer.blit(instr_surf, instr_rect)
 
 
     def add_event_message(self, message):
-        self.event_messages.append(message)
+        self.toasts.push(message, time.time())
+        self.redraw.invalidate(EVENT_MSG_AREA_RECT)
 
     def clear_event_messages(self):
-        self.event_messages = []
+        if self.toasts:
+            self.redraw.invalidate(EVENT_MSG_AREA_RECT)
+        self.toasts.clear()
 
-    def change_state(self, new_state):
-        print(f"Changing state from {self.game_state} to {new_state}") 
+    def change_state(self, new_state, run_on_enter=True):
+        old_state = self.game_state
         self.game_state = new_state
-        self.clear_event_messages() 
-        self.setup_state() 
-
-    def setup_state(self):
-        self.current_options_buttons = [] 
-        button_width_narrative = TEXT_BOX_RECT.width - 60 
-        button_height_narrative = BUTTON_HEIGHT
-        button_x_narrative = TEXT_BOX_RECT.left + (TEXT_BOX_RECT.width - button_width_narrative) // 2
-        
-        button_width_menu = 300
-        button_height_menu = 50
-        button_x_menu = SCREEN_WIDTH // 2 - button_width_menu // 2
-        menu_start_y = SCREEN_HEIGHT // 2 - 100
-        menu_spacing = 70
-
-        self.current_era_title = "" 
-
-        if self.game_state == "START_MENU":
-            self.current_narrative_text = "" 
-            self.current_options_buttons = [
-                Button(button_x_menu, menu_start_y, button_width_menu, button_height_menu, "Start New Game", self.menu_font, border_radius=10, action_tag="START_NEW_GAME"),
-                Button(button_x_menu, menu_start_y + menu_spacing, button_width_menu, button_height_menu, "Load Game", self.menu_font, border_radius=10, action_tag="LOAD_GAME"),
-                Button(button_x_menu, menu_start_y + menu_spacing * 2, button_width_menu, button_height_menu, "Exit", self.menu_font, border_radius=10, action_tag="EXIT_GAME"),
-            ]
-        elif self.game_state == "NAME_INPUT":
-            self.current_narrative_text = ""
-            self.input_text = ""
-            self.name_input_active = True
-        
-        elif self.game_state == "GAME_MENU":
-            self.current_narrative_text = ""
-            self.current_era_title = "Game Paused"
-            self.current_options_buttons = [
-                Button(button_x_menu, menu_start_y - menu_spacing, button_width_menu, button_height_menu, "Continue Game", self.menu_font, action_tag="CONTINUE_GAME"),
-                Button(button_x_menu, menu_start_y, button_width_menu, button_height_menu, "Save Game", self.menu_font, action_tag="SAVE_GAME"),
-                Button(button_x_menu, menu_start_y + menu_spacing, button_width_menu, button_height_menu, "Load Game", self.menu_font, action_tag="LOAD_GAME_MENU"),
-                Button(button_x_menu, menu_start_y + menu_spacing*2, button_width_menu, button_height_menu, "Inventory", self.menu_font, action_tag="OPEN_INVENTORY_MENU"),
-                Button(button_x_menu, menu_start_y + menu_spacing*3, button_width_menu, button_height_menu, "Exit to Main Menu", self.menu_font, action_tag="EXIT_TO_MAIN_MENU"),
-            ]
-
-        elif self.game_state == "INTRO":
-            self.current_era_title = "The Beginning: Year 2150"
-            self.current_narrative_text = (f"Professor Wijaya: \"{self.player.name}, you are our last hope. This time machine will take you "
-                                           f"to various important eras in Indonesian history.\n\n"
-                                           f"Your duty is to ensure history stays on its intended path.\"")
-            self.current_options_buttons = [
-                Button(button_x_narrative, OPTIONS_START_Y, button_width_narrative, button_height_narrative, "Ask for more details.", self.option_font),
-                Button(button_x_narrative, OPTIONS_START_Y + OPTION_SPACING, button_width_narrative, button_height_narrative, "Ready to go to Majapahit!", self.option_font),
-            ]
-        
-        elif self.game_state == "INTRO_DETAILS":
-            self.current_era_title = "The Mission Briefing"
-            self.current_narrative_text = ("Professor Wijaya: \"The Time Corruptors want to change Indonesian history "
-                                           "so that our nation never unites. They have sent agents "
-                                           "to various important eras to alter key events.\n\n"
-                                           "Your task is to find these agents, thwart their plans, "
-                                           "and ensure history remains on track.\"")
-            self.current_options_buttons = [
-                Button(button_x_narrative, OPTIONS_START_Y, button_width_narrative, button_height_narrative, "Understood. Let's go!", self.option_font),
-            ]
-
-        elif self.game_state == "MAJAPAHIT_MARKET":
-            self.current_era_title = "Majapahit Kingdom - Year 1350: The Market"
-            self.current_narrative_text = ("You arrive in a bustling market. The air is filled with the scent of spices.\n\n"
-                                           "MISSION: Ensure Gajah Mada still utters the Palapa Oath.\n\n"
-                                           "An old merchant approaches you: \"You're not from around here, young one. Your clothes are strange.\"")
-            self.current_options_buttons = [
-                Button(button_x_narrative, OPTIONS_START_Y, button_width_narrative, button_height_narrative, "Say you are an envoy.", self.option_font, action_tag="MAJAPAHIT_ENVOY"),
-                Button(button_x_narrative, OPTIONS_START_Y + OPTION_SPACING, button_width_narrative, button_height_narrative, "Ask about Gajah Mada.", self.option_font, action_tag="MAJAPAHIT_ASK_GM"),
-                Button(button_x_narrative, OPTIONS_START_Y + OPTION_SPACING * 2, button_width_narrative, button_height_narrative, "Inquire about strange occurrences.", self.option_font, action_tag="MAJAPAHIT_STRANGE"),
-            ]
-        
-        elif self.game_state == "MAJAPAHIT_MERCHANT_TALK_ENVOY": 
-            self.current_era_title = "Majapahit: Talking to Merchant"
-            self.current_narrative_text = ("You: \"I am an envoy from a distant kingdom...\"\n\n"
-                                           "Merchant: \"Hmm, suspicious... Go to the palace. Security is tight.\"\n\n"
-                                           "The merchant gives you a batik cloth.")
-            self.current_options_buttons = [
-                Button(button_x_narrative, OPTIONS_START_Y, button_width_narrative, button_height_narrative, "Go to the Palace (WIP)", self.option_font, action_tag="GO_PALACE_WIP"),
-                Button(button_x_narrative, OPTIONS_START_Y + OPTION_SPACING, button_width_narrative, button_height_narrative, "Return to Market Square", self.option_font, action_tag="RETURN_MARKET_SQUARE"),
-            ]
-
-        elif self.game_state == "MAJAPAHIT_MERCHANT_TALK_GAJAHMADA":
-            self.current_era_title = "Majapahit: Talking to Merchant"
-            self.current_narrative_text = ("You: \"I wish to know about Gajah Mada...\"\n\n"
-                                           "Merchant: \"Gajah Mada? He is in great trouble. "
-                                           "Someone has poisoned his mind... He is at Lingsar Temple.\"")
-            self.current_options_buttons = [
-                Button(button_x_narrative, OPTIONS_START_Y, button_width_narrative, button_height_narrative, "Go to Lingsar Temple", self.option_font, action_tag="GO_LINGSAR_TEMPLE"),
-                Button(button_x_narrative, OPTIONS_START_Y + OPTION_SPACING, button_width_narrative, button_height_narrative, "Ask more (WIP)", self.option_font, action_tag="ASK_MORE_POISON_WIP"),
-                Button(button_x_narrative, OPTIONS_START_Y + OPTION_SPACING * 2, button_width_narrative, button_height_narrative, "Return to Market Square", self.option_font, action_tag="RETURN_MARKET_SQUARE"),
-            ]
-
-        elif self.game_state == "MAJAPAHIT_MERCHANT_TALK_STRANGE":
-            self.current_era_title = "Majapahit: Talking to Merchant"
-            self.current_narrative_text = ("You: \"Have there been any strange occurrences lately?\"\n\n"
-                                           "Merchant: \"Indeed! A strangely dressed foreigner arrived... "
-                                           "Mahapatih doubts his plan to unite Nusantara. Seek Empu Tantular...\"")
-            self.current_options_buttons = [
-                Button(button_x_narrative, OPTIONS_START_Y, button_width_narrative, button_height_narrative, "Go to the Palace Library", self.option_font, action_tag="GO_PALACE_LIBRARY"),
-                Button(button_x_narrative, OPTIONS_START_Y + OPTION_SPACING, button_width_narrative, button_height_narrative, "Ask about the foreigner (WIP)", self.option_font, action_tag="ASK_FOREIGNER_WIP"),
-                Button(button_x_narrative, OPTIONS_START_Y + OPTION_SPACING * 2, button_width_narrative, button_height_narrative, "Return to Market Square", self.option_font, action_tag="RETURN_MARKET_SQUARE"),
-            ]
-        
-        elif self.game_state == "MAJAPAHIT_PALACE_LIBRARY":
-            self.current_era_title = "Majapahit: Palace Library"
-            if not self.player.choices.get("met_empu_tantular"):
-                self.current_narrative_text = ("You find Empu Tantular amidst scrolls and books.\n\n"
-                                               "Empu Tantular: \"Greetings, traveler. Your attire is unusual. What brings you to this sanctuary of knowledge?\"")
-                self.current_options_buttons = [
-                    Button(button_x_narrative, OPTIONS_START_Y, button_width_narrative, button_height_narrative, "Discuss the foreigner.", self.option_font, action_tag="DISCUSS_FOREIGNER_ET"),
-                    Button(button_x_narrative, OPTIONS_START_Y + OPTION_SPACING, button_width_narrative, button_height_narrative, "Ask about Gajah Mada's doubt.", self.option_font, action_tag="ASK_GM_DOUBT_ET"),
-                ]
-            else: 
-                 self.current_narrative_text = "Empu Tantular nods thoughtfully. The weight of the situation is clear on his face."
-                 self.current_options_buttons = [
-                    Button(button_x_narrative, OPTIONS_START_Y, button_width_narrative, button_height_narrative, "Leave the Library", self.option_font, action_tag="LEAVE_LIBRARY"),
-                 ]
-
-
-        elif self.game_state == "MAJAPAHIT_LINGSAR_TEMPLE":
-            self.current_era_title = "Majapahit: Lingsar Temple"
-            self.current_narrative_text = ("The air at Lingsar Temple is serene, yet a palpable tension surrounds Gajah Mada, who is in deep meditation. "
-                                           "A shadowy figure in unusual garb lurks nearby, pretending to be an attendant.")
-            
-            options_at_temple = []
-            # Logic to show "Approach Gajah Mada" only if conditions are met or it's a general option
-            options_at_temple.append(Button(button_x_narrative, OPTIONS_START_Y + OPTION_SPACING * len(options_at_temple), button_width_narrative, button_height_narrative, "Approach Gajah Mada directly.", self.option_font, action_tag="APPROACH_GM"))
-            
-            if not self.player.choices.get("corruptor_fled_lingsar"): 
-                options_at_temple.append(Button(button_x_narrative, OPTIONS_START_Y + OPTION_SPACING * len(options_at_temple), button_width_narrative, button_height_narrative, "Confront the shadowy figure.", self.option_font, action_tag="CONFRONT_FIGURE"))
-            
-            options_at_temple.append(Button(button_x_narrative, OPTIONS_START_Y + OPTION_SPACING * len(options_at_temple), button_width_narrative, button_height_narrative, "Return to market for more info.", self.option_font, action_tag="RETURN_MARKET_FROM_TEMPLE"))
-            self.current_options_buttons = options_at_temple
-            
-        elif self.game_state == "MAJAPAHIT_OATH_SECURED":
-            self.current_era_title = "Majapahit: Mission Accomplished!"
-            self.current_narrative_text = ("Through your efforts, Gajah Mada's resolve is restored! " 
-                                           "He confidently prepares to declare the Palapa Oath, ensuring the unity of Nusantara.\n\n"
-                                           "The Time Corruptor's plan has failed here!\n\n"
-                                           "A shimmering fragment materializes before you.")
-            if self.player and "Palapa Keystone Fragment" not in self.player.inventory: 
-                self.player.add_item("Palapa Keystone Fragment", self)
-            self.current_options_buttons = [
-                 Button(button_x_narrative, OPTIONS_START_Y, button_width_narrative, button_height_narrative, "Prepare for next era", self.option_font, action_tag="END_MAJAPAHIT_ERA"),
-            ]
-
-        elif self.game_state == "MAJAPAHIT_END_ERA":
-            self.current_era_title = "Chronometer Activated"
-            self.current_narrative_text = "Your Time Chronometer glows, indicating the timeline is stable. New coordinates are locked for the Colonial Era."
-            self.current_options_buttons = [
-                 Button(button_x_narrative, OPTIONS_START_Y, button_width_narrative, button_height_narrative, "Travel to Colonial Era", self.option_font, action_tag="GOTO_COLONIAL"),
-            ]
-            
-        elif self.game_state == "COLONIAL_ERA_INTRO_PLACEHOLDER":
-            self.current_era_title = "Dutch Colonial Era - Batavia (WIP)"
-            self.current_narrative_text = "You arrive in Batavia, 1830. The air is thick with humidity and the scent of spices and sea salt. Dutch colonial power is at its height. (Story to be continued...)"
-            self.current_options_buttons = [
-                 Button(button_x_narrative, OPTIONS_START_Y, button_width_narrative, button_height_narrative, "End Game Demo", self.option_font, action_tag="END_DEMO"),
-            ]
-
-
-        elif self.game_state == "INVENTORY_VIEW":
-            self.current_narrative_text = "" 
-            self.current_options_buttons = [] 
+        started = time.perf_counter()
+        try:
+            self.setup_state(run_on_enter)
+        finally:
+            # Recorded even when setup fails, so a crash dump ends with the transition that caused it
+            tracer.info("state.change", from_state=old_state, to_state=new_state,
+                        ms=(time.perf_counter() - started) * 1000)
+
+    def setup_state(self, run_on_enter=True):
+        self.redraw.invalidate()
+        self.hover_stale = True
+        scene = SCENES.get(self.game_state)
+        self.current_scene = scene
+        if scene is None:
+            self.current_era_title = ""
+            self.show_narrative("")
+            self.current_options_buttons = []
+            self._shown_options = None
+            return
 
+        self.current_era_title = self.tr(scene.title)
+        narrative, options = scene.resolve(self.player)
+        self.show_narrative(narrative)
+        self.show_options(options, scene.layout)
+        if run_on_enter:
+            self.effects.run(scene.on_enter)
+
+    def show_narrative(self, text):
+        self._narrative_source = text
+        text = self.tr(text)
+        if self.player:
+            text = text.replace("{name}", self.player.name)
+        self.current_narrative_text = text
+
+    def show_options(self, options, layout=None):
+        """Builds buttons for the visible options, reusing the ones laid out last time."""
+        layout = layout or NARRATIVE_LAYOUT
+        self._shown_options = (options, layout)
+        visible = visible_options(options, self.player)
+        key = (layout, visible)
+        buttons = self._button_cache.get(key)
+        if buttons is None:
+            style = self.button_styles[layout.style]
+            buttons = [Button(*layout.slot(i), self.tr(option.text), style, option.action_tag, self.view)
+                       for i, option in enumerate(visible)]
+            self._button_cache[key] = buttons
+        for button in buttons:
+            button.is_hovered = False
+        self.current_options_buttons = buttons
+        self.hover_stale = True
 
     def process_choice(self, index, action_tag):
-        print(f"State: {self.game_state}, Action Tag: {action_tag}") 
-        self.clear_event_messages() 
-        
-        button_width_narrative = TEXT_BOX_RECT.width - 60 
-        button_x_narrative = TEXT_BOX_RECT.left + (TEXT_BOX_RECT.width - button_width_narrative) // 2
-
-        if self.game_state == "START_MENU":
-            if action_tag == "START_NEW_GAME":
-                self.change_state("NAME_INPUT")
-            elif action_tag == "EXIT_GAME":
-                self.running = False
-            elif action_tag == "LOAD_GAME":
-                self.load_game_data_pygame()
-
-
-        elif self.game_state == "GAME_MENU":
-            if action_tag == "CONTINUE_GAME":
-                if self.previous_game_state:
-                    self.change_state(self.previous_game_state)
-            elif action_tag == "SAVE_GAME":
-                self.save_game_data_pygame()
-            elif action_tag == "LOAD_GAME_MENU":
-                self.load_game_data_pygame()
-            elif action_tag == "OPEN_INVENTORY_MENU":
-                self.state_before_inventory_from_menu = self.previous_game_state 
-                self.previous_game_state = self.game_state 
-                self.change_state("INVENTORY_VIEW")
-            elif action_tag == "EXIT_TO_MAIN_MENU":
-                self.player = None 
-                self.change_state("START_MENU")
-
-
-        elif self.game_state == "INTRO":
-            if action_tag == "Ask for more details.":
-                self.change_state("INTRO_DETAILS")
-            elif action_tag == "Ready to go to Majapahit!":
-                self.change_state("MAJAPAHIT_MARKET")
-        
-        elif self.game_state == "INTRO_DETAILS":
-            if action_tag == "Understood. Let's go!":
-                self.change_state("MAJAPAHIT_MARKET")
-
-        elif self.game_state == "MAJAPAHIT_MARKET":
-            if action_tag == "MAJAPAHIT_ENVOY":
-                if self.player: self.player.add_item("Majapahit Batik Cloth", self) 
-                self.change_state("MAJAPAHIT_MERCHANT_TALK_ENVOY") 
-            elif action_tag == "MAJAPAHIT_ASK_GM":
-                self.change_state("MAJAPAHIT_MERCHANT_TALK_GAJAHMADA")
-            elif action_tag == "MAJAPAHIT_STRANGE":
-                self.change_state("MAJAPAHIT_MERCHANT_TALK_STRANGE")
-        
-        elif self.game_state == "MAJAPAHIT_MERCHANT_TALK_ENVOY":
-            if action_tag == "GO_PALACE_WIP":
-                self.current_narrative_text = "You decide to head to the palace. The guards are stern, but the batik cloth seems to grant you some passage. (Palace interactions WIP)"
-                self.current_options_buttons = [Button(button_x_narrative, OPTIONS_START_Y, button_width_narrative, BUTTON_HEIGHT, "Return to Market Square", self.option_font, action_tag="RETURN_MARKET_SQUARE")]
-            elif action_tag == "EXPLORE_MARKET_AGAIN" or action_tag == "RETURN_MARKET_SQUARE": 
-                self.change_state("MAJAPAHIT_MARKET")
-        
-        elif self.game_state == "MAJAPAHIT_MERCHANT_TALK_GAJAHMADA":
-            if action_tag == "GO_LINGSAR_TEMPLE":
-                self.change_state("MAJAPAHIT_LINGSAR_TEMPLE")
-            elif action_tag == "ASK_MORE_POISON_WIP":
-                self.current_narrative_text = "Merchant: \"The details are murky, whispers in the wind... but his spirit seems clouded. Some say a foreign advisor has his ear.\" (WIP)"
-                self.current_options_buttons = [Button(button_x_narrative, OPTIONS_START_Y, button_width_narrative, BUTTON_HEIGHT, "Go to Lingsar Temple", self.option_font, action_tag="GO_LINGSAR_TEMPLE")]
-            elif action_tag == "RETURN_MARKET_SQUARE": 
-                self.change_state("MAJAPAHIT_MARKET")
-
-
-        elif self.game_state == "MAJAPAHIT_MERCHANT_TALK_STRANGE":
-            if action_tag == "GO_PALACE_LIBRARY":
-                self.change_state("MAJAPAHIT_PALACE_LIBRARY")
-            elif action_tag == "ASK_FOREIGNER_WIP":
-                self.current_narrative_text = "Merchant: \"He spoke with a strange accent, and his clothes... not of any land I know. He vanished as quickly as he came after speaking to some officials.\" (WIP)"
-                self.current_options_buttons = [Button(button_x_narrative, OPTIONS_START_Y, button_width_narrative, BUTTON_HEIGHT, "Go to Palace Library", self.option_font, action_tag="GO_PALACE_LIBRARY")]
-            elif action_tag == "RETURN_MARKET_SQUARE": 
-                self.change_state("MAJAPAHIT_MARKET")
-        
-        elif self.game_state == "MAJAPAHIT_PALACE_LIBRARY":
-            if not self.player.choices.get("met_empu_tantular"): 
-                self.player.choices["met_empu_tantular"] = True 
-            
-            if action_tag == "DISCUSS_FOREIGNER_ET":
-                self.current_narrative_text = ("Empu Tantular: \"Indeed, a strange individual. He sought to subtly spread doubt about the Mahapatih's Sumpah Palapa, "
-                                               "claiming it would bring ruin rather than unity. I believe he left this...\" He hands you a strangely smooth, dark stone.")
-                if self.player: self.player.add_item("Odd Dark Stone", self)
-                self.current_options_buttons = [Button(button_x_narrative, OPTIONS_START_Y, button_width_narrative, BUTTON_HEIGHT, "Ask about Gajah Mada's doubt.", self.option_font, action_tag="ASK_GM_DOUBT_ET_AGAIN")]
-            elif action_tag == "ASK_GM_DOUBT_ET" or action_tag == "ASK_GM_DOUBT_ET_AGAIN":
-                self.current_narrative_text = ("Empu Tantular: \"The Mahapatih is strong, but words of doubt, especially if repeated by trusted advisors influenced by this foreigner, "
-                                               "can erode even the firmest resolve. The Sumpah Palapa is a monumental vow. The corruptor aims to make him falter before he speaks it publicly.\n"
-                                               "Perhaps showing him proof of external manipulation could restore his conviction. You must act quickly!\"")
-                if self.player: self.player.add_item("Empu Tantular's Counsel", self) 
-                self.current_options_buttons = [Button(button_x_narrative, OPTIONS_START_Y, button_width_narrative, BUTTON_HEIGHT, "Thank Empu Tantular and leave.", self.option_font, action_tag="LEAVE_LIBRARY")]
-            elif action_tag == "LEAVE_LIBRARY":
-                self.change_state("MAJAPAHIT_MARKET") 
-
-        elif self.game_state == "MAJAPAHIT_LINGSAR_TEMPLE":
-            if action_tag == "APPROACH_GM":
-                if self.player.has_item("Odd Dark Stone") and self.player.has_item("Empu Tantular's Counsel"):
-                    self.current_narrative_text = ("You approach Gajah Mada. He seems troubled. You present the evidence of the Time Corruptor's manipulation "
-                                                   "(the Dark Stone) and share Empu Tantular's wisdom. Slowly, clarity returns to his eyes.")
-                    self.player.choices["convinced_gajah_mada"] = True
-                    self.current_options_buttons = [Button(button_x_narrative, OPTIONS_START_Y, button_width_narrative, BUTTON_HEIGHT, "The timeline feels more stable.", self.option_font, action_tag="CHECK_OATH_STATUS")]
-                else:
-                    self.current_narrative_text = "You approach Gajah Mada, but he is lost in thought... You feel you lack the means to help him now. You need more evidence or insight."
-                    # Re-present temple options without changing state yet, so player can try another option from the temple
-                    self.setup_state() 
-                    return # Important: Return to avoid further processing in this process_choice call
-
-            elif action_tag == "CONFRONT_FIGURE":
-                if not self.player.choices.get("corruptor_fled_lingsar"): 
-                    self.current_narrative_text = ("You confront the shadowy figure. It snarls, revealing a futuristic device before vanishing in a flash of distorted light! "
-                                                   "It seems this was the Time Corruptor. You have scared them off for now.")
-                    self.player.choices["corruptor_fled_lingsar"] = True
-                else:
-                    self.current_narrative_text = "The shadowy figure is already gone."
-                # Re-present temple options after this action
-                self.setup_state() 
-                return
-
-            elif action_tag == "RETURN_MARKET_FROM_TEMPLE":
-                self.change_state("MAJAPAHIT_MARKET")
-            
-            elif action_tag == "CHECK_OATH_STATUS": 
-                if self.player.choices.get("convinced_gajah_mada"):
-                    self.change_state("MAJAPAHIT_OATH_SECURED")
-                else: # Should not happen if logic is correct, but as a fallback
-                    self.current_narrative_text = "Gajah Mada still seems troubled. The Time Corruptor's influence might linger or you haven't found the right way to help."
-                    self.setup_state() # Re-present temple options
-                    return
-
-
-        elif self.game_state == "MAJAPAHIT_OATH_SECURED":
-            if action_tag == "END_MAJAPAHIT_ERA":
-                if self.player: self.player.completed_eras.append("Majapahit")
-                self.change_state("MAJAPAHIT_END_ERA")
-
-        elif self.game_state == "MAJAPAHIT_END_ERA":
-            if action_tag == "GOTO_COLONIAL":
-                self.change_state("COLONIAL_ERA_INTRO_PLACEHOLDER")
-        
-        elif self.game_state == "COLONIAL_ERA_INTRO_PLACEHOLDER":
-            if action_tag == "END_DEMO":
-                self.running = False 
-
-        # Fallback: if after processing a choice, no new buttons were set for the *current* state
-        # (and it's not a menu/input state), then something might be missing in the logic for that state.
-        # This is a bit broad, ideally each state transition or action result explicitly sets next options.
-        if not self.current_options_buttons and self.game_state not in ["START_MENU", "NAME_INPUT", "INVENTORY_VIEW", "GAME_MENU"]:
-             if self.game_state.startswith("MAJAPAHIT_MERCHANT_TALK"):
-                 self.add_event_message("You decide to return to the market square.")
-                 self.change_state("MAJAPAHIT_MARKET")
-
+        state = self.game_state
+        started = time.perf_counter()
+        try:
+            self.redraw.invalidate() 
+            self.hover_stale = True
+            self.effects.choose(action_tag)
+        finally:
+            tracer.info("choice", state=state, index=index, action=action_tag,
+                        ms=(time.perf_counter() - started) * 1000)
+
+    # Hooks for SceneEffects; the narrative and option hooks are show_narrative and show_options
+    def call(self, method_name):
+        getattr(self, method_name)()
+
+    def quit(self):
+        self.running = False
+
+    def set_language(self, code):
+        """Shows the game in another locale; the current screen is translated again as it stands."""
+        self.tr = LOCALES.translator(code)
+        self._button_cache = {}
+        if self.current_scene is not None:
+            self.current_era_title = self.tr(self.current_scene.title)
+        self.show_narrative(self._narrative_source)
+        if self._shown_options is not None:
+            self.show_options(*self._shown_options)
+        self.redraw.invalidate()
+
+    def switch_language(self):
+        self.set_language(LOCALES.next_locale(self.tr.locale))
+
+    def begin_name_input(self):
+        self.input_text = ""
+        self.name_input_active = True
+
+    def resume_game(self):
+        if self.previous_game_state:
+            self.change_state(self.previous_game_state)
+
+    def open_inventory_from_menu(self):
+        self.state_before_inventory_from_menu = self.previous_game_state 
+        self.previous_game_state = self.game_state 
+        self.change_state("INVENTORY_VIEW")
+
+    def exit_to_main_menu(self):
+        self.player = None 
+        self.change_state("START_MENU")
 
     def save_game_data_pygame(self):
         if not self.player:
-            self.add_event_message("No game to save!")
+            self.add_event_message(self.tr("No game to save!"))
             return
         
         save_data = {
@@ -742,25 +1797,40 @@ class Game:
             "previous_game_state": self.previous_game_state, 
             "player_choices_log": self.player.choices 
         }
+        # Encoded here so the worker writes a consistent snapshot
         try:
-            with open(SAVE_FILE_NAME, 'w') as f:
-                json.dump(save_data, f, indent=4)
-            self.add_event_message("Game progress saved!")
-        except Exception as e:
+            blob = savecodec.encode(save_data)
+        except ValueError as e:
             print(f"Error saving game: {e}")
-            self.add_event_message("Error saving game.")
+            self.add_event_message(self.tr("Error saving game."))
+            return
+        self.save_worker.save(blob)
 
     def load_game_data_pygame(self):
-        if not os.path.exists(SAVE_FILE_NAME):
-            self.add_event_message("No save file found!")
-            if self.game_state == "GAME_MENU" or self.game_state == "START_MENU": 
-                 self.setup_state() 
+        self.save_worker.load()
+
+    def on_save_io(self, event):
+        if event.op == "save":
+            if event.ok:
+                self.add_event_message(self.tr("Game progress saved!"))
+            else:
+                print(f"Error saving game: {event.error}")
+                self.add_event_message(self.tr("Error saving game."))
             return
 
+        if event.ok:
+            self.apply_loaded_game(event.data)
+            return
+        if event.error is None:
+            self.add_event_message(self.tr("No save file found!"))
+        else:
+            print(f"Error loading game: {event.error}")
+            self.add_event_message(self.tr("Error loading game data: {error}").format(error=event.error))
+        if self.game_state == "GAME_MENU" or self.game_state == "START_MENU": 
+             self.setup_state()
+
+    def apply_loaded_game(self, save_data):
         try:
-            with open(SAVE_FILE_NAME, 'r') as f:
-                save_data = json.load(f)
-            
             self.player = Player.from_dict(save_data["player_data"])
             loaded_game_state = save_data["current_game_state"]
             self.current_era_title = save_data.get("current_era_title", "") 
@@ -768,17 +1838,122 @@ class Game:
             self.player.choices = save_data.get("player_choices_log", {}) 
             
             self.change_state(loaded_game_state) 
-            self.add_event_message("Game loaded successfully!")
+            self.add_event_message(self.tr("Game loaded successfully!"))
 
         except Exception as e:
             print(f"Error loading game: {e}")
-            self.add_event_message(f"Error loading game data: {e}")
+            self.add_event_message(self.tr("Error loading game data: {error}").format(error=e))
             if self.game_state == "GAME_MENU" or self.game_state == "START_MENU": 
                  self.setup_state()
 
 
+def replay_game(path):
+    """Plays a recording back headless and at full speed; returns 1 if it ends somewhere else."""
+    replay = Replay.load(path)
+    replay.expect_frontend("gui")
+    with replay.sandbox() as save_dir:
+        game = Game(headless=True, save_dir=save_dir)
+        game.replay(replay)
+        final_state = game.replay_state()
+        pygame.quit()
+    try:
+        replay.check(final_state)
+    except ReplayMismatch as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Replay matched the recording ({len(replay.inputs)} inputs)")
+    return 0
+
+
+startup.mark("module loaded")
+
 # --- Main Execution ---
 if __name__ == "__main__":
-    game_instance = Game()
-    game_instance.run()
+    parser = argparse.ArgumentParser(description="Nusantara Mission - Pygame version")
+    parser.add_argument("--record", metavar="FILE",
+                        help="record every input to FILE for a bug report or replay")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="play a recording back headless at full speed and check it ends the same way")
+    parser.add_argument("--start-at", metavar="STATE",
+                        help="skip straight to a story scene along its shortest choice path (see story_graph.py)")
+    parser.add_argument("--name", default="Tester", help="player name to use with --start-at")
+    parser.add_argument("--settings", metavar="FILE", default=SETTINGS_FILE_NAME,
+                        help=f"settings file (default {SETTINGS_FILE_NAME}); the options below override it")
+    parser.add_argument("--fps", type=float, dest="active_fps", help=f"frame rate while something changes (default {ACTIVE_FPS})")
+    parser.add_argument("--idle-fps", type=float, help=f"wake-ups per second when idle, 0 for none (default {IDLE_FPS})")
+    parser.add_argument("--background-fps", type=float,
+                        help=f"frame rate while the window is unfocused (default {BACKGROUND_FPS})")
+    parser.add_argument("--power-save", action="store_true", default=None,
+                        help="lower frame rates for fanless laptops and long idle sessions")
+    parser.add_argument("--lang", metavar="CODE",
+                        help=f"language to play in: {', '.join(LOCALES.codes)} (default {SOURCE_LOCALE}; switch in the menus)")
+    parser.add_argument("--text-backend", choices=TEXT_BACKENDS,
+                        help="draw text with font.render() (default) or the pre-rasterized glyph atlas")
+    parser.add_argument("--window", metavar="WxH", help="window size, e.g. 1280x720 (default 800x600)")
+    parser.add_argument("--scale", type=float, help="window size as a multiple of 800x600, e.g. 2 on HiDPI screens")
+    parser.add_argument("--fullscreen", action="store_true", default=None,
+                        help="fill the screen at the desktop resolution (or at --window)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write state changes and choices to a rotating log FILE (- for stderr)")
+    parser.add_argument("--trace-level", choices=tracing.LEVELS,
+                        help="least important events to keep: debug adds per-frame timings (default info)")
+    parser.add_argument("--perf-hud", action="store_true",
+                        help="start with the performance HUD shown (toggle it with F3)")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print how long each startup step took, up to the first frame")
+    args = parser.parse_args()
+
+    settings = load_settings(args.settings)
+    trace_settings = settings.get("tracing", {})
+    try:
+        tracer.level = tracing.parse_level(args.trace_level or trace_settings.get("level", "info"))
+    except ValueError as e:
+        parser.error(f"Invalid settings: {e}")
+    trace_file = args.trace or trace_settings.get("file")
+    if trace_file:
+        tracer.start_flusher(trace_file)
+    atexit.register(tracer.close)
+
+    if args.replay:
+        sys.exit(replay_game(args.replay))
+
+    pacing = settings.get("frame_pacing", {})
+    pacing.update((key, value) for key, value in vars(args).items()
+                  if key in ("active_fps", "idle_fps", "background_fps", "power_save") and value is not None)
+    display = settings.get("display", {})
+    display.update((key, value) for key, value in vars(args).items()
+                   if key in ("window", "scale", "fullscreen") and value is not None)
+    try:
+        pacer = FramePacer.from_settings(pacing)
+        use_text_backend(args.text_backend or settings.get("text_backend", "font"))
+        window_size = window_size_from_settings(display)
+        language = args.lang or settings.get("language", SOURCE_LOCALE)
+        LOCALES.translator(language)
+    except (TypeError, ValueError) as e:
+        parser.error(f"Invalid settings: {e}")
+
+    game_instance = Game(pacer=pacer, window_size=window_size, fullscreen=bool(display.get("fullscreen")),
+                         language=language)
+    game_instance.report_startup = args.startup_report
+    if args.perf_hud:
+        game_instance.toggle_hud()
+    if args.record:
+        game_instance.recorder = Recorder(args.record, "gui",
+                                          capture_files([SAVE_FILE_NAME, LEGACY_SAVE_FILE_NAME]))
+    if args.start_at:
+        try:
+            game_instance.apply_input("jump", args.start_at, args.name)
+        except ValueError as e:
+            parser.error(str(e))
+    try:
+        game_instance.run()
+    except Exception as e:
+        tracer.dump(sys.stderr, TRACE_CRASH_EVENTS)
+        if game_instance.recorder:
+            game_instance.recorder.finish(game_instance.replay_state(), error=e)
+            game_instance.recorder = None
+        raise
+    finally:
+        if game_instance.recorder:
+            game_instance.recorder.finish(game_instance.replay_state())
 
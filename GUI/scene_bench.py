@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Nusantara Mission - Headless per-scene render benchmark
+
+Runs the Pygame game without a display (SDL dummy driver, offscreen surface)
+and times setup_state, draw and the narrative layout for every scene.
+
+    python scene_bench.py --repeat 50 --json scene_bench.json
+    python scene_bench.py --window 1920x1080     # the canvas scaled for a 1080p projector
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.chdir(os.path.dirname(os.path.abspath(__file__))) # Fonts are looked up relative to the game
+
+import misi_nusantara as game_module
+
+
+def time_call(func, repeat):
+    """Returns (best, median) wall time of func in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return min(samples), statistics.median(samples)
+
+
+def bench_scene(game, state_id, repeat):
+    game.game_state = state_id
+
+    def setup():
+        game.clear_event_messages()
+        game.setup_state()
+
+    def draw():
+        game.redraw.invalidate()
+        game.draw()
+
+    narrative_width = game.view.rect(game_module.NARRATIVE_AREA_RECT).width
+
+    def layout_cold():
+        game_module.text_layout.clear()
+        game_module.text_layout.layout(game.current_narrative_text, game.base_font,
+                                       narrative_width, game_module.NARRATIVE_LINE_SPACING)
+
+    def layout_warm():
+        game_module.text_layout.layout(game.current_narrative_text, game.base_font,
+                                       narrative_width, game_module.NARRATIVE_LINE_SPACING)
+
+    setup_best, setup_median = time_call(setup, repeat)
+    draw_best, draw_median = time_call(draw, repeat)
+    cold_best, cold_median = time_call(layout_cold, repeat)
+    warm_best, warm_median = time_call(layout_warm, repeat)
+    return {
+        "scene": state_id,
+        "setup_state_ms": {"best": setup_best, "median": setup_median},
+        "draw_ms": {"best": draw_best, "median": draw_median},
+        "layout_cold_ms": {"best": cold_best, "median": cold_median},
+        "layout_warm_ms": {"best": warm_best, "median": warm_median},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time setup_state, draw and text layout for every scene, headless.")
+    parser.add_argument("--repeat", type=int, default=20, help="samples per measurement (default: 20)")
+    parser.add_argument("--scene", action="append", help="only benchmark this scene (repeatable)")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to PATH as JSON")
+    parser.add_argument("--window", metavar="WxH", help="draw to a surface of this size (default 800x600)")
+    args = parser.parse_args(argv)
+
+    try:
+        window_size = game_module.window_size_from_settings({"window": args.window})
+    except ValueError as e:
+        parser.error(f"--window: {e}")
+    game = game_module.Game(headless=True, window_size=window_size)
+    game.player = game_module.Player("Benchmark")
+    states = args.scene or game_module.SCENES.state_ids()
+
+    results = [bench_scene(game, state_id, args.repeat) for state_id in states]
+
+    print(f"{'scene':<36} {'setup':>9} {'draw':>9} {'layout':>9} {'cached':>9}   (median ms)")
+    for result in results:
+        print(f"{result['scene']:<36} {result['setup_state_ms']['median']:>9.3f} {result['draw_ms']['median']:>9.3f} "
+              f"{result['layout_cold_ms']['median']:>9.3f} {result['layout_warm_ms']['median']:>9.3f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"repeat": args.repeat, "window": list(game.screen.get_size()), "scenes": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
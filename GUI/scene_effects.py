@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Nusantara Mission - Scene effects
+
+Carries out the effects of the Pygame story's scenes, e.g. ("goto",
+"MAJAPAHIT_MARKET") or ("add_item", "Odd Dark Stone"), for a host: Game when
+playing, or StorySimulator in story_graph.py when exploring every choice
+without drawing. The effects change the player here; anything shown is left
+to the host's hooks, so both follow the story the same way.
+"""
+
+
+def check_condition(condition, player):
+    kind = condition[0]
+    if kind == "choice":
+        return bool(player.choices.get(condition[1]))
+    if kind == "not_choice":
+        return not player.choices.get(condition[1])
+    if kind == "has_items":
+        return all(player.has_item(item) for item in condition[1])
+    if kind == "lacks_item":
+        return bool(player) and not player.has_item(condition[1])
+    raise ValueError(f"Unknown condition: {kind}")
+
+
+def visible_options(options, player):
+    return tuple(option for option in options if option.when is None or check_condition(option.when, player))
+
+
+class SceneEffects:
+    """Runs scene effects against a host.
+
+    The host has player (None before a game starts) and game_state, and the hooks
+    change_state(state_id), show_narrative(text), show_options(options, layout=None),
+    call(method_name) and quit(). Player.add_item also reports through the host's
+    tr and add_event_message.
+    """
+
+    def __init__(self, host, scenes):
+        self.host = host
+        self.scenes = scenes
+        self._handlers = {
+            "goto": self._goto,
+            "add_item": self._add_item,
+            "set_choice": self._set_choice,
+            "complete_era": self._complete_era,
+            "narrate": self._narrate,
+            "options": self._options,
+            "refresh": self._refresh,
+            "if": self._if,
+            "call": self._call,
+            "quit": self._quit,
+        }
+
+    def choose(self, action_tag):
+        """Runs the current scene's effects for a chosen action"""
+        scene = self.scenes.get(self.host.game_state)
+        if scene is None:
+            return
+        self.run(scene.on_action)
+        self.run(scene.actions.get(action_tag, ()))
+
+    def run(self, effects):
+        for effect in effects:
+            self._handlers[effect[0]](*effect[1:])
+
+    def _goto(self, state):
+        self.host.change_state(state)
+
+    def _add_item(self, item):
+        if self.host.player:
+            self.host.player.add_item(item, self.host)
+
+    def _set_choice(self, key, value):
+        self.host.player.choices[key] = value
+
+    def _complete_era(self, era):
+        if self.host.player:
+            self.host.player.completed_eras.append(era)
+
+    def _narrate(self, text):
+        self.host.show_narrative(text)
+
+    def _options(self, options):
+        self.host.show_options(options)
+
+    def _refresh(self):
+        # Re-present the scene's options without touching the narrative just shown
+        scene = self.scenes[self.host.game_state]
+        self.host.show_options(scene.resolve(self.host.player)[1], scene.layout)
+
+    def _if(self, condition, then_effects, else_effects=()):
+        self.run(then_effects if check_condition(condition, self.host.player) else else_effects)
+
+    def _call(self, method_name):
+        self.host.call(method_name)
+
+    def _quit(self):
+        self.host.quit()
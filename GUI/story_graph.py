@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Nusantara Mission - Story graph index
+
+Explores every choice in the Pygame story by running scene effects on a
+Player with the same interpreter as Game (scene_effects.py), without
+rendering anything. A situation is a
+scene plus the options it currently shows and the player's items, choices
+and completed eras, so branches that depend on flags or items are followed
+separately. From that graph it finds:
+
+- the shortest valid choice path to every scene
+- scenes no path reaches
+- situations with no way to an ending
+- actions no option shows, and options with no action
+- work-in-progress (WIP) branches
+
+fast_forward() applies a shortest path to a fresh Player, so testers and
+returning players can jump straight to a scene.
+
+    python story_graph.py                     # report
+    python story_graph.py --path MAJAPAHIT_END_ERA
+    python misi_nusantara.py --start-at COLONIAL_ERA_INTRO_PLACEHOLDER
+"""
+
+import os
+import sys
+import argparse
+from collections import deque
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from misi_nusantara import SCENES, Player
+from scene_effects import SceneEffects, visible_options
+from shared.l10n import LOCALES, SOURCE_LOCALE
+
+START_STATE = "INTRO"
+DEFAULT_PLAYER_NAME = "Tester"
+
+
+class StorySimulator:
+    """Host for SceneEffects that plays choices like Game.process_choice, minus drawing and menus."""
+
+    def __init__(self, player, state_id, options=None, scenes=SCENES):
+        self.scenes = scenes
+        self.player = player
+        self.game_state = state_id
+        self.options = options
+        self.ended = False # A "quit" effect ran: the story is over
+        self.calls = [] # Game methods the effects asked for; menus are outside the story
+        self.tr = LOCALES.translator(SOURCE_LOCALE) # Player.add_item words its message through the game
+        self.effects = SceneEffects(self, scenes)
+        if options is None:
+            self.enter(state_id)
+
+    def add_event_message(self, text):
+        pass # Player.add_item reports through the game; nothing to show here
+
+    def enter(self, state_id):
+        """What Game.setup_state does after a state change."""
+        self.game_state = state_id
+        scene = self.scenes.get(state_id)
+        if scene is None:
+            self.options = ()
+            return
+        self.show_options(scene.resolve(self.player)[1])
+        self.effects.run(scene.on_enter)
+
+    def choose(self, action_tag):
+        self.effects.choose(action_tag)
+
+    # Hooks for SceneEffects
+
+    def change_state(self, state_id):
+        self.enter(state_id)
+
+    def show_narrative(self, text):
+        pass
+
+    def show_options(self, options, layout=None):
+        self.options = visible_options(options, self.player)
+
+    def call(self, method_name):
+        self.calls.append(method_name)
+
+    def quit(self):
+        self.ended = True
+
+
+class Situation:
+    """One node of the story graph."""
+    __slots__ = ("state_id", "options", "player", "ended", "parent", "action_tag")
+
+    def __init__(self, state_id, options, player, ended, parent=None, action_tag=None):
+        self.state_id = state_id
+        self.options = options
+        self.player = player
+        self.ended = ended
+        self.parent = parent # The situation this one was first reached from
+        self.action_tag = action_tag # ...and the action that led here
+
+    @property
+    def key(self):
+        player = self.player
+        return (self.state_id, tuple(option.action_tag for option in self.options), self.ended,
+                tuple(player.inventory.items()), tuple(sorted(player.choices.items(), key=repr)),
+                tuple(dict.fromkeys(player.completed_eras))) # Repeats can't change what happens next
+
+    def path(self):
+        """[(state_id, action_tag), ...] from the start to this situation."""
+        steps = []
+        node = self
+        while node.parent is not None:
+            steps.append((node.parent.state_id, node.action_tag))
+            node = node.parent
+        steps.reverse()
+        return steps
+
+
+def copy_player(player):
+    # Player.from_dict keeps the lists it is given, and each branch needs its own
+    data = player.to_dict()
+    data["completed_eras"] = list(data["completed_eras"])
+    data["choices"] = dict(data["choices"])
+    return Player.from_dict(data)
+
+
+class StoryGraph:
+    def __init__(self, scenes=SCENES, start_state=START_STATE, player_name=DEFAULT_PLAYER_NAME):
+        self.scenes = scenes
+        self.start_state = start_state
+        self.player_name = player_name
+        library = scenes.library
+        self.story_states = [state_id for era_id in library.era_ids for state_id in library.gui_scenes(era_id)]
+        self.situations = {}
+        self.edges = {} # situation key -> [(action_tag, situation key)]
+        self.first_reached = {} # state_id -> first (so shortest-path) situation in that scene
+        self.calls = set() # (state_id, action_tag, method) for effects that leave the story
+        self._explore()
+
+    def _explore(self):
+        start_simulator = StorySimulator(Player(self.player_name), self.start_state, scenes=self.scenes)
+        start = Situation(self.start_state, start_simulator.options, start_simulator.player, False)
+        self.situations[start.key] = start
+        self.first_reached[start.state_id] = start
+        queue = deque([start])
+        while queue:
+            situation = queue.popleft()
+            edges = self.edges[situation.key] = []
+            if situation.ended:
+                continue
+            for option in situation.options:
+                simulator = StorySimulator(copy_player(situation.player), situation.state_id,
+                                           situation.options, scenes=self.scenes)
+                simulator.choose(option.action_tag)
+                for method in simulator.calls:
+                    self.calls.add((situation.state_id, option.action_tag, method))
+                reached = Situation(simulator.game_state, simulator.options, simulator.player, simulator.ended,
+                                    situation, option.action_tag)
+                key = reached.key
+                edges.append((option.action_tag, key))
+                if key not in self.situations:
+                    self.situations[key] = reached
+                    self.first_reached.setdefault(reached.state_id, reached)
+                    queue.append(reached)
+
+    def shortest_path(self, state_id):
+        """The fewest choices that reach state_id from the start, or None if nothing does."""
+        situation = self.first_reached.get(state_id)
+        return None if situation is None else situation.path()
+
+    def fast_forward(self, state_id, player_name=None):
+        """Replays the shortest path to state_id on a fresh Player and returns the simulator there."""
+        path = self.shortest_path(state_id)
+        if path is None:
+            raise ValueError(f"No choice path reaches {state_id}")
+        simulator = StorySimulator(Player(player_name or self.player_name), self.start_state, scenes=self.scenes)
+        for _, action_tag in path:
+            simulator.choose(action_tag)
+        return simulator
+
+    def reachable_states(self):
+        return [state_id for state_id in self.story_states if state_id in self.first_reached]
+
+    def unreachable_states(self):
+        return [state_id for state_id in self.story_states if state_id not in self.first_reached]
+
+    def endings(self):
+        return [situation for situation in self.situations.values() if situation.ended]
+
+    def dead_ends(self):
+        """Situations from which no sequence of choices reaches an ending."""
+        reverse = {key: [] for key in self.situations}
+        for key, edges in self.edges.items():
+            for _, target in edges:
+                reverse[target].append(key)
+        can_finish = set()
+        queue = deque(situation.key for situation in self.endings())
+        can_finish.update(queue)
+        while queue:
+            for source in reverse[queue.popleft()]:
+                if source not in can_finish:
+                    can_finish.add(source)
+                    queue.append(source)
+        return [situation for key, situation in self.situations.items() if key not in can_finish]
+
+    def shown_actions(self):
+        """(state_id, action_tag) for every option some situation shows."""
+        return {(situation.state_id, option.action_tag)
+                for situation in self.situations.values() for option in situation.options}
+
+    def unused_actions(self):
+        """Actions a scene defines but no reachable situation offers."""
+        shown = self.shown_actions()
+        return [(state_id, tag) for state_id in self.story_states
+                for tag in self.scenes[state_id].actions if (state_id, tag) not in shown]
+
+    def unhandled_options(self):
+        """Options a situation shows whose tag has no action in its scene."""
+        return sorted((state_id, tag) for state_id, tag in self.shown_actions()
+                      if state_id in self.scenes and tag not in self.scenes[state_id].actions)
+
+    def wip(self):
+        """Scenes and actions marked as work in progress."""
+        marked = [state_id for state_id in self.story_states
+                  if "WIP" in state_id or "(WIP)" in self.scenes[state_id].title]
+        marked += [f"{state_id}.{tag}" for state_id in self.story_states
+                   for tag in self.scenes[state_id].actions if "WIP" in tag]
+        return marked
+
+
+def fast_forward(game, state_id, player_name=None, graph=None):
+    """Puts a Game at state_id with the player a shortest path would have, without playing it."""
+    graph = graph or StoryGraph()
+    name = player_name or (game.player.name if game.player else DEFAULT_PLAYER_NAME)
+    simulator = graph.fast_forward(state_id, name)
+    game.player = simulator.player
+    game.name_input_active = False
+    game.previous_game_state = None
+    game.change_state(state_id, run_on_enter=False) # on_enter already ran in the simulation
+    return graph.shortest_path(state_id)
+
+
+def format_path(path):
+    return " > ".join(tag for _, tag in path) if path else "(start)"
+
+
+def print_report(graph):
+    print(f"{len(graph.story_states)} scenes, {len(graph.situations)} reachable situations, "
+          f"{len(graph.endings())} ending(s)")
+
+    print("\nShortest paths:")
+    for state_id in graph.reachable_states():
+        print(f"  {state_id:<36} {format_path(graph.shortest_path(state_id))}")
+
+    sections = [
+        ("Unreachable scenes", graph.unreachable_states()),
+        ("Dead ends (no way to an ending)",
+         sorted({f"{s.state_id} [{', '.join(o.action_tag for o in s.options) or 'no options'}]"
+                 for s in graph.dead_ends()})),
+        ("Actions no option offers", [f"{state_id}.{tag}" for state_id, tag in graph.unused_actions()]),
+        ("Options with no action", [f"{state_id}.{tag}" for state_id, tag in graph.unhandled_options()]),
+        ("Leaves the story through", sorted({f"{s}.{t} -> {m}()" for s, t, m in graph.calls})),
+        ("Work in progress", graph.wip()),
+    ]
+    for heading, lines in sections:
+        if lines:
+            print(f"\n{heading}:")
+            for line in lines:
+                print(f"  {line}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reachability report for the Nusantara Mission story")
+    parser.add_argument("--path", metavar="STATE", help="only print the shortest choice path to STATE")
+    args = parser.parse_args(argv)
+
+    graph = StoryGraph()
+    if args.path:
+        path = graph.shortest_path(args.path)
+        if path is None:
+            print(f"No choice path reaches {args.path}", file=sys.stderr)
+            return 1
+        for state_id, tag in path:
+            print(f"{state_id:<36} {tag}")
+        return 0
+    print_report(graph)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Nusantara Mission - Benchmark suite
+
+Times the hot paths of both frontends and compares them with a JSON baseline.
+
+    python benchmarks/run_benchmarks.py                  # compare with baseline.json
+    python benchmarks/run_benchmarks.py --save           # record a new baseline
+    python benchmarks/run_benchmarks.py --threshold 0.10 # fail on >10% slowdowns
+
+Each benchmark is timed as the median of REPEAT batches, and the spread of
+those batches is kept as its noise. Exits with status 1 when a benchmark is
+slower than its baseline by more than the threshold plus that noise, and by
+at least MIN_DELTA_US.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import contextlib
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+GUI_DIR = os.path.join(REPO_ROOT, "GUI")
+CLI_DIR = os.path.join(REPO_ROOT, "CLI")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path[:0] = [GUI_DIR, CLI_DIR]
+
+import cli
+import misi_nusantara as gui
+from shared import savecodec
+from shared.items import Inventory
+
+SHORT_TEXT = "You arrive in a bustling market."
+LONG_TEXT = " ".join([
+    "The air at Lingsar Temple is serene, yet a palpable tension surrounds Gajah Mada, who is in deep meditation.",
+    "A shadowy figure in unusual garb lurks nearby, pretending to be an attendant.",
+] * 8)
+LARGE_INVENTORY = 5000
+REPEAT = 15 # Timed batches per benchmark
+MIN_BATCH_TIME = 0.02 # Seconds per batch
+MIN_DELTA_US = 0.5 # Slowdowns smaller than this are timer noise, whatever their percentage
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+@contextlib.contextmanager
+def quiet():
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def time_per_op(func, repeat=REPEAT, min_time=MIN_BATCH_TIME):
+    """Time of one call in microseconds, the median over `repeat` batches of at least `min_time` seconds,
+    and the spread of the batches (10th to 90th percentile) as a fraction of it."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    times.sort()
+    median = times[len(times) // 2]
+    spread = (times[(len(times) - 1) * 9 // 10] - times[(len(times) - 1) // 10]) / median
+    return median * 1e6, spread
+
+
+# --- GUI ---
+
+_game = None
+
+
+def gui_game():
+    global _game
+    if _game is None:
+        _game = gui.Game(headless=True)
+        _game.player = gui.Player("Benchmark")
+    return _game
+
+
+def _wrapped(text):
+    game = gui_game()
+    return lambda: gui.render_text_wrapped(game.screen, text, game.base_font, gui.NARRATIVE_TEXT_COLOR,
+                                           gui.NARRATIVE_AREA_RECT, line_spacing_modifier=gui.NARRATIVE_LINE_SPACING)
+
+
+@benchmark("gui.render_text_wrapped.short")
+def bench_wrapped_short():
+    return _wrapped(SHORT_TEXT)
+
+
+@benchmark("gui.render_text_wrapped.long")
+def bench_wrapped_long():
+    return _wrapped(LONG_TEXT)
+
+
+@benchmark("gui.render_text_wrapped.long_uncached")
+def bench_wrapped_long_uncached():
+    draw = _wrapped(LONG_TEXT)
+
+    def run():
+        gui.text_cache.clear()
+        gui.text_layout.clear()
+        draw()
+    return run
+
+
+def _reveal_line():
+    return SHORT_TEXT + " " + LONG_TEXT[:60]
+
+
+@benchmark("gui.text.reveal.cache")
+def bench_reveal_cache():
+    """A typewriter reveal through TextSurfaceCache: every prefix of the line is a miss"""
+    font = gui_game().base_font
+    cache = gui.TextSurfaceCache()
+    text = _reveal_line()
+
+    def run():
+        cache.clear()
+        for count in range(1, len(text) + 1):
+            cache.render(font, text[:count], gui.NARRATIVE_TEXT_COLOR)
+    return run
+
+
+@benchmark("gui.text.reveal.atlas")
+def bench_reveal_atlas():
+    """The same reveal with glyph_atlas.Reveal, which blits only the new glyphs each frame"""
+    import glyph_atlas
+    font = gui_game().base_font
+    renderer = glyph_atlas.AtlasRenderer(gui.fonts.source)
+    text = _reveal_line()
+
+    def run():
+        reveal = renderer.reveal(font, text, gui.NARRATIVE_TEXT_COLOR)
+        for count in range(1, len(text) + 1):
+            reveal.show(count)
+    return run
+
+
+@benchmark("gui.button_draw")
+def bench_button_draw():
+    game = gui_game()
+    button = gui.Button(100, 100, 640, gui.BUTTON_HEIGHT, "Approach Gajah Mada directly.", game.option_button_style)
+    return lambda: button.draw(game.screen)
+
+
+@benchmark("gui.draw.busy_toasts")
+def bench_draw_busy_toasts():
+    """Redrawing the event messages after a scene's worth of item pickups"""
+    game = gui_game()
+    game.game_state = "MAJAPAHIT_MARKET"
+    game.setup_state()
+    player = gui.Player("Benchmark")
+    for i in range(200):
+        player.add_item(f"Artifact {i}", game)
+
+    def run():
+        game.redraw.invalidate(gui.EVENT_MSG_AREA_RECT)
+        game.draw()
+    return run
+
+
+@benchmark("gui.setup_state")
+def bench_setup_state():
+    game = gui_game()
+    states = ("MAJAPAHIT_MARKET", "MAJAPAHIT_LINGSAR_TEMPLE", "MAJAPAHIT_PALACE_LIBRARY", "INTRO")
+
+    def run():
+        for state in states:
+            game.game_state = state
+            game.setup_state()
+    return run
+
+
+@benchmark("gui.process_choice")
+def bench_process_choice():
+    game = gui_game()
+
+    def run():
+        with quiet():
+            game.change_state("MAJAPAHIT_MARKET")
+            game.process_choice(1, "MAJAPAHIT_ASK_GM")
+            game.process_choice(2, "RETURN_MARKET_SQUARE")
+    return run
+
+
+def _gui_player_with_items(count):
+    player = gui.Player("Benchmark")
+    for i in range(count):
+        player.add_item(f"Artifact {i}", gui_game())
+    gui_game().clear_event_messages()
+    return player
+
+
+@benchmark("gui.player.add_item.large")
+def bench_gui_add_item():
+    game = gui_game()
+    player = _gui_player_with_items(LARGE_INVENTORY)
+
+    def run():
+        player.add_item(f"Artifact {LARGE_INVENTORY - 1}", game) # Duplicate: full membership check
+        game.clear_event_messages()
+    return run
+
+
+@benchmark("gui.player.has_item.large")
+def bench_gui_has_item():
+    player = _gui_player_with_items(LARGE_INVENTORY)
+    return lambda: player.has_item("Odd Dark Stone")
+
+
+# --- CLI ---
+
+def _cli_player_with_items(count):
+    player = cli.Player("Benchmark")
+    with quiet():
+        for i in range(count):
+            player.add_item(f"Artifact {i}")
+    return player
+
+
+@benchmark("cli.player.add_item.large")
+def bench_cli_add_item():
+    player = _cli_player_with_items(LARGE_INVENTORY)
+
+    def run():
+        with quiet():
+            player.add_item("Secret Letter")
+            player.remove_item("Secret Letter")
+    return run
+
+
+@benchmark("cli.player.has_item.large")
+def bench_cli_has_item():
+    player = _cli_player_with_items(LARGE_INVENTORY)
+    return lambda: player.has_item("Dutch Permit")
+
+
+def _cli_game(save_dir):
+    game = cli.Game()
+    game.save_file = os.path.join(save_dir, "nusantara_mission_save.sav")
+    game.player = _cli_player_with_items(50)
+    game.player.current_era = "colonial"
+    game.player.completed_eras = ["majapahit"]
+    game.player.choices = {"majapahit_merchant": 0, "majapahit_location": 2}
+    return game
+
+
+@benchmark("cli.save_game")
+def bench_cli_save(save_dir):
+    game = _cli_game(save_dir)
+
+    def run():
+        with quiet():
+            game.save_game()
+    return run
+
+
+@benchmark("cli.save.journal_choice")
+def bench_cli_journal_choice(save_dir):
+    game = _cli_game(save_dir)
+    with quiet():
+        game.save_game()
+    # Just the append: the snapshot every COMPACT_EVERY records is cli.save_game, and batches
+    # with and without one would be too far apart to compare
+    game.journal.compact_every = sys.maxsize
+    return lambda: game.player.set_choice("majapahit_location", 1)
+
+
+@benchmark("cli.load_saved_game")
+def bench_cli_load(save_dir):
+    game = _cli_game(save_dir)
+    with quiet():
+        game.save_game()
+    return lambda: game.play(game.load_saved_game())
+
+
+def _gui_save_data():
+    player = gui.Player("Gilang")
+    player.inventory = Inventory(f"Artifact {i}" for i in range(50))
+    player.choices = {"met_empu_tantular": True, "convinced_gajah_mada": True}
+    return {
+        "player_data": player.to_dict(),
+        "current_game_state": "MAJAPAHIT_LINGSAR_TEMPLE",
+        "current_era_title": "Majapahit Era",
+        "previous_game_state": None,
+        "player_choices_log": player.choices
+    }
+
+
+@benchmark("shared.savecodec.encode")
+def bench_savecodec_encode():
+    data = _gui_save_data()
+    return lambda: savecodec.encode(data)
+
+
+@benchmark("shared.savecodec.decode")
+def bench_savecodec_decode():
+    blob = savecodec.encode(_gui_save_data())
+    return lambda: savecodec.decode(blob)
+
+
+def run_benchmarks(names):
+    """Returns ({name: us per op}, {name: noise})"""
+    results = {}
+    noise = {}
+    save_dir = tempfile.mkdtemp(prefix="nusantara_bench_")
+    try:
+        for name in names:
+            setup = BENCHMARKS[name]
+            func = setup(save_dir) if name.startswith("cli.save") or name.startswith("cli.load") else setup()
+            results[name], noise[name] = time_per_op(func)
+            print(f"{name:<40} {results[name]:>12.2f} us/op  (+-{noise[name] / 2:.0%})")
+    finally:
+        shutil.rmtree(save_dir, ignore_errors=True)
+    return results, noise
+
+
+def compare(results, noise, baseline, baseline_noise, threshold):
+    """Prints the comparison and returns the names that regressed past the threshold plus their noise."""
+    regressions = []
+    print(f"\n{'benchmark':<40} {'baseline':>12} {'current':>12} {'change':>9} {'allowed':>9}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<40} {'-':>12} {current:>12.2f} {'new':>9}")
+            continue
+        change = (current - previous) / previous
+        allowed = threshold + max(noise[name], baseline_noise.get(name, 0.0))
+        regressed = change > allowed and current - previous >= MIN_DELTA_US
+        marker = "  REGRESSION" if regressed else ""
+        print(f"{name:<40} {previous:>12.2f} {current:>12.2f} {change:>+8.1%} {allowed:>8.0%}{marker}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths of both Nusantara Mission frontends.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file (default: benchmarks/baseline.json)")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown as a fraction of the baseline before failing, on top of "
+                             "each benchmark's noise (default: 0.25)")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    os.chdir(GUI_DIR) # The GUI loads its font relative to its own directory
+    names = [name for name in BENCHMARKS if args.filter in name]
+    results, noise = run_benchmarks(names)
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "unit": "us_per_op",
+        "results": results,
+        "noise": noise, # Spread of each benchmark's batches, as a fraction of its time
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save to create one.")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, noise, baseline["results"], baseline.get("noise", {}), args.threshold)
+    unrecorded = [name for name in results if name not in baseline["results"]]
+    if unrecorded:
+        print(f"\nNot in the baseline yet (record them with --save): {', '.join(unrecorded)}")
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed more than {args.threshold:.0%} plus their noise: "
+              f"{', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
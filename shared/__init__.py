@@ -0,0 +1,3 @@
+"""
+Code shared by the CLI and Pygame versions of Nusantara Mission.
+"""
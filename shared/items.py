@@ -0,0 +1,125 @@
+"""
+Item registry and inventory shared by the CLI and Pygame frontends.
+
+Item names are interned to small integer ids the first time they are seen.
+Descriptions and other metadata live in story/items.json and are only read
+the first time something asks for them. An Inventory maps item ids to quantities in the order the items were first
+picked up, so membership checks stay constant-time however large the
+inventory grows.
+"""
+
+import os
+import json
+
+from shared.story import STORY_DIR
+
+ITEMS_FILE_NAME = "items.json"
+
+
+class ItemRegistry:
+    def __init__(self, story_dir=STORY_DIR):
+        self.path = os.path.join(story_dir, ITEMS_FILE_NAME)
+        self._ids = {}
+        self._names = []
+        self._info = None # Metadata by item name, read on first use
+
+    def intern(self, name):
+        """Returns the id for name, registering it if it is new."""
+        item_id = self._ids.get(name)
+        if item_id is None:
+            item_id = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return item_id
+
+    def lookup(self, name):
+        """Returns the id for name, or None if no item by that name has been seen."""
+        return self._ids.get(name)
+
+    def name(self, item_id):
+        return self._names[item_id]
+
+    def info(self, item_id):
+        """Metadata for an item from story/items.json ({} for items it doesn't list)."""
+        if self._info is None:
+            self._info = self._load_info()
+        return self._info.get(self._names[item_id], {})
+
+    def _load_info(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)["items"]
+        except OSError:
+            return {}
+        return {entry["name"]: entry for entry in entries}
+
+
+ITEMS = ItemRegistry()
+
+
+def format_item(name, quantity):
+    return f"{name} x{quantity}" if quantity > 1 else name
+
+
+class Inventory:
+    """Insertion-ordered item quantities with constant-time membership."""
+    __slots__ = ("_counts", "registry")
+
+    def __init__(self, items=(), registry=ITEMS):
+        self._counts = counts = {}
+        self.registry = registry
+        intern = registry.intern
+        for name in items:
+            item_id = intern(name)
+            counts[item_id] = counts.get(item_id, 0) + 1
+
+    def add(self, name, quantity=1):
+        """Adds quantity of an item and returns how many are held now."""
+        item_id = self.registry.intern(name)
+        total = self._counts.get(item_id, 0) + quantity
+        self._counts[item_id] = total
+        return total
+
+    def remove(self, name, quantity=1):
+        """Removes up to quantity of an item; returns False if none was held."""
+        item_id = self.registry.lookup(name)
+        held = self._counts.get(item_id, 0)
+        if not held:
+            return False
+        if held > quantity:
+            self._counts[item_id] = held - quantity
+        else:
+            del self._counts[item_id]
+        return True
+
+    def count(self, name):
+        return self._counts.get(self.registry.lookup(name), 0)
+
+    def __contains__(self, name):
+        return self.registry.lookup(name) in self._counts
+
+    def __len__(self):
+        return len(self._counts)
+
+    def __iter__(self):
+        name = self.registry.name
+        return (name(item_id) for item_id in self._counts)
+
+    def items(self):
+        """(name, quantity) pairs in pickup order."""
+        name = self.registry.name
+        return [(name(item_id), quantity) for item_id, quantity in self._counts.items()]
+
+    def to_list(self):
+        """Item names with repeats, the layout save files store."""
+        name = self.registry.name
+        if len(self._counts) == sum(self._counts.values()):
+            return [name(item_id) for item_id in self._counts]
+        return [name(item_id) for item_id, quantity in self._counts.items() for _ in range(quantity)]
+
+    def __eq__(self, other):
+        if isinstance(other, Inventory):
+            return self.items() == other.items()
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Inventory({self.items()!r})"
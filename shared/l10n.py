@@ -0,0 +1,350 @@
+"""
+Localization shared by the CLI and Pygame frontends.
+
+The story and the interface are written in English, and the English text is
+the message id: a frontend passes each piece of text it is about to show
+through a Translator, which returns the active locale's translation, or the
+text itself when there is none. English needs no catalog at all.
+
+Translations live in locale/<code>.json and are compiled ahead of time to a
+binary catalog in locale/__catalogcache__/<code>.cat:
+
+    header   magic, entry count, slot count, stamp of the source file
+    slots    open-addressed hash table on the crc32 of the UTF-8 message id;
+             each slot is (hash, id offset, id length, text offset, text length)
+    strings  each message id followed by its translation, in source file order
+
+A catalog is memory-mapped, not read. A lookup touches the header, a slot or
+two, and the strings it compares and returns, so only the pages of text a
+player actually sees are ever read, and every game and process showing the
+same locale shares them through the page cache. Switching language swaps the
+Translator a game uses; a locale nobody switches to is never opened.
+
+A catalog whose source changed after it was built is rebuilt the first time
+it is opened, the way the story cache is.
+
+    python -m shared.l10n build         # compile every locale/*.json
+    python -m shared.l10n check id      # story and interface text with no Indonesian translation
+"""
+
+import os
+import re
+import ast
+import sys
+import json
+import mmap
+import zlib
+import struct
+import argparse
+
+from shared.story import REPO_ROOT, StoryLibrary
+
+LOCALE_DIR = os.path.join(REPO_ROOT, "locale")
+# Frontend sources whose tr("...") calls are interface text a catalog should cover
+INTERFACE_SOURCES = tuple(os.path.join(REPO_ROOT, path)
+                          for path in ("CLI/cli.py", "CLI/server.py", "GUI/misi_nusantara.py"))
+CATALOG_DIR_NAME = "__catalogcache__"
+CATALOG_SUFFIX = ".cat"
+SOURCE_LOCALE = "en" # The language the story and interface are written in
+
+MAGIC = b"NMCAT\x00\x00\x01"
+HEADER = struct.Struct("<8sIIqq") # Magic, entries, slots, source mtime_ns, source size
+SLOT = struct.Struct("<IIIII") # Id hash, id offset, id length, text offset, text length
+EMPTY_SLOT = SLOT.pack(0, 0, 0, 0, 0) # Offsets are never 0: the header comes first
+PLACEHOLDER = re.compile(r"\{\w+\}")
+
+
+def compile_catalog(messages, stamp=(0, 0)):
+    """Builds the binary catalog for a {message id: translation} dict; empty translations are left out."""
+    entries = [(message_id.encode("utf-8"), text.encode("utf-8")) for message_id, text in messages.items()
+               if message_id and text]
+    slot_count = 8
+    while slot_count < len(entries) * 2:
+        slot_count *= 2
+    mask = slot_count - 1
+    slots = [EMPTY_SLOT] * slot_count
+    strings = bytearray()
+    strings_start = HEADER.size + SLOT.size * slot_count
+    for key, text in entries:
+        key_offset = strings_start + len(strings)
+        strings += key
+        text_offset = strings_start + len(strings)
+        strings += text
+        key_hash = zlib.crc32(key)
+        index = key_hash & mask
+        while slots[index] is not EMPTY_SLOT:
+            index = (index + 1) & mask
+        slots[index] = SLOT.pack(key_hash, key_offset, len(key), text_offset, len(text))
+    return HEADER.pack(MAGIC, len(entries), slot_count, *stamp) + b"".join(slots) + bytes(strings)
+
+
+class Catalog:
+    """A compiled catalog, looked up in place in a memory map (or any bytes-like buffer)."""
+
+    def __init__(self, buffer):
+        if len(buffer) < HEADER.size:
+            raise ValueError("Message catalog is truncated")
+        magic, self.entries, slot_count, *stamp = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError("Not a compiled message catalog")
+        if slot_count & (slot_count - 1) or len(buffer) < HEADER.size + SLOT.size * slot_count:
+            raise ValueError("Message catalog is truncated")
+        self.stamp = tuple(stamp)
+        self._buffer = buffer
+        self._mask = slot_count - 1
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(buffer)
+        except ValueError:
+            buffer.close()
+            raise
+
+    def get(self, message_id, default=None):
+        key = message_id.encode("utf-8")
+        key_hash = zlib.crc32(key)
+        buffer = self._buffer
+        index = key_hash & self._mask
+        while True:
+            slot_hash, key_offset, key_length, text_offset, text_length = SLOT.unpack_from(
+                buffer, HEADER.size + SLOT.size * index)
+            if not key_offset:
+                return default
+            if slot_hash == key_hash and buffer[key_offset:key_offset + key_length] == key:
+                return str(buffer[text_offset:text_offset + text_length], "utf-8")
+            index = (index + 1) & self._mask
+
+    def __len__(self):
+        return self.entries
+
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+
+class Translator:
+    """Shows text in one locale: a translation from its catalog, or the text unchanged without one."""
+    __slots__ = ("locale", "catalog", "_seen")
+
+    def __init__(self, locale, catalog=None):
+        self.locale = locale
+        self.catalog = catalog
+        self._seen = {} # Message id -> text for everything already shown, so each is decoded once
+
+    def __call__(self, text):
+        if self.catalog is None:
+            return text
+        translated = self._seen.get(text)
+        if translated is None:
+            translated = self._seen[text] = self.catalog.get(text, text)
+        return translated
+
+    def __repr__(self):
+        return f"Translator({self.locale!r})"
+
+
+class Locales:
+    """The source locale plus one per locale/<code>.json, each opened the first time it is asked for."""
+
+    def __init__(self, locale_dir=LOCALE_DIR, use_cache=True):
+        self.locale_dir = locale_dir
+        self.cache_dir = os.path.join(locale_dir, CATALOG_DIR_NAME)
+        self.use_cache = use_cache
+        self._codes = None
+        self._translators = {SOURCE_LOCALE: Translator(SOURCE_LOCALE)}
+
+    @property
+    def codes(self):
+        """Every available locale, the source locale first; an install may ship only the compiled catalogs."""
+        if self._codes is None:
+            found = set()
+            for directory, suffix in ((self.locale_dir, ".json"), (self.cache_dir, CATALOG_SUFFIX)):
+                try:
+                    names = os.listdir(directory)
+                except OSError:
+                    continue
+                found.update(name[:-len(suffix)] for name in names if name.endswith(suffix))
+            found.discard(SOURCE_LOCALE)
+            self._codes = (SOURCE_LOCALE,) + tuple(sorted(found))
+        return self._codes
+
+    def translator(self, code):
+        translator = self._translators.get(code)
+        if translator is None:
+            if code not in self.codes:
+                raise ValueError(f"Unknown language {code!r}, expected one of {', '.join(self.codes)}")
+            translator = self._translators[code] = Translator(code, self._open(code))
+        return translator
+
+    def next_locale(self, code):
+        """The locale after code, wrapping around; what a language button switches to"""
+        codes = self.codes
+        return codes[(codes.index(code) + 1) % len(codes)] if code in codes else SOURCE_LOCALE
+
+    def source_path(self, code):
+        return os.path.join(self.locale_dir, code + ".json")
+
+    def catalog_path(self, code):
+        return os.path.join(self.cache_dir, code + CATALOG_SUFFIX)
+
+    def _open(self, code):
+        source_path = self.source_path(code)
+        try:
+            stat = os.stat(source_path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None # Only the compiled catalog was installed
+        if self.use_cache:
+            try:
+                catalog = Catalog.open(self.catalog_path(code))
+            except (OSError, ValueError):
+                catalog = None
+            if catalog is not None and (stamp is None or catalog.stamp == stamp):
+                return catalog
+            if catalog is not None:
+                catalog.close()
+            self.build(code, stamp)
+            try:
+                return Catalog.open(self.catalog_path(code))
+            except (OSError, ValueError):
+                pass
+        # No cache, or a read-only install: keep the compiled catalog in memory
+        return Catalog(compile_catalog(load_messages(source_path), stamp or (0, 0)))
+
+    def build(self, code, stamp=None):
+        """Compiles locale/<code>.json and writes the catalog if it can; returns the compiled bytes."""
+        source_path = self.source_path(code)
+        if stamp is None:
+            stat = os.stat(source_path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        data = compile_catalog(load_messages(source_path), stamp)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            catalog_path = self.catalog_path(code)
+            temp_path = f"{catalog_path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, catalog_path)
+        except OSError:
+            pass
+        return data
+
+
+LOCALES = Locales()
+
+
+def load_messages(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["messages"]
+
+
+def story_messages(library=None):
+    """Every piece of story text a player can see, in story order: the message ids a catalog should cover."""
+    library = library or StoryLibrary()
+    messages = {}
+
+    def add(text):
+        if text:
+            messages[text] = None
+
+    def script(steps):
+        for step in steps:
+            if isinstance(step, str):
+                add(step)
+                continue
+            for option in step.get("choose", ()):
+                add(option)
+            add(step.get("pause"))
+            add(step.get("add_item"))
+            for key in ("branches", "cases"):
+                for branch in step.get(key, ()):
+                    script(branch)
+            for key in ("then", "else"):
+                script(step.get(key, ()))
+
+    def options(specs):
+        for option in specs:
+            add(option["text"])
+
+    def effects(specs):
+        for effect in specs:
+            if effect[0] in ("narrate", "add_item"):
+                add(effect[1])
+            elif effect[0] == "options":
+                options(effect[1])
+            elif effect[0] == "if":
+                for branch in effect[2:]:
+                    effects(branch)
+
+    for era_id in library.era_ids:
+        script(library.cli_script(era_id))
+        for scene in library.gui_scenes(era_id).values():
+            add(scene.get("title"))
+            add(scene.get("narrative"))
+            options(scene.get("options", ()))
+            for variant in scene.get("variants", ()):
+                add(variant["narrative"])
+                options(variant["options"])
+            effects(scene.get("on_enter", ()))
+            effects(scene.get("on_action", ()))
+            for action in scene.get("actions", {}).values():
+                effects(action)
+    return list(messages)
+
+
+def interface_messages(paths=INTERFACE_SOURCES):
+    """The interface text of the frontends: every string literal passed to a tr() call."""
+    messages = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call) or not node.args:
+                continue
+            name = node.func.attr if isinstance(node.func, ast.Attribute) else getattr(node.func, "id", None)
+            text = node.args[0]
+            if name == "tr" and isinstance(text, ast.Constant) and isinstance(text.value, str) and text.value:
+                messages[text.value] = None
+    return list(messages)
+
+
+def check_locale(locales, code, library=None):
+    """Prints story and interface text missing from a locale and translations whose {placeholders} don't
+    match; returns 1 if any."""
+    messages = load_messages(locales.source_path(code))
+    missing = [text for text in story_messages(library) + interface_messages() if not messages.get(text)]
+    mismatched = [message_id for message_id, text in messages.items()
+                  if text and sorted(PLACEHOLDER.findall(text)) != sorted(PLACEHOLDER.findall(message_id))]
+    for message_id in mismatched:
+        print(f"Placeholders differ: {message_id!r} -> {messages[message_id]!r}")
+    for text in missing:
+        print(f"Not translated: {text!r}")
+    print(f"{code}: {len(messages)} messages, {len(missing)} story and interface texts not translated, "
+          f"{len(mismatched)} with mismatched placeholders")
+    return 1 if missing or mismatched else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile and check the Nusantara Mission translations.")
+    parser.add_argument("--locale-dir", default=LOCALE_DIR, help="directory of the <code>.json sources")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="compile every locale (or the ones given) to a binary catalog")
+    build.add_argument("codes", nargs="*")
+    check = commands.add_parser("check", help="list story and interface text a locale does not translate")
+    check.add_argument("code")
+    args = parser.parse_args(argv)
+
+    locales = Locales(args.locale_dir)
+    if args.command == "check":
+        return check_locale(locales, args.code)
+    for code in args.codes or [code for code in locales.codes[1:] if os.path.exists(locales.source_path(code))]:
+        data = locales.build(code)
+        print(f"{locales.catalog_path(code)}: {len(Catalog(data))} messages, {len(data)} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
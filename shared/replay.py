@@ -0,0 +1,152 @@
+"""
+Input recording and deterministic replay for the CLI and Pygame frontends.
+
+A recording is one small JSON file holding:
+
+- the frontend it came from
+- the save files that existed when the session started
+- every input in order: CLI prompt answers, or GUI commands such as a
+  submitted name, a chosen action tag or a hotkey
+- the final Player state (and, for the GUI, game state)
+
+Replaying restores those save files into a scratch directory, so the
+player's real saves are never read or overwritten. It then feeds the inputs
+back with every delay off and raises ReplayMismatch if the session ends
+anywhere else.
+
+    python cli.py --record bug.replay               python misi_nusantara.py --record bug.replay
+    python cli.py --replay bug.replay               python misi_nusantara.py --replay bug.replay
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import contextlib
+
+from shared import savecodec
+
+FORMAT = "nusantara-replay"
+VERSION = 1
+
+
+class ReplayMismatch(AssertionError):
+    """The replayed session ended in a different state than the recorded one."""
+
+
+class ReplayExhausted(EOFError):
+    """The game asked for more input than the recording holds."""
+
+
+def capture_files(paths):
+    """Reads the save files among paths that exist, for embedding in a recording."""
+    files = {}
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        name = os.path.basename(path)
+        if name.endswith((".sav", ".json")):
+            files[name] = {"save": savecodec.read_save(path)}
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                files[name] = {"text": f.read()}
+    return files
+
+
+def restore_files(files, directory):
+    for name, content in files.items():
+        path = os.path.join(directory, name)
+        if "text" in content:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content["text"])
+        elif name.endswith(".json"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(content["save"], f)
+        else:
+            savecodec.write_save(path, content["save"])
+
+
+class Recorder:
+    def __init__(self, path, frontend, initial_files=None):
+        self.path = path
+        self.frontend = frontend
+        self.initial_files = initial_files or {}
+        self.inputs = []
+
+    def record(self, entry):
+        """Adds one input: an answer string for the CLI, a [command, *args] list for the GUI."""
+        self.inputs.append(entry)
+
+    def finish(self, final_state, error=None):
+        """Writes the recording; error notes an exception that ended the session."""
+        data = {
+            "format": FORMAT,
+            "version": VERSION,
+            "frontend": self.frontend,
+            "files": self.initial_files,
+            "inputs": self.inputs,
+            "final": final_state
+        }
+        if error is not None:
+            data["error"] = repr(error)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"), ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+
+class Replay:
+    def __init__(self, data):
+        if data.get("format") != FORMAT:
+            raise ValueError("Not a Nusantara Mission recording")
+        if data.get("version") != VERSION:
+            raise ValueError(f"Unsupported recording version {data.get('version')}")
+        self.frontend = data["frontend"]
+        self.files = data.get("files", {})
+        self.inputs = data["inputs"]
+        self.final = data["final"]
+        self.error = data.get("error")
+        self.position = 0
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def expect_frontend(self, frontend):
+        if self.frontend != frontend:
+            raise ValueError(f"This recording is from the {self.frontend} version, not the {frontend} one")
+
+    @property
+    def finished(self):
+        return self.position >= len(self.inputs)
+
+    def next_input(self):
+        if self.finished:
+            raise ReplayExhausted("The recording has no more input")
+        entry = self.inputs[self.position]
+        self.position += 1
+        return entry
+
+    @contextlib.contextmanager
+    def sandbox(self):
+        """A scratch directory holding the save files the recorded session started with."""
+        directory = tempfile.mkdtemp(prefix="nusantara_replay_")
+        try:
+            restore_files(self.files, directory)
+            yield directory
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def check(self, final_state):
+        """Raises ReplayMismatch unless the replay ended where the recording did."""
+        # Round-trip through JSON so tuples and lists compare the way they were saved
+        final_state = json.loads(json.dumps(final_state))
+        if final_state == self.final:
+            return
+        lines = [f"Replay diverged after {self.position} of {len(self.inputs)} inputs:"]
+        for key in sorted(set(self.final) | set(final_state)):
+            expected, actual = self.final.get(key), final_state.get(key)
+            if expected != actual:
+                lines.append(f"  {key}: recorded {expected!r}, replayed {actual!r}")
+        raise ReplayMismatch("\n".join(lines))
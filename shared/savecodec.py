@@ -0,0 +1,301 @@
+"""
+Binary save format shared by the CLI and Pygame frontends.
+
+A save is encoded as
+
+    header   "<4sBBHHI": magic b"NMSV", format version, layout (CLI or GUI),
+             string count, token count, CLI journal sequence number
+    strings  every distinct string in the save (names, items, era and state
+             ids, choice keys), UTF-8, separated by NUL bytes
+    tokens   little-endian uint16s: string table indices, counts and tagged
+             choice values, in a fixed order per layout
+
+Each string is stored once however often it appears, and decoding is a
+handful of C-level calls (unpack, split, slicing) rather than a parser walking
+text. decode() returns the same dict the frontend's JSON layout holds, and
+read_save() also accepts the older JSON save files of either frontend.
+
+    python -m shared.savecodec dump SAVE...      print saves as JSON
+    python -m shared.savecodec convert SRC DST   re-encode (DST *.json writes JSON)
+"""
+
+import os
+import sys
+import json
+import struct
+import argparse
+from array import array
+
+MAGIC = b"NMSV"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHHI")
+
+CLI_LAYOUT = 1
+GUI_LAYOUT = 2
+
+NONE = 0xFFFF # Token for a missing optional string
+
+# Choice value tags; each is followed by one payload token
+_VALUE_NONE, _VALUE_FALSE, _VALUE_TRUE, _VALUE_INT, _VALUE_STR, _VALUE_BIG_INT = range(6)
+
+
+def detect_layout(data):
+    """Tells the CLI layout (player_name, current_era...) from the GUI one (player_data...)."""
+    if "player_data" in data:
+        return GUI_LAYOUT
+    if "player_name" in data:
+        return CLI_LAYOUT
+    raise ValueError("Not a Nusantara Mission save")
+
+
+class _Writer:
+    def __init__(self):
+        self.strings = {}
+        self.tokens = array("H")
+
+    def string(self, text):
+        index = self.strings.get(text)
+        if index is None:
+            if "\0" in text:
+                raise ValueError(f"Save strings cannot contain NUL: {text!r}")
+            index = self.strings[text] = len(self.strings)
+        self.tokens.append(index)
+
+    def optional_string(self, text):
+        if text is None:
+            self.tokens.append(NONE)
+        else:
+            self.string(text)
+
+    def strings_list(self, items):
+        self.tokens.append(len(items))
+        for item in items:
+            self.string(item)
+
+    def value(self, value):
+        if value is None:
+            self.tokens.extend((_VALUE_NONE, 0))
+        elif value is True:
+            self.tokens.extend((_VALUE_TRUE, 0))
+        elif value is False:
+            self.tokens.extend((_VALUE_FALSE, 0))
+        elif isinstance(value, int) and 0 <= value < NONE:
+            self.tokens.extend((_VALUE_INT, value))
+        elif isinstance(value, int):
+            self.tokens.append(_VALUE_BIG_INT)
+            self.string(str(value))
+        elif isinstance(value, str):
+            self.tokens.append(_VALUE_STR)
+            self.string(value)
+        else:
+            raise ValueError(f"Unsupported choice value: {value!r}")
+
+    def choices(self, choices):
+        self.tokens.append(len(choices))
+        for key, value in choices.items():
+            self.string(key)
+            self.value(value)
+
+    def cli_player(self, data):
+        self.string(data["player_name"])
+        self.strings_list(data["inventory"])
+        self.string(data["current_era"])
+        self.strings_list(data["completed_eras"])
+        self.choices(data.get("choices", {}))
+
+
+# Readers take the position of their first token and return (value, next position);
+# they index straight into the token tuple since decoding is the hot path for bulk loads.
+
+def _read_strings(strings, tokens, pos):
+    end = pos + 1 + tokens[pos]
+    return [strings[i] for i in tokens[pos + 1:end]], end
+
+
+def _read_choices(strings, tokens, pos):
+    choices = {}
+    count = tokens[pos]
+    pos += 1
+    for _ in range(count):
+        tag = tokens[pos + 1]
+        payload = tokens[pos + 2]
+        if tag == _VALUE_INT:
+            value = payload
+        elif tag == _VALUE_TRUE:
+            value = True
+        elif tag == _VALUE_FALSE:
+            value = False
+        elif tag == _VALUE_STR:
+            value = strings[payload]
+        elif tag == _VALUE_BIG_INT:
+            value = int(strings[payload])
+        else:
+            value = None
+        choices[strings[tokens[pos]]] = value
+        pos += 3
+    return choices, pos
+
+
+def _read_cli_player(strings, tokens, pos):
+    name = strings[tokens[pos]]
+    inventory, pos = _read_strings(strings, tokens, pos + 1)
+    current_era = strings[tokens[pos]]
+    completed_eras, pos = _read_strings(strings, tokens, pos + 1)
+    choices, pos = _read_choices(strings, tokens, pos)
+    return {
+        "player_name": name,
+        "inventory": inventory,
+        "current_era": current_era,
+        "completed_eras": completed_eras,
+        "choices": choices
+    }, pos
+
+
+def encode(data):
+    """Encodes a CLI or GUI save dict (as the frontend would write it to JSON) to bytes."""
+    layout = detect_layout(data)
+    writer = _Writer()
+    journal_seq = 0
+    try:
+        if layout == CLI_LAYOUT:
+            writer.cli_player(data)
+            journal_seq = data.get("journal_seq", 0)
+            resume = data.get("resume")
+            if resume is None:
+                writer.tokens.append(0)
+            else:
+                writer.tokens.append(1)
+                writer.cli_player(resume["era_entry"])
+                writer.tokens.append(len(resume["answers"]))
+                writer.tokens.extend(resume["answers"])
+        else:
+            player = data["player_data"]
+            writer.string(player["name"])
+            writer.strings_list(player["inventory"])
+            writer.strings_list(player["completed_eras"])
+            # player_choices_log is the same dict as player_data["choices"]
+            writer.choices(data.get("player_choices_log", player["choices"]))
+            writer.string(data["current_game_state"])
+            writer.string(data.get("current_era_title", ""))
+            writer.optional_string(data.get("previous_game_state"))
+        header = HEADER.pack(MAGIC, VERSION, layout, len(writer.strings), len(writer.tokens), journal_seq)
+    except (OverflowError, struct.error) as e:
+        raise ValueError(f"Save does not fit the binary format: {e}") from e
+
+    tokens = writer.tokens
+    if sys.byteorder == "big":
+        tokens.byteswap()
+    return b"".join((header, "\0".join(writer.strings).encode("utf-8"), tokens.tobytes()))
+
+
+def decode(blob):
+    """Decodes bytes from encode() back into the frontend's save dict."""
+    if len(blob) < HEADER.size:
+        raise ValueError("Save file is truncated")
+    magic, version, layout, string_count, token_count, journal_seq = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError("Not a binary Nusantara Mission save")
+    if version != VERSION:
+        raise ValueError(f"Unsupported save format version {version}")
+
+    tokens_start = len(blob) - 2 * token_count
+    if tokens_start < HEADER.size:
+        raise ValueError("Save file is truncated")
+    text = blob[HEADER.size:tokens_start].decode("utf-8")
+    strings = text.split("\0") if string_count else []
+    if len(strings) != string_count:
+        raise ValueError("Save file string table is corrupt")
+    tokens = struct.unpack_from(f"<{token_count}H", blob, tokens_start)
+
+    try:
+        if layout == CLI_LAYOUT:
+            data, pos = _read_cli_player(strings, tokens, 0)
+            data["journal_seq"] = journal_seq
+            has_resume = tokens[pos]
+            pos += 1
+            if has_resume:
+                era_entry, pos = _read_cli_player(strings, tokens, pos)
+                answers = list(tokens[pos + 1:pos + 1 + tokens[pos]])
+                pos += 1 + len(answers)
+                data["resume"] = {"era_entry": era_entry, "answers": answers}
+        elif layout == GUI_LAYOUT:
+            name = strings[tokens[0]]
+            inventory, pos = _read_strings(strings, tokens, 1)
+            completed_eras, pos = _read_strings(strings, tokens, pos)
+            choices, pos = _read_choices(strings, tokens, pos)
+            previous = tokens[pos + 2]
+            data = {
+                "player_data": {
+                    "name": name,
+                    "inventory": inventory,
+                    "completed_eras": completed_eras,
+                    "choices": choices
+                },
+                "current_game_state": strings[tokens[pos]],
+                "current_era_title": strings[tokens[pos + 1]],
+                "previous_game_state": None if previous == NONE else strings[previous],
+                "player_choices_log": choices
+            }
+            pos += 3
+        else:
+            raise ValueError(f"Unknown save layout {layout}")
+    except IndexError as e:
+        raise ValueError("Save file is corrupt") from e
+    if pos != token_count:
+        raise ValueError("Save file is corrupt")
+    return data
+
+
+def read_save(path):
+    """Reads a save file in the binary format or either frontend's older JSON layout."""
+    with open(path, "rb") as f:
+        blob = f.read()
+    if blob.startswith(MAGIC):
+        return decode(blob)
+    data = json.loads(blob)
+    detect_layout(data)
+    return data
+
+
+def write_save(path, data):
+    """Writes a save in the binary format, replacing the old file only once it is complete."""
+    blob = encode(data)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(blob)
+    os.replace(temp_path, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and convert Nusantara Mission save files")
+    commands = parser.add_subparsers(dest="command", required=True)
+    dump = commands.add_parser("dump", help="print saves as JSON")
+    dump.add_argument("paths", nargs="+")
+    convert = commands.add_parser("convert", help="re-encode a save (a DST ending in .json is written as JSON)")
+    convert.add_argument("src")
+    convert.add_argument("dst")
+    args = parser.parse_args(argv)
+
+    if args.command == "dump":
+        status = 0
+        for path in args.paths:
+            if len(args.paths) > 1:
+                print(f"# {path}")
+            try:
+                print(json.dumps(read_save(path), indent=2, ensure_ascii=False))
+            except (OSError, ValueError) as e:
+                print(f"{path}: {e}", file=sys.stderr)
+                status = 1
+        return status
+
+    data = read_save(args.src)
+    if args.dst.endswith(".json"):
+        with open(args.dst, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+    else:
+        write_save(args.dst, data)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Story content loader shared by the CLI and Pygame frontends.
+
+Every era lives in its own data file under story/ (listed in story/eras.json).
+An era is only read the first time something asks for it, and the parsed
+result is compiled to a marshal file in story/__storycache__ that is reused
+until the source file changes.
+"""
+
+import os
+import json
+import marshal
+import importlib.util
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORY_DIR = os.path.join(REPO_ROOT, "story")
+MANIFEST_NAME = "eras.json"
+CACHE_DIR_NAME = "__storycache__"
+# Marshal output is only valid for the interpreter that wrote it, so tie the
+# cache to the bytecode magic number the same way .pyc files are.
+CACHE_MAGIC = b"NMSC" + importlib.util.MAGIC_NUMBER
+
+
+def freeze(value):
+    """Turns parsed JSON lists into tuples so effects and options are hashable and immutable."""
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, dict):
+        return {key: freeze(item) for key, item in value.items()}
+    return value
+
+
+class StoryLibrary:
+    def __init__(self, story_dir=STORY_DIR, use_cache=True):
+        self.story_dir = story_dir
+        self.cache_dir = os.path.join(story_dir, CACHE_DIR_NAME)
+        self.use_cache = use_cache
+        with open(os.path.join(story_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self._manifest = {era["id"]: era for era in manifest["eras"]}
+        self.era_ids = tuple(self._manifest)
+        self._eras = {}
+
+    def has_era(self, era_id):
+        return era_id in self._manifest
+
+    def is_loaded(self, era_id):
+        return era_id in self._eras
+
+    def era(self, era_id):
+        data = self._eras.get(era_id)
+        if data is None:
+            data = self._load(era_id)
+            self._eras[era_id] = data
+        return data
+
+    def era_for_state(self, state_id):
+        """Returns the era whose GUI scenes include state_id, without loading any era."""
+        for era_id, entry in self._manifest.items():
+            for prefix in entry.get("gui_state_prefixes", ()):
+                if state_id.startswith(prefix):
+                    return era_id
+        return None
+
+    def cli_script(self, era_id):
+        return self.era(era_id)["cli"]["script"]
+
+    def gui_scenes(self, era_id):
+        return self.era(era_id)["gui"]["scenes"]
+
+    def _load(self, era_id):
+        source_path = os.path.join(self.story_dir, self._manifest[era_id]["file"])
+        stat = os.stat(source_path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cache_path = os.path.join(self.cache_dir, era_id + ".marshal")
+
+        if self.use_cache:
+            data = self._read_cache(cache_path, stamp)
+            if data is not None:
+                return data
+
+        with open(source_path, "r", encoding="utf-8") as f:
+            data = freeze(json.load(f))
+        if self.use_cache:
+            self._write_cache(cache_path, stamp, data)
+        return data
+
+    def _read_cache(self, cache_path, stamp):
+        try:
+            with open(cache_path, "rb") as f:
+                if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                    return None
+                cached_stamp, data = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        return data if tuple(cached_stamp) == stamp else None
+
+    def _write_cache(self, cache_path, stamp, data):
+        # A read-only install just goes without the cache
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(CACHE_MAGIC)
+                marshal.dump((stamp, data), f)
+            os.replace(temp_path, cache_path)
+        except OSError:
+            pass
@@ -0,0 +1,213 @@
+"""
+Leveled, structured tracing for the CLI and Pygame frontends.
+
+An event is a name plus keyword fields, e.g.
+
+    tracer.info("state.change", from_state="INTRO", to_state="MAJAPAHIT_MARKET", ms=0.4)
+
+Recording one never blocks the game loop. It is dropped straight away if
+its level is below the tracer's, and events of a chatty name can be sampled
+down to one in N. A kept event is a tuple stored in a fixed-size ring
+buffer. Writers take a sequence number from itertools.count, which the GIL
+makes atomic, and store into their own slot. There is no lock, no
+formatting and no I/O.
+
+With start_flusher(), a background thread writes new events to a rotating
+log file as JSON lines about once a second. Without it, nothing is written
+anywhere. The last events are still in memory, and dump() prints them after
+a crash.
+
+    python misi_nusantara.py --trace trace.log --trace-level debug
+"""
+
+import os
+import sys
+import json
+import time
+import itertools
+import threading
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARNING: "warning", ERROR: "error"}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+DEFAULT_CAPACITY = 1024 # Events kept in memory
+DEFAULT_FLUSH_INTERVAL = 1.0 # Seconds between writes of the background flusher
+DEFAULT_MAX_BYTES = 1024 * 1024 # Log file size before it is rotated
+DEFAULT_BACKUPS = 3 # Rotated log files kept: trace.log.1 ... trace.log.3
+
+
+def parse_level(name):
+    try:
+        return LEVELS[name.lower()]
+    except (KeyError, AttributeError):
+        raise ValueError(f"Unknown trace level {name!r}, expected one of {', '.join(LEVELS)}") from None
+
+
+def format_event(event):
+    """One JSON line: time, level, event name, then the event's fields (floats to 3 decimals, e.g. timings in ms)"""
+    _, when, level, name, fields = event
+    record = {"t": round(when, 6), "level": LEVEL_NAMES.get(level, level), "event": name}
+    for key, value in fields.items():
+        record[key] = round(value, 3) if isinstance(value, float) else value
+    return json.dumps(record, default=str) + "\n"
+
+
+class RotatingFile:
+    """Appends text to path, moving it to path.1 (path.1 to path.2, ...) when it grows past max_bytes."""
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._file = open(path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+
+    def write(self, text):
+        size = len(text.encode("utf-8"))
+        if self._size and self._size + size > self.max_bytes:
+            self._rotate()
+        self._file.write(text)
+        self._size += size
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._size = 0
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class Tracer:
+    def __init__(self, capacity=DEFAULT_CAPACITY, level=INFO, sample_every=None, clock=time.time):
+        self.capacity = capacity
+        self.level = level
+        self.sample_every = dict(sample_every or {}) # Event name -> keep one in this many (warnings are never sampled)
+        self.clock = clock
+        self._ring = [None] * capacity
+        self._sequence = itertools.count()
+        self._written = 0 # One past the newest sequence number stored
+        self._sample_counts = {}
+        self._flushed = 0 # Sequence number the flusher continues from
+        self._sink = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def enabled_for(self, level):
+        return level >= self.level
+
+    def event(self, level, name, **fields):
+        if level >= self.level:
+            self._record(level, name, fields)
+
+    # The level shortcuts call _record directly: forwarding **fields to event() would copy them a second time
+    def debug(self, name, **fields):
+        if DEBUG >= self.level:
+            self._record(DEBUG, name, fields)
+
+    def info(self, name, **fields):
+        if INFO >= self.level:
+            self._record(INFO, name, fields)
+
+    def warning(self, name, **fields):
+        if WARNING >= self.level:
+            self._record(WARNING, name, fields)
+
+    def error(self, name, **fields):
+        if ERROR >= self.level:
+            self._record(ERROR, name, fields)
+
+    def _record(self, level, name, fields):
+        every = self.sample_every.get(name)
+        if every and level < WARNING:
+            # Racing threads may both count the same number; sampling doesn't need to be exact
+            count = self._sample_counts.get(name, 0)
+            self._sample_counts[name] = count + 1
+            if count % every:
+                return
+        seq = next(self._sequence)
+        self._ring[seq % self.capacity] = (seq, self.clock(), level, name, fields)
+        if seq >= self._written:
+            self._written = seq + 1
+
+    def _events_since(self, start):
+        """The events from sequence number start on that are still in the ring, and how many were overwritten"""
+        end = self._written
+        start = max(start, end - self.capacity, 0)
+        events = []
+        for seq in range(start, end):
+            event = self._ring[seq % self.capacity]
+            if event is None or event[0] < seq:
+                break # Taken by a writer that hasn't stored it yet; picked up next time
+            if event[0] == seq:
+                events.append(event)
+        return events
+
+    def recent(self, count=None):
+        """The last count events kept in memory (all of them by default), oldest first"""
+        count = self.capacity if count is None else min(count, self.capacity)
+        return self._events_since(self._written - count)
+
+    def dump(self, file=None, count=None):
+        """Writes the last events kept in memory, e.g. to stderr after a crash."""
+        file = file or sys.stderr
+        events = self.recent(count)
+        file.write(f"Last {len(events)} trace events:\n")
+        file.writelines(format_event(event) for event in events)
+        file.flush()
+
+    def start_flusher(self, path, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS,
+                      interval=DEFAULT_FLUSH_INTERVAL):
+        """Starts writing events to a rotating log file in the background; path "-" writes to stderr."""
+        if self._thread is not None:
+            raise RuntimeError("The trace flusher is already running")
+        self._sink = sys.stderr if path == "-" else RotatingFile(path, max_bytes, backups)
+        self._flushed = max(0, self._written - self.capacity)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._flush_loop, args=(interval,), name="trace-flusher", daemon=True)
+        self._thread.start()
+
+    def _flush_loop(self, interval):
+        while not self._stop.wait(interval):
+            self._flush()
+        self._flush()
+
+    def _flush(self):
+        start = self._flushed
+        events = self._events_since(start)
+        if not events:
+            return
+        lost = events[0][0] - start
+        lines = [format_event(event) for event in events]
+        if lost:
+            lines.insert(0, format_event((None, self.clock(), WARNING, "trace.overwritten", {"count": lost})))
+        self._flushed = events[-1][0] + 1
+        try:
+            self._sink.write("".join(lines))
+            self._sink.flush()
+        except (OSError, ValueError):
+            pass # A full disk or closed stream must not take the game down with it
+
+    def close(self):
+        """Stops the flusher after it has written everything recorded so far."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if self._sink is not sys.stderr:
+            self._sink.close()
+        self._sink = None
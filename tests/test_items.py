@@ -0,0 +1,39 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.items import ITEMS_FILE_NAME, ItemRegistry
+
+
+class ItemInfoTest(unittest.TestCase):
+    def setUp(self):
+        self.story_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.story_dir.name, ITEMS_FILE_NAME)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"items": [{"name": "Secret Map", "era": "colonial", "description": "A map."}]}, f)
+        self.registry = ItemRegistry(self.story_dir.name)
+
+    def tearDown(self):
+        self.story_dir.cleanup()
+
+    def test_info_is_loaded_on_first_access_and_cached(self):
+        item_id = self.registry.intern("Secret Map")
+        self.assertIsNone(self.registry._info) # Interning alone doesn't read the file
+        self.assertEqual(self.registry.info(item_id)["description"], "A map.")
+        os.remove(self.path)
+        self.assertEqual(self.registry.info(item_id)["era"], "colonial")
+
+    def test_unlisted_item_has_no_info(self):
+        self.assertEqual(self.registry.info(self.registry.intern("Odd Dark Stone")), {})
+
+    def test_missing_file_has_no_info(self):
+        os.remove(self.path)
+        self.assertEqual(self.registry.info(self.registry.intern("Secret Map")), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Nusantara Mission - Exhaustive story explorer
+
+Plays every choice sequence through the CLI eras and reports:
+
+- each ending (the eras completed) and the inventories players can finish with
+- every path that hits an error, such as "Era '...' not found" or a broken
+  story step
+
+The search is breadth-first. Each choice point is a task for a
+ProcessPoolExecutor: a worker replays the answers that lead there and
+returns the options offered. A choice point is keyed by its place in the
+era script and a hash of the Player's state, and one that was already seen
+is not expanded again. Branches that merge back into the same state are
+therefore explored once.
+
+The GUI state machine is explored in the same pool by GUI/story_graph.py
+(when pygame is installed), which reports its endings, dead ends and
+unreachable scenes.
+
+    python tools/explore_story.py                # both frontends, one worker per core
+    python tools/explore_story.py --workers 1 --no-gui
+"""
+
+import os
+import sys
+import time
+import hashlib
+import argparse
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "CLI"))
+
+import cli
+
+EXPLORER_NAME = "Explorer"
+DEFAULT_MAX_DEPTH = 200 # Choices along one path before it is reported as a possible loop
+
+
+class _NullJournal:
+    """Stands in for the SaveJournal so exploring never touches the disk."""
+
+    def exists(self):
+        return False
+
+    def record(self, player, op, **fields):
+        pass
+
+    def reset(self, player):
+        pass
+
+    def compact(self, player):
+        pass
+
+    def close(self):
+        pass
+
+
+class _NullOutput:
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class _Ended(Exception):
+    pass
+
+
+class ExplorerGame(cli.Game):
+    """A Game whose option menus are "choose" requests the explorer answers directly."""
+
+    def __init__(self, story, step_positions):
+        super().__init__(instant_text=True, output=_NullOutput(), story=story)
+        self.step_positions = step_positions
+        self.position = None # Where in the script the current choice is
+        self.errors = []
+        self.ending = None
+        self._null_journal = _NullJournal()
+
+    @property
+    def journal(self):
+        return self._null_journal
+
+    def clear_screen(self):
+        pass
+
+    def write(self, text=""):
+        if text.startswith("Error"):
+            self.errors.append(text)
+
+    def show_options(self, options):
+        return (yield ("choose", tuple(options)))
+
+    def _step_choose(self, step):
+        self.position = self.step_positions[id(step)]
+        return (yield from super()._step_choose(step))
+
+    def show_ending(self):
+        self.ending = self.player.to_dict()
+        raise _Ended
+        yield # show_ending is a generator like the one it replaces
+
+    def state_key(self):
+        """The choice point and the player's state there; equal keys have the same futures"""
+        state = self.player.to_dict()
+        # script_vars only change wording, never which branch is taken, so they are left out
+        digest = hashlib.blake2b(repr(sorted(state.items())).encode("utf-8"), digest_size=16).hexdigest()
+        return (self.player.current_era, self.position, digest)
+
+
+def script_positions(story):
+    """Numbers every step of every era script, the same way in every process."""
+    positions = {}
+
+    def walk(value, era_id):
+        if isinstance(value, dict):
+            positions[id(value)] = (era_id, len(positions))
+            for item in value.values():
+                walk(item, era_id)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                walk(item, era_id)
+
+    for era_id in story.era_ids:
+        walk(story.cli_script(era_id), era_id)
+    return positions
+
+
+_worker = {}
+
+
+def _init_worker():
+    story = cli.StoryLibrary()
+    _worker["story"] = story
+    _worker["positions"] = script_positions(story)
+
+
+def explore_prefix(answers):
+    """Replays answers from a new game and reports what comes next.
+
+    Returns ("choice", key, options), ("ending", player state) or ("error", message).
+    """
+    game = ExplorerGame(_worker["story"], _worker["positions"])
+    flow = game.start()
+    remaining = iter(answers)
+    reply = None
+    try:
+        while True:
+            request = flow.send(reply)
+            reply = None
+            if request[0] == "choose":
+                reply = next(remaining, None)
+                if reply is None:
+                    return ("choice", game.state_key(), request[1])
+            elif request[0] == "input":
+                reply = EXPLORER_NAME if game.player is None else ""
+            elif request[0] == "io":
+                reply = request[1]()
+    except _Ended:
+        if game.errors:
+            return ("error", game.errors[0], game.ending)
+        return ("ending", game.ending)
+    except StopIteration:
+        return ("error", "The game ended without reaching the ending", None)
+    except Exception as e:
+        return ("error", f"{type(e).__name__}: {e}", game.player.to_dict() if game.player else None)
+    finally:
+        flow.close()
+
+
+def explore_gui():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    sys.path.insert(0, os.path.join(REPO_ROOT, "GUI"))
+    import story_graph
+    graph = story_graph.StoryGraph()
+    return {
+        "scenes": len(graph.story_states),
+        "situations": len(graph.situations),
+        "endings": sorted({(tuple(s.player.completed_eras), tuple(sorted(s.player.inventory))) for s in graph.endings()}),
+        "unreachable": graph.unreachable_states(),
+        "dead_ends": sorted({s.state_id for s in graph.dead_ends()}),
+        "unused_actions": [f"{state_id}.{tag}" for state_id, tag in graph.unused_actions()],
+    }
+
+
+class CliExploration:
+    def __init__(self, max_depth=DEFAULT_MAX_DEPTH):
+        self.max_depth = max_depth
+        self.seen = set()
+        self.choice_points = 0
+        self.duplicates = 0
+        self.endings = defaultdict(list) # completed eras -> labelled paths
+        self.inventories = Counter() # inventory at the ending -> paths
+        self.errors = defaultdict(list) # message -> labelled paths
+        self.truncated = []
+
+    def run(self, pool, chunksize=8):
+        frontier = [((), ())] # (answers, option labels) from a new game
+        while frontier:
+            prefixes = [answers for answers, _ in frontier]
+            next_frontier = []
+            for (answers, labels), result in zip(frontier, pool.map(explore_prefix, prefixes, chunksize=chunksize)):
+                kind = result[0]
+                if kind == "choice":
+                    _, key, options = result
+                    if key in self.seen:
+                        self.duplicates += 1
+                        continue
+                    self.seen.add(key)
+                    self.choice_points += 1
+                    if len(answers) >= self.max_depth:
+                        self.truncated.append(labels)
+                        continue
+                    next_frontier.extend((answers + (i,), labels + (option,)) for i, option in enumerate(options))
+                elif kind == "ending":
+                    state = result[1]
+                    self.endings[tuple(state["completed_eras"])].append(labels)
+                    self.inventories[tuple(state["inventory"])] += 1
+                else:
+                    self.errors[result[1]].append(labels)
+            frontier = next_frontier
+
+
+def format_path(labels):
+    return " > ".join(labels) if labels else "(no choices)"
+
+
+def print_cli_report(exploration, elapsed, workers):
+    paths = sum(len(p) for p in exploration.endings.values()) + sum(len(p) for p in exploration.errors.values())
+    print(f"CLI: {exploration.choice_points} choice points ({exploration.duplicates} repeats skipped), "
+          f"{paths} distinct playthroughs in {elapsed:.2f}s on {workers} worker(s)")
+
+    print("\nEndings (eras completed):")
+    for eras, labelled in sorted(exploration.endings.items()):
+        print(f"  {', '.join(eras) or '(none)':<30} {len(labelled):>5} paths   e.g. {format_path(labelled[0])}")
+
+    print("\nInventories at the ending:")
+    for inventory, count in exploration.inventories.most_common():
+        print(f"  {count:>5}  {', '.join(inventory) or '(empty)'}")
+
+    if exploration.errors:
+        print("\nErrors:")
+        for message, labelled in exploration.errors.items():
+            print(f"  {message}  ({len(labelled)} paths)")
+            print(f"    e.g. {format_path(labelled[0])}")
+    if exploration.truncated:
+        print(f"\nStopped {len(exploration.truncated)} paths at {exploration.max_depth} choices (a loop?):")
+        print(f"    e.g. {format_path(exploration.truncated[0])}")
+
+
+def print_gui_report(report):
+    print(f"\nGUI: {report['scenes']} scenes, {report['situations']} situations")
+    print("  Endings (eras completed / inventory):")
+    for eras, inventory in report["endings"]:
+        print(f"    {', '.join(eras) or '(none)'} / {', '.join(inventory) or '(empty)'}")
+    for heading, key in (("Unreachable scenes", "unreachable"), ("Dead ends", "dead_ends"),
+                         ("Actions no option offers", "unused_actions")):
+        if report[key]:
+            print(f"  {heading}: {', '.join(report[key])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play every choice sequence through the Nusantara Mission story")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--max-depth", type=int, default=DEFAULT_MAX_DEPTH,
+                        help="choices along one path before it is cut off (default %(default)s)")
+    parser.add_argument("--no-gui", action="store_true", help="skip the GUI state machine")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+        gui_future = None
+        if not args.no_gui:
+            gui_future = pool.submit(explore_gui)
+        exploration = CliExploration(args.max_depth)
+        exploration.run(pool)
+        elapsed = time.perf_counter() - started
+        print_cli_report(exploration, elapsed, args.workers)
+
+        if gui_future is not None:
+            try:
+                print_gui_report(gui_future.result())
+            except ImportError as e:
+                print(f"\nGUI: skipped ({e})")
+    return 1 if exploration.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())